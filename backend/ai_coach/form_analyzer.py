@@ -9,7 +9,8 @@ from dataclasses import dataclass
 from enum import Enum
 import json
 
-from ..analysis.kinovea_engine import AnalysisResult, AnalysisAngle, Point2D
+from ..analysis.kinovea_engine import AnalysisResult, AnalysisAngle, Point2D, TrackingPoint
+from ..analysis.kinematics import compute_kinematics
 
 class FormCategory(Enum):
     """フォーム評価カテゴリ"""
@@ -69,7 +70,7 @@ class SoftTennisFormAnalyzer:
         """軟式テニス評価基準を読み込み"""
         return {
             "stance": {
-                "foot_distance": {"min": 0.5, "max": 0.8, "optimal": 0.65},  # 肩幅比
+                "foot_distance": {"min": 0.5, "max": 0.8, "optimal": 0.65},  # メートル（両足首の間隔）
                 "knee_bend": {"min": 10, "max": 45, "optimal": 25},  # 度
                 "weight_distribution": {"front": 0.4, "back": 0.6}  # 初期構え
             },
@@ -335,15 +336,17 @@ class SoftTennisFormAnalyzer:
             # フォロースルーの完成度を評価
             points = analysis_result.racket_trajectory.points
             
-            # 軌道の滑らかさ
-            smoothness = self._calculate_trajectory_smoothness(points)
-            details["smoothness"] = smoothness * 100
-            
             # 方向性
             direction_score = self._evaluate_follow_through_direction(points)
             details["direction"] = direction_score
             
-            total_score = (smoothness * 100 + direction_score) / 2
+            # 軌道の滑らかさ（判断できない軌道は方向性のみで評価）
+            smoothness = self._calculate_trajectory_smoothness(analysis_result.racket_trajectory)
+            if smoothness is not None:
+                details["smoothness"] = smoothness * 100
+                total_score = (smoothness * 100 + direction_score) / 2
+            else:
+                total_score = direction_score
         
         return FormScore(
             category=FormCategory.FOLLOW_THROUGH,
@@ -476,9 +479,9 @@ class SoftTennisFormAnalyzer:
     
     # ヘルパーメソッド（簡略化実装）
     def _calculate_foot_distance(self, analysis_result: AnalysisResult) -> float:
-        """足の距離計算"""
-        # 実装の詳細は省略
-        return 0.65  # サンプル値
+        """足の距離計算（正面の解析で求めた両足首の間隔、メートル）"""
+        stance = (analysis_result.swing_analysis or {}).get('stance_stability', {})
+        return stance.get('foot_distance', 0.65)
     
     def _evaluate_weight_distribution(self, analysis_result: AnalysisResult) -> float:
         """体重配分評価"""
@@ -492,9 +495,10 @@ class SoftTennisFormAnalyzer:
         """インパクト角度評価"""
         return 85.0  # サンプル値
     
-    def _calculate_trajectory_smoothness(self, points: List[Point2D]) -> float:
-        """軌道の滑らかさ計算"""
-        return 0.8  # サンプル値
+    def _calculate_trajectory_smoothness(self, trajectory: TrackingPoint) -> Optional[float]:
+        """軌道の滑らかさ計算（対数無次元躍度、単位に依存しないためフレーム番号を時刻とみなす）"""
+        kinematics = compute_kinematics(trajectory.xy, trajectory.frame_numbers)
+        return kinematics.smoothness()
     
     def _evaluate_follow_through_direction(self, points: List[Point2D]) -> float:
         """フォロースルー方向評価"""
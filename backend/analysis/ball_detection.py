@@ -0,0 +1,208 @@
+"""
+ボール検出
+色マスク（と任意で背景差分）の連結成分からボール候補を抽出し、形状で順位付けする
+"""
+
+import math
+from dataclasses import dataclass
+from typing import List, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+from .frame_normalizer import NormalizedFrame, frame_view
+
+@dataclass
+class BallCandidate:
+    """ボール候補（座標は入力フレーム上のピクセル）"""
+    x: float
+    y: float
+    radius: float
+    area: int
+    circularity: float  # 外接円に対する塗りつぶし率（真円で1）
+    score: float
+
+    def bbox(self) -> Tuple[int, int, int, int]:
+        """外接矩形 (x, y, w, h)"""
+        r = max(1, int(math.ceil(self.radius)))
+        return (int(self.x) - r, int(self.y) - r, 2 * r, 2 * r)
+
+class BallDetector:
+    """色マスクの連結成分によるボール検出器
+
+    HSVの色範囲でマスクを作り、connectedComponentsWithStats の統計量
+    （面積・外接矩形）で大きさ・縦横比を判定して候補を絞り込み、残った成分のみ
+    輪郭の最小外接円に対する面積比で円形度を求める（外接矩形から求めた値は
+    その上限のため、絞り込みに使える）。円形度が境界付近の候補のみ、その周辺の
+    小領域でHoughCirclesを実行して確認する。背景差分を有効にした場合は、動いている領域だけを候補にする。
+    背景モデル（MOG2）は探索領域に関係なくフレームごとに1回、縮小したフレーム
+    全体で更新し、探索窓での検出にもその前景マスクを使う。背景モデルは detect() が
+    呼ばれたフレームでのみ更新されるため、毎フレーム検出する追跡器（kalman・
+    detector）と組み合わせて使う。
+    """
+
+    def __init__(self, lower: np.ndarray, upper: np.ndarray, min_radius: float = 3,
+                 max_radius: float = 50, min_circularity: float = 0.6,
+                 background_subtraction: bool = False, hough_check: bool = True,
+                 background_resolution: int = 640):
+        """
+        Args:
+            lower: HSV下限
+            upper: HSV上限
+            min_radius: ボール半径の下限（ピクセル）
+            max_radius: ボール半径の上限（ピクセル）
+            min_circularity: 候補とする円形度の下限
+            background_subtraction: Trueの場合はMOG2の前景のみを候補にする
+            hough_check: 円形度が下限をやや下回る候補をHoughCirclesで確認する
+            background_resolution: 背景モデルを更新するフレームの長辺（ピクセル）
+        """
+        self.lower = lower
+        self.upper = upper
+        self.min_radius = min_radius
+        self.max_radius = max_radius
+        self.min_circularity = min_circularity
+        self.hough_check = hough_check
+        self._kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+        self._background = (
+            cv2.createBackgroundSubtractorMOG2(history=120, varThreshold=32, detectShadows=False)
+            if background_subtraction else None
+        )
+        self.background_resolution = background_resolution
+        self._background_frame = None                        # 背景モデルを更新したフレーム
+        self._foreground: Optional[np.ndarray] = None        # その縮小フレームでの前景マスク
+
+    def detect(self, frame: Union[np.ndarray, NormalizedFrame], color_order: str = "bgr",
+               roi: Optional[Tuple[int, int, int, int]] = None,
+               max_candidates: int = 5) -> List[BallCandidate]:
+        """
+        ボール候補をスコア順に返す
+
+        Args:
+            frame: 入力フレーム（NormalizedFrameなら共有のHSV変換結果を使う）
+            color_order: フレームの色順
+            roi: 探索領域 (x, y, w, h)（Noneならフレーム全体）
+            max_candidates: 返す候補の最大数
+        """
+        offset_x, offset_y = 0, 0
+        if roi is not None:
+            offset_x, offset_y, w, h = roi
+            if w <= 0 or h <= 0:
+                return []
+
+        hsv = frame_view(frame, color_order, "hsv", roi)
+        if hsv.size == 0:
+            return []
+        mask = cv2.inRange(hsv, self.lower, self.upper)
+
+        if self._background is not None:
+            mask = cv2.bitwise_and(mask, self._foreground_mask(frame, color_order, roi, mask.shape))
+
+        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, self._kernel)
+        count, labels, stats, centroids = cv2.connectedComponentsWithStats(mask, connectivity=8)
+        if count <= 1:
+            return []
+
+        # 背景（ラベル0）を除いた全成分をまとめて判定
+        stats = stats[1:]
+        centroids = centroids[1:]
+        width = stats[:, cv2.CC_STAT_WIDTH]
+        height = stats[:, cv2.CC_STAT_HEIGHT]
+        area = stats[:, cv2.CC_STAT_AREA]
+
+        radius = np.maximum(width, height) / 2
+        aspect = np.minimum(width, height) / np.maximum(width, height)
+        # 外接矩形に内接する円との面積比（外接円との面積比の上限）
+        circularity_bound = area / (np.pi * radius ** 2)
+
+        lenient = self.min_circularity * 0.75 if self.hough_check else self.min_circularity
+        keep = ((radius >= self.min_radius) & (radius <= self.max_radius) &
+                (aspect >= 0.6) & (circularity_bound >= lenient))
+
+        candidates = []
+        for i in np.flatnonzero(keep):
+            circularity = self._circularity(labels, stats[i], i + 1)
+            if circularity < lenient:
+                continue
+
+            x = float(centroids[i, 0]) + offset_x
+            y = float(centroids[i, 1]) + offset_y
+            r = float(radius[i])
+            if circularity < self.min_circularity:
+                # 形が崩れて見える候補は周辺の小領域で円を確認
+                circle = self._hough_circle(frame, color_order, x, y, r)
+                if circle is None:
+                    continue
+                x, y, r = circle
+
+            candidates.append(BallCandidate(
+                x=x,
+                y=y,
+                radius=r,
+                area=int(area[i]),
+                circularity=circularity,
+                score=circularity * float(aspect[i])
+            ))
+
+        candidates.sort(key=lambda c: c.score, reverse=True)
+        return candidates[:max_candidates]
+
+    def _circularity(self, labels: np.ndarray, stats: np.ndarray, label: int) -> float:
+        """連結成分の面積と輪郭の最小外接円の面積の比（真円で約1、正方形で約0.64）"""
+        x, y, w, h, area = stats[:5]
+        component = (labels[y:y + h, x:x + w] == label).astype(np.uint8)
+        contours, _ = cv2.findContours(component, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        _, radius = cv2.minEnclosingCircle(np.concatenate(contours))
+        # 輪郭は画素の中心を通るため、画素の半分だけ半径を広げて面積と比べる
+        return float(area / (np.pi * (radius + 0.5) ** 2))
+
+    def _foreground_mask(self, frame: Union[np.ndarray, NormalizedFrame], color_order: str,
+                         roi: Optional[Tuple[int, int, int, int]],
+                         shape: Tuple[int, int]) -> np.ndarray:
+        """探索領域の前景マスク（背景モデルは新しいフレームごとに縮小したフレーム全体で更新）"""
+        frame_h, frame_w = frame.shape[:2]
+        # 同じフレームで探索窓と全体を続けて検出する場合は1回だけ更新する
+        if frame is not self._background_frame:
+            image = frame_view(frame, color_order, color_order)
+            scale = min(1.0, self.background_resolution / max(frame_w, frame_h))
+            if scale < 1.0:
+                image = cv2.resize(image, (max(1, round(frame_w * scale)), max(1, round(frame_h * scale))),
+                                   interpolation=cv2.INTER_AREA)
+            self._foreground = self._background.apply(image)
+            self._background_frame = frame
+
+        foreground = self._foreground
+        scale_x = foreground.shape[1] / frame_w
+        scale_y = foreground.shape[0] / frame_h
+        if roi is not None:
+            x, y, w, h = roi
+            x0 = min(int(x * scale_x), foreground.shape[1] - 1)
+            y0 = min(int(y * scale_y), foreground.shape[0] - 1)
+            x1 = max(x0 + 1, int(math.ceil((x + w) * scale_x)))
+            y1 = max(y0 + 1, int(math.ceil((y + h) * scale_y)))
+            foreground = foreground[y0:y1, x0:x1]
+        if foreground.shape[:2] == shape:
+            return foreground
+        return cv2.resize(foreground, (shape[1], shape[0]), interpolation=cv2.INTER_NEAREST)
+
+    def _hough_circle(self, frame: Union[np.ndarray, NormalizedFrame], color_order: str,
+                      x: float, y: float, radius: float) -> Optional[Tuple[float, float, float]]:
+        """候補周辺の小領域でHoughCirclesを実行し、円が見つかれば (x, y, r) を返す"""
+        frame_h, frame_w = frame.shape[:2]
+        margin = int(math.ceil(radius * 2))
+        x0 = max(0, int(x) - margin)
+        y0 = max(0, int(y) - margin)
+        x1 = min(frame_w, int(x) + margin + 1)
+        y1 = min(frame_h, int(y) + margin + 1)
+        if x1 <= x0 or y1 <= y0:
+            return None
+
+        gray = frame_view(frame, color_order, "gray", (x0, y0, x1 - x0, y1 - y0))
+        circles = cv2.HoughCircles(gray, cv2.HOUGH_GRADIENT, 1, max(1, margin),
+                                   param1=50, param2=15,
+                                   minRadius=max(1, int(radius * 0.5)),
+                                   maxRadius=int(math.ceil(radius * 1.5)))
+        if circles is None:
+            return None
+
+        cx, cy, r = circles[0, 0]
+        return float(cx) + x0, float(cy) + y0, float(r)
@@ -0,0 +1,147 @@
+"""
+ボール追跡
+等加速度モデルのカルマンフィルタで次の位置を予測し、予測位置周辺の小領域のみを検出する
+"""
+
+import math
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .ball_detection import BallDetector
+
+class BallTracker:
+    """カルマンフィルタ予測による探索窓付きボール追跡
+
+    毎フレーム、予測位置を中心とする探索窓（予測の不確かさに応じて拡大）だけで
+    検出器を実行し、予測に最も近い候補で状態を更新する。redetect_after フレーム
+    連続で見失った場合はフレーム全体で再検出し、lost_after フレーム連続で
+    見失った場合は追跡を打ち切って初期検出からやり直す。
+    状態は (x, y, vx, vy, ax, ay)、単位はピクセルと秒。
+    """
+
+    def __init__(self, detector: BallDetector, min_search_radius: float = 40,
+                 max_search_radius: float = 200, redetect_after: int = 3,
+                 lost_after: int = 15, measurement_noise: float = 2.0,
+                 process_noise: Tuple[float, float, float] = (2.0, 60.0, 3000.0)):
+        """
+        Args:
+            detector: ボール検出器
+            min_search_radius: 探索窓の半径の下限（ピクセル）
+            max_search_radius: 探索窓の半径の上限（ピクセル）
+            redetect_after: フレーム全体で再検出するまでの連続見失いフレーム数
+            lost_after: 追跡を打ち切るまでの連続見失いフレーム数
+            measurement_noise: 検出位置の標準偏差（ピクセル）
+            process_noise: 1ステップあたりの位置・速度・加速度の標準偏差
+        """
+        self.detector = detector
+        self.min_search_radius = min_search_radius
+        self.max_search_radius = max_search_radius
+        self.redetect_after = redetect_after
+        self.lost_after = lost_after
+
+        self.kalman = cv2.KalmanFilter(6, 2)
+        self.kalman.measurementMatrix = np.eye(2, 6, dtype=np.float32)
+        self.kalman.measurementNoiseCov = np.eye(2, dtype=np.float32) * measurement_noise ** 2
+        position, velocity, acceleration = process_noise
+        self.kalman.processNoiseCov = np.diag(
+            [position ** 2] * 2 + [velocity ** 2] * 2 + [acceleration ** 2] * 2
+        ).astype(np.float32)
+
+        self.reset()
+
+    def reset(self):
+        """追跡状態を初期化（次のフレームはフレーム全体で検出）"""
+        self.active = False
+        self.misses = 0
+        self.radius = self.min_search_radius
+        self._last_time: Optional[float] = None
+
+    def update(self, frame: np.ndarray, timestamp: float, color_order: str = "bgr",
+               landmarks: Optional[np.ndarray] = None) -> Optional[Tuple[float, float]]:
+        """
+        1フレーム分追跡し、検出できた場合はボール中心 (x, y) を返す
+
+        見失ったフレームでは予測位置を返さずNoneを返す。
+        landmarks は他の追跡器と呼び出し方を揃えるための引数で、使用しない。
+        """
+        if not self.active:
+            return self._detect_full(frame, timestamp, color_order)
+
+        dt = timestamp - self._last_time if self._last_time is not None else 0.0
+        predicted_x, predicted_y, search_radius = self._predict(max(dt, 1e-3))
+        self._last_time = timestamp
+
+        roi = self._search_window(frame, predicted_x, predicted_y, search_radius)
+        candidates = self.detector.detect(frame, color_order, roi=roi, max_candidates=3)
+
+        # 予測位置に最も近い候補を採用
+        best = None
+        best_distance = search_radius
+        for candidate in candidates:
+            distance = math.hypot(candidate.x - predicted_x, candidate.y - predicted_y)
+            if distance <= best_distance:
+                best, best_distance = candidate, distance
+
+        if best is not None:
+            self.kalman.correct(np.array([[best.x], [best.y]], dtype=np.float32))
+            self.misses = 0
+            self.radius = best.radius
+            return best.x, best.y
+
+        self.misses += 1
+        if self.misses >= self.lost_after:
+            self.reset()
+        elif self.misses >= self.redetect_after:
+            return self._detect_full(frame, timestamp, color_order)
+        return None
+
+    def _detect_full(self, frame: np.ndarray, timestamp: float,
+                     color_order: str) -> Optional[Tuple[float, float]]:
+        """フレーム全体で検出し、見つかれば追跡を（再）開始"""
+        candidates = self.detector.detect(frame, color_order, max_candidates=1)
+        if not candidates:
+            return None
+
+        best = candidates[0]
+        self.kalman.statePost = np.array([[best.x], [best.y], [0], [0], [0], [0]], dtype=np.float32)
+        # 初期速度・加速度は不明なため不確かさを大きく取る
+        self.kalman.errorCovPost = np.diag(
+            [best.radius ** 2] * 2 + [1000.0 ** 2] * 2 + [10000.0 ** 2] * 2
+        ).astype(np.float32)
+        self.active = True
+        self.misses = 0
+        self.radius = best.radius
+        self._last_time = timestamp
+        return best.x, best.y
+
+    def _predict(self, dt: float) -> Tuple[float, float, float]:
+        """経過時間 dt 秒後の位置を予測し、(x, y, 探索半径) を返す"""
+        half_dt2 = 0.5 * dt * dt
+        self.kalman.transitionMatrix = np.array([
+            [1, 0, dt, 0, half_dt2, 0],
+            [0, 1, 0, dt, 0, half_dt2],
+            [0, 0, 1, 0, dt, 0],
+            [0, 0, 0, 1, 0, dt],
+            [0, 0, 0, 0, 1, 0],
+            [0, 0, 0, 0, 0, 1]
+        ], dtype=np.float32)
+        state = self.kalman.predict()
+
+        # 位置の予測誤差の3σとボール半径を探索範囲とする
+        covariance = self.kalman.errorCovPre
+        sigma = math.sqrt(max(float(covariance[0, 0]), float(covariance[1, 1])))
+        search_radius = min(max(3 * sigma + self.radius, self.min_search_radius),
+                            self.max_search_radius)
+        return float(state[0, 0]), float(state[1, 0]), search_radius
+
+    def _search_window(self, frame: np.ndarray, x: float, y: float,
+                       radius: float) -> Tuple[int, int, int, int]:
+        """予測位置を中心とする探索窓 (x, y, w, h)（フレーム内に収める）"""
+        frame_h, frame_w = frame.shape[:2]
+        x0 = min(max(0, int(x - radius)), frame_w)
+        y0 = min(max(0, int(y - radius)), frame_h)
+        x1 = min(max(0, int(math.ceil(x + radius))), frame_w)
+        y1 = min(max(0, int(math.ceil(y + radius))), frame_h)
+        return (x0, y0, x1 - x0, y1 - y0)
@@ -0,0 +1,300 @@
+"""
+解析バックエンドのベンチマーク
+同じ動画に対して各バックエンドを実行し、処理時間と精度の目安を比較する
+
+使い方:
+    python -m backend.analysis.benchmark pose clip1.mp4 clip2.mp4 \
+        --backends mediapipe onnx --onnx-model movenet.onnx --int8
+    python -m backend.analysis.benchmark trackers clip1.mp4 clip2.mp4 \
+        --ball-trackers detector kalman lk --racket-trackers detector kcf
+"""
+
+import argparse
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .decoders import convert_color, open_decoder
+from .kinovea_engine import SoftTennisKinoveaEngine, get_quality_profile
+from .pose_backends import POSE_BACKENDS, create_pose_backend
+from .trackers import BALL_TRACKERS, RACKET_TRACKERS, create_ball_tracker, create_racket_tracker
+
+# バックエンド間の比較に使うランドマーク（COCO 17点に対応するBlazePoseの点）
+_COMPARED_LANDMARKS = [0, 2, 5, 7, 8, 11, 12, 13, 14, 15, 16, 23, 24, 25, 26, 27, 28]
+
+@dataclass
+class PoseBenchmarkResult:
+    """1つの姿勢推定バックエンドの計測結果"""
+    backend: str
+    frames: int
+    ms_per_frame: float
+    detection_rate: float
+    mean_deviation: Optional[float]  # 基準バックエンドとのランドマーク距離の平均（正規化座標）
+
+@dataclass
+class TrackerBenchmarkResult:
+    """1つの追跡方式の計測結果"""
+    target: str                      # "ball" または "racket"
+    tracker: str
+    frames: int
+    ms_per_frame: float
+    retention: float                 # 位置を出力できたフレームの割合
+    mean_deviation: Optional[float]  # 基準の追跡方式との位置の平均距離（ピクセル）
+
+def load_clip(path: str, max_resolution: Optional[int], max_frames: int,
+              decoder: str = "auto") -> List[np.ndarray]:
+    """動画を先頭から max_frames フレームまでRGBでデコード"""
+    return load_timed_clip(path, max_resolution, max_frames, decoder)[0]
+
+def load_timed_clip(path: str, max_resolution: Optional[int], max_frames: int,
+                    decoder: str = "auto") -> Tuple[List[np.ndarray], List[float]]:
+    """動画を先頭から max_frames フレームまでRGBでデコードし、フレーム時刻も返す"""
+    frames = []
+    timestamps = []
+    with open_decoder(path, decoder, max_resolution) as video:
+        while len(frames) < max_frames:
+            decoded = video.read()
+            if decoded is None:
+                break
+            frames.append(convert_color(decoded[0], video.color_order, "rgb"))
+            timestamps.append(decoded[1])
+    return frames, timestamps
+
+def benchmark_pose(clips: Sequence[List[np.ndarray]],
+                   backends: Sequence[Tuple[str, str, Dict]]) -> List[PoseBenchmarkResult]:
+    """
+    姿勢推定バックエンドを同じフレーム列で計測
+
+    Args:
+        clips: 動画ごとのRGBフレーム列
+        backends: (表示名, バックエンド名, コンストラクタ引数) のリスト
+            （先頭のバックエンドを精度比較の基準とする）
+    """
+    results = []
+    reference: Optional[List[List[Optional[np.ndarray]]]] = None
+
+    for label, name, options in backends:
+        backend = create_pose_backend(name, **options)
+        elapsed = 0.0
+        outputs = []
+        try:
+            for frames in clips:
+                backend.reset()
+                if frames:
+                    backend.estimate(frames[0])  # 初回呼び出しの初期化コストを除外
+                    backend.reset()
+
+                start = time.perf_counter()
+                clip_outputs = [backend.estimate(frame) for frame in frames]
+                elapsed += time.perf_counter() - start
+                outputs.append(clip_outputs)
+        finally:
+            backend.close()
+
+        total = sum(len(clip) for clip in outputs)
+        detected = sum(landmarks is not None for clip in outputs for landmarks in clip)
+        if reference is None:
+            reference = outputs
+            deviation = None
+        else:
+            deviation = _mean_deviation(reference, outputs)
+
+        results.append(PoseBenchmarkResult(
+            backend=label,
+            frames=total,
+            ms_per_frame=elapsed * 1000 / total if total else 0.0,
+            detection_rate=detected / total if total else 0.0,
+            mean_deviation=deviation
+        ))
+
+    return results
+
+def benchmark_trackers(clips: Sequence[Tuple[List[np.ndarray], List[float]]], target: str,
+                       trackers: Sequence[str], engine: SoftTennisKinoveaEngine,
+                       landmarks: Optional[Sequence[List[Optional[np.ndarray]]]] = None
+                       ) -> List[TrackerBenchmarkResult]:
+    """
+    追跡方式を同じフレーム列で計測
+
+    Args:
+        clips: 動画ごとの (RGBフレーム列, フレーム時刻)
+        target: "ball" または "racket"
+        trackers: 計測する追跡方式（先頭を位置比較の基準とする）
+        engine: 検出パラメータを取得するエンジン
+        landmarks: 動画ごと・フレームごとの姿勢ランドマーク（ラケットの初期化・再検出に使用）
+    """
+    results = []
+    reference: Optional[List[List[Optional[Tuple[float, float]]]]] = None
+
+    for name in trackers:
+        elapsed = 0.0
+        outputs = []
+        try:
+            for clip_index, (frames, timestamps) in enumerate(clips):
+                if target == "ball":
+                    tracker = create_ball_tracker(name, engine._create_ball_detector(),
+                                                  **engine.soft_tennis_params["ball_tracking"])
+                else:
+                    tracker = create_racket_tracker(name, engine.racket_detector)
+                clip_landmarks = landmarks[clip_index] if landmarks is not None else [None] * len(frames)
+
+                clip_outputs = []
+                start = time.perf_counter()
+                for frame, timestamp, frame_landmarks in zip(frames, timestamps, clip_landmarks):
+                    clip_outputs.append(tracker.update(frame, timestamp, "rgb", frame_landmarks))
+                elapsed += time.perf_counter() - start
+                outputs.append(clip_outputs)
+        except ValueError as e:
+            # このOpenCVで利用できない追跡器は飛ばす
+            print(f"{target}/{name}: {e}")
+            continue
+
+        total = sum(len(clip) for clip in outputs)
+        retained = sum(position is not None for clip in outputs for position in clip)
+        if reference is None:
+            reference = outputs
+            deviation = None
+        else:
+            deviation = _mean_position_deviation(reference, outputs)
+
+        results.append(TrackerBenchmarkResult(
+            target=target,
+            tracker=name,
+            frames=total,
+            ms_per_frame=elapsed * 1000 / total if total else 0.0,
+            retention=retained / total if total else 0.0,
+            mean_deviation=deviation
+        ))
+
+    return results
+
+def estimate_clip_landmarks(clips: Sequence[Tuple[List[np.ndarray], List[float]]],
+                            backend: str, model_complexity: int,
+                            options: Optional[Dict] = None) -> List[List[Optional[np.ndarray]]]:
+    """ラケット追跡の計測用に、各フレームの姿勢ランドマークを事前に推定"""
+    pose = create_pose_backend(backend, model_complexity, **(options or {}))
+    try:
+        landmarks = []
+        for frames, _ in clips:
+            pose.reset()
+            landmarks.append([pose.estimate(frame) for frame in frames])
+        return landmarks
+    finally:
+        pose.close()
+
+def _mean_position_deviation(reference: List[List[Optional[Tuple[float, float]]]],
+                             outputs: List[List[Optional[Tuple[float, float]]]]) -> Optional[float]:
+    """両方で位置が得られたフレームについて、位置の平均距離を求める"""
+    distances = []
+    for reference_clip, clip in zip(reference, outputs):
+        for expected, actual in zip(reference_clip, clip):
+            if expected is None or actual is None:
+                continue
+            distances.append(np.hypot(expected[0] - actual[0], expected[1] - actual[1]))
+    return float(np.mean(distances)) if distances else None
+
+def _mean_deviation(reference: List[List[Optional[np.ndarray]]],
+                    outputs: List[List[Optional[np.ndarray]]]) -> Optional[float]:
+    """両方で検出されたフレームについて、対応ランドマークの平均距離を求める"""
+    distances = []
+    for reference_clip, clip in zip(reference, outputs):
+        for expected, actual in zip(reference_clip, clip):
+            if expected is None or actual is None:
+                continue
+            diff = expected[_COMPARED_LANDMARKS, :2] - actual[_COMPARED_LANDMARKS, :2]
+            distances.append(np.linalg.norm(diff, axis=1).mean())
+    return float(np.mean(distances)) if distances else None
+
+def _print_pose_results(results: Sequence[PoseBenchmarkResult]):
+    """計測結果を表形式で出力"""
+    print(f"{'backend':<16}{'frames':>8}{'ms/frame':>10}{'detected':>10}{'deviation':>11}")
+    for result in results:
+        deviation = "-" if result.mean_deviation is None else f"{result.mean_deviation:.4f}"
+        print(f"{result.backend:<16}{result.frames:>8}{result.ms_per_frame:>10.2f}"
+              f"{result.detection_rate:>10.1%}{deviation:>11}")
+
+def _print_tracker_results(results: Sequence[TrackerBenchmarkResult]):
+    """計測結果を表形式で出力"""
+    print(f"{'target':<8}{'tracker':<10}{'frames':>8}{'ms/frame':>10}{'retained':>10}{'deviation':>11}")
+    for result in results:
+        deviation = "-" if result.mean_deviation is None else f"{result.mean_deviation:.1f}px"
+        print(f"{result.target:<8}{result.tracker:<10}{result.frames:>8}{result.ms_per_frame:>10.2f}"
+              f"{result.retention:>10.1%}{deviation:>11}")
+
+def _pose_backend_configs(args: argparse.Namespace) -> List[Tuple[str, str, Dict]]:
+    """コマンドライン引数から計測するバックエンドの設定を作成"""
+    profile = get_quality_profile(args.profile)
+    configs = []
+    for name in args.backends:
+        if name == "mediapipe":
+            configs.append((name, name, {"model_complexity": profile.model_complexity}))
+        elif name == "onnx":
+            if args.onnx_model is None:
+                raise SystemExit("--backends onnx には --onnx-model の指定が必要です")
+            options = {
+                "model_path": args.onnx_model,
+                "intra_op_threads": args.threads,
+                "inter_op_threads": 1
+            }
+            configs.append((name, name, options))
+            if args.int8:
+                configs.append(("onnx-int8", name, dict(options, int8=True)))
+    return configs
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="解析バックエンドのベンチマーク")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    pose_parser = subparsers.add_parser("pose", help="姿勢推定バックエンドの比較")
+    pose_parser.add_argument("clips", nargs="+", help="計測に使う動画ファイル")
+    pose_parser.add_argument("--backends", nargs="+", choices=POSE_BACKENDS,
+                             default=list(POSE_BACKENDS))
+    pose_parser.add_argument("--onnx-model", help="ONNXバックエンドのモデルパス")
+    pose_parser.add_argument("--int8", action="store_true", help="int8量子化モデルも計測する")
+    pose_parser.add_argument("--threads", type=int, default=1, help="ONNX Runtimeの演算内スレッド数")
+    pose_parser.add_argument("--profile", default="balanced", help="縮小解像度とモデル複雑度の品質プロファイル")
+    pose_parser.add_argument("--max-frames", type=int, default=300, help="動画ごとの最大フレーム数")
+
+    trackers_parser = subparsers.add_parser("trackers", help="ボール・ラケット追跡方式の比較")
+    trackers_parser.add_argument("clips", nargs="+", help="計測に使う動画ファイル")
+    trackers_parser.add_argument("--targets", nargs="+", choices=("ball", "racket"),
+                                 default=["ball", "racket"])
+    trackers_parser.add_argument("--ball-trackers", nargs="+", choices=BALL_TRACKERS,
+                                 default=["detector"] + [t for t in BALL_TRACKERS if t != "detector"],
+                                 help="計測するボール追跡方式（先頭が比較の基準）")
+    trackers_parser.add_argument("--racket-trackers", nargs="+", choices=RACKET_TRACKERS,
+                                 default=list(RACKET_TRACKERS),
+                                 help="計測するラケット追跡方式（先頭が比較の基準）")
+    trackers_parser.add_argument("--pose-backend", choices=POSE_BACKENDS, default="mediapipe",
+                                 help="ラケット追跡の初期化に使う姿勢推定バックエンド")
+    trackers_parser.add_argument("--onnx-model", help="ONNXバックエンドのモデルパス")
+    trackers_parser.add_argument("--profile", default="balanced", help="縮小解像度の品質プロファイル")
+    trackers_parser.add_argument("--max-frames", type=int, default=300, help="動画ごとの最大フレーム数")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "pose":
+        profile = get_quality_profile(args.profile)
+        clips = [load_clip(path, profile.max_resolution, args.max_frames) for path in args.clips]
+        results = benchmark_pose(clips, _pose_backend_configs(args))
+        _print_pose_results(results)
+
+    elif args.command == "trackers":
+        profile = get_quality_profile(args.profile)
+        clips = [load_timed_clip(path, profile.max_resolution, args.max_frames) for path in args.clips]
+        engine = SoftTennisKinoveaEngine(profile, preload_pose=False)
+
+        results = []
+        if "ball" in args.targets:
+            results.extend(benchmark_trackers(clips, "ball", args.ball_trackers, engine))
+        if "racket" in args.targets:
+            pose_options = {"model_path": args.onnx_model} if args.pose_backend == "onnx" else {}
+            landmarks = estimate_clip_landmarks(clips, args.pose_backend, profile.model_complexity,
+                                                pose_options)
+            results.extend(benchmark_trackers(clips, "racket", args.racket_trackers, engine, landmarks))
+        _print_tracker_results(results)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+フレーム内の段の並行実行
+姿勢推定・ボール追跡・ラケット検出を段ごとのスレッドで並行に実行し、結果をフレーム順に結合する
+"""
+
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Deque, List, Optional, Tuple, Union
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from .frame_normalizer import NormalizedFrame
+    from .kinovea_engine import AnalysisSession, FrameObservation
+
+class FrameDataflow:
+    """AnalysisSession の各段をスレッドで並行実行するデータフロー
+
+    姿勢・ボール・ラケットの段はそれぞれ専用の1スレッドで実行し、各段の中では
+    フレーム順に処理する（追跡器・人物領域の状態を持つため）。ボールの段は姿勢の
+    段と並行に、ラケットの段は同じフレームの姿勢の段の完了を待って実行する。
+    段ごとにスレッドが分かれているため、フレーム i のラケット検出とフレーム i+1 の
+    姿勢推定のように、フレームをまたいでも処理が重なる。推論・画像処理の多くは
+    ネイティブコード内でGILを解放するため、1フレームあたりの時間は各段の合計から
+    最も遅い段の時間に近づく。
+
+    結果の結合（補間・観測結果の作成）はフレーム順に呼び出し元のスレッドで行う。
+    max_in_flight は処理中に保持するフレーム数の上限で、0以下ならスレッドを使わず
+    session.process_frame() をそのまま呼ぶ。
+    """
+
+    def __init__(self, session: "AnalysisSession", max_in_flight: int = 4):
+        self.session = session
+        self.max_in_flight = max_in_flight
+        self._in_flight: Deque[Tuple] = deque()
+        self._lanes: Optional[List[ThreadPoolExecutor]] = None
+        if max_in_flight > 0:
+            self._lanes = [
+                ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"{name}-stage")
+                for name in ("pose", "ball", "racket")
+            ]
+
+    def __enter__(self) -> "FrameDataflow":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        """段のスレッドを停止（未実行の処理は破棄）"""
+        if self._lanes is not None:
+            for lane in self._lanes:
+                lane.shutdown(wait=True, cancel_futures=True)
+            self._lanes = None
+        self._in_flight.clear()
+
+    def process_frame(self, frame_index: int, frame: Union[np.ndarray, "NormalizedFrame"],
+                      timestamp: float, scale: float = 1.0) -> List["FrameObservation"]:
+        """
+        1フレームの各段を投入し、結合まで完了した観測結果をフレーム順に返す
+
+        引数は AnalysisSession.process_frame と同じ。
+        """
+        session = self.session
+        if self._lanes is None:
+            return session.process_frame(frame_index, frame, timestamp, scale)
+
+        pose_lane, ball_lane, racket_lane = self._lanes
+        frame, new_segment = session.start_frame(frame_index, frame, scale)
+        pose = pose_lane.submit(session.pose_stage, frame, new_segment)
+        ball = ball_lane.submit(session.ball_stage, frame, timestamp, new_segment)
+        racket = racket_lane.submit(self._racket_stage, frame, timestamp, new_segment, pose)
+        self._in_flight.append((frame_index, frame, timestamp, new_segment, pose, ball, racket))
+
+        ready = []
+        # 上限を超えた分は最も古いフレームの完了を待ち、完了済みのものはそのまま結合する
+        while self._in_flight and (len(self._in_flight) > self.max_in_flight or
+                                   all(future.done() for future in self._in_flight[0][4:])):
+            ready.extend(self._finish_oldest())
+        return ready
+
+    def flush(self) -> List["FrameObservation"]:
+        """処理中のフレームをすべて完了させ、保留中の観測結果も含めて返す"""
+        ready = []
+        while self._in_flight:
+            ready.extend(self._finish_oldest())
+        ready.extend(self.session.flush())
+        return ready
+
+    def _racket_stage(self, frame: "NormalizedFrame", timestamp: float, new_segment: bool,
+                      pose: Future):
+        """同じフレームの姿勢の段の完了を待ってラケットの段を実行"""
+        arm_landmarks = pose.result()[2]
+        return self.session.racket_stage(frame, timestamp, new_segment, arm_landmarks)
+
+    def _finish_oldest(self) -> List["FrameObservation"]:
+        """最も古いフレームの各段の完了を待って結果を結合"""
+        frame_index, frame, timestamp, new_segment, pose, ball, racket = self._in_flight.popleft()
+        landmarks, skip_pose, _ = pose.result()
+        return self.session.finish_frame(frame_index, frame, timestamp, new_segment,
+                                         landmarks, skip_pose, ball.result(), racket.result())
@@ -0,0 +1,307 @@
+"""
+動画デコーダー
+OpenCV（VideoCapture）とPyAV（FFmpeg）を同じインターフェースで扱う
+"""
+
+import io
+import os
+import tempfile
+from typing import BinaryIO, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+try:
+    import av
+except ImportError:  # PyAVは任意依存（未インストール時はOpenCVでデコード）
+    av = None
+
+# 動画の入力（ファイルパス、メモリ上のバイト列、またはファイルライクオブジェクト）
+VideoSource = Union[str, bytes, bytearray, BinaryIO]
+
+# 選択可能なデコーダー（"auto" はPyAVがあればPyAV、なければOpenCV）
+DECODER_BACKENDS = ("auto", "pyav", "opencv")
+
+# フレームの色順と変換先 → cv2.cvtColor の変換コード（Noneは変換不要）
+_COLOR_CONVERSIONS = {
+    "bgr": {
+        "bgr": None,
+        "rgb": cv2.COLOR_BGR2RGB,
+        "hsv": cv2.COLOR_BGR2HSV,
+        "gray": cv2.COLOR_BGR2GRAY
+    },
+    "rgb": {
+        "bgr": cv2.COLOR_RGB2BGR,
+        "rgb": None,
+        "hsv": cv2.COLOR_RGB2HSV,
+        "gray": cv2.COLOR_RGB2GRAY
+    }
+}
+
+def convert_color(image: np.ndarray, color_order: str, target: str) -> np.ndarray:
+    """色順 color_order の画像を target（"bgr", "rgb", "hsv", "gray"）に変換"""
+    code = _COLOR_CONVERSIONS[color_order][target]
+    if code is None:
+        # 切り出し領域などの非連続なビューはネイティブ処理用に連続化する
+        return np.ascontiguousarray(image)
+    return cv2.cvtColor(image, code)
+
+class VideoDecoder:
+    """動画デコーダーの基底クラス
+
+    read() はデコード済みフレームと表示時刻（秒）を返し、grab() は
+    画像への変換を省略してフレームを読み飛ばす。max_resolution を指定した
+    場合は長辺がその値以下になるよう縮小し、元フレームに対する縮小率を
+    scale に保持する。
+    """
+    # read() が返すフレームの色順
+    color_order = "bgr"
+
+    def __init__(self, max_resolution: Optional[int] = None):
+        self.max_resolution = max_resolution
+        self.scale = 1.0
+        self.fps = 30.0
+        self.frame_count = 0
+        # 元動画のフレームサイズ (幅, 高さ)
+        self.frame_size: Optional[Tuple[int, int]] = None
+
+    def __enter__(self) -> "VideoDecoder":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def seek(self, frame_index: int) -> int:
+        """指定フレームに移動し、実際に移動したフレーム番号を返す"""
+        raise NotImplementedError
+
+    def grab(self) -> bool:
+        """1フレーム読み飛ばす（終端ならFalse）"""
+        raise NotImplementedError
+
+    def read(self) -> Optional[Tuple[np.ndarray, float]]:
+        """(フレーム, 表示時刻) を返す（終端ならNone）"""
+        raise NotImplementedError
+
+    def close(self):
+        """デコーダーを解放"""
+        raise NotImplementedError
+
+    def _output_size(self, width: int, height: int) -> Tuple[int, int]:
+        """元フレームサイズから出力サイズを決定し、縮小率を更新"""
+        self.frame_size = (width, height)
+        long_side = max(width, height)
+        if self.max_resolution is None or long_side <= self.max_resolution:
+            self.scale = 1.0
+            return width, height
+
+        self.scale = self.max_resolution / long_side
+        return max(1, int(round(width * self.scale))), max(1, int(round(height * self.scale)))
+
+class OpenCVDecoder(VideoDecoder):
+    """cv2.VideoCaptureによるデコーダー（BGR出力）
+
+    表示時刻はコンテナの報告するFPSとフレーム番号から求める。
+    VideoCaptureはメモリ上の動画を読めないため、バイト列などが渡された
+    場合は一時ファイルに書き出し、close() で削除する。
+    """
+    color_order = "bgr"
+
+    def __init__(self, source: VideoSource, max_resolution: Optional[int] = None):
+        super().__init__(max_resolution)
+        self._temp_path = None
+        if not isinstance(source, str):
+            source = self._temp_path = _spill_to_temp_file(source)
+        self.cap = cv2.VideoCapture(source)
+
+        fps = self.cap.get(cv2.CAP_PROP_FPS)
+        self.fps = fps if fps > 0 else 30.0
+        self.frame_count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self._index = 0
+
+    def seek(self, frame_index: int) -> int:
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+        self._index = int(self.cap.get(cv2.CAP_PROP_POS_FRAMES))
+        return self._index
+
+    def grab(self) -> bool:
+        if not self.cap.grab():
+            return False
+        self._index += 1
+        return True
+
+    def read(self) -> Optional[Tuple[np.ndarray, float]]:
+        ret, frame = self.cap.read()
+        if not ret:
+            return None
+
+        timestamp = self._index / self.fps
+        self._index += 1
+
+        frame_h, frame_w = frame.shape[:2]
+        width, height = self._output_size(frame_w, frame_h)
+        if (width, height) != (frame_w, frame_h):
+            frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+        return frame, timestamp
+
+    def close(self):
+        self.cap.release()
+        if self._temp_path is not None:
+            _remove_file(self._temp_path)
+            self._temp_path = None
+
+class PyAVDecoder(VideoDecoder):
+    """PyAV（FFmpeg）によるデコーダー（RGB出力）
+
+    FFmpegのフレーム並列・スライス並列デコードを有効にし、縮小とRGB変換は
+    swscaleで1回にまとめて行う。表示時刻はフレームのPTSを使うため、
+    可変フレームレートの動画でも正しい時刻が得られる。
+    バイト列やシーク可能なファイルライクオブジェクトはメモリから直接
+    デコードする。シークできないストリームはMP4などのコンテナを読めない
+    ため、一時ファイルに書き出してから開く。
+    """
+    color_order = "rgb"
+
+    def __init__(self, source: VideoSource, max_resolution: Optional[int] = None,
+                 threads: int = 0):
+        """
+        Args:
+            source: 動画ファイルのパス、バイト列またはファイルライクオブジェクト
+            max_resolution: 出力フレームの長辺の上限
+            threads: デコードスレッド数（0はFFmpegの自動設定）
+        """
+        if av is None:
+            raise ImportError("PyAVがインストールされていません（pip install av）")
+
+        super().__init__(max_resolution)
+        self._temp_path = None
+        if isinstance(source, (bytes, bytearray)):
+            source = io.BytesIO(source)
+        elif not isinstance(source, str):
+            if source.seekable():
+                source.seek(0)
+            else:
+                source = self._temp_path = _spill_to_temp_file(source)
+        self.container = av.open(source)
+        self.stream = self.container.streams.video[0]
+        self.stream.thread_type = "AUTO"
+        self.stream.thread_count = threads
+
+        rate = self.stream.average_rate
+        self.fps = float(rate) if rate else 30.0
+        self.frame_count = self.stream.frames or self._estimate_frame_count()
+
+        start_time = self.stream.start_time
+        self._start_time = float(start_time * self.stream.time_base) if start_time is not None else 0.0
+        self._frames = self.container.decode(self.stream)
+        self._pending = None
+        self._index = 0
+
+    def seek(self, frame_index: int) -> int:
+        target = frame_index / self.fps
+
+        # 直前のキーフレームに移動し、目的の時刻まで読み進める
+        offset = int((target + self._start_time) / self.stream.time_base)
+        self.container.seek(offset, stream=self.stream, backward=True, any_frame=False)
+        self._frames = self.container.decode(self.stream)
+        self._pending = None
+
+        tolerance = 0.5 / self.fps
+        while True:
+            frame = self._next_frame()
+            if frame is None or self._frame_time(frame) >= target - tolerance:
+                self._pending = frame
+                break
+
+        self._index = frame_index
+        return frame_index
+
+    def grab(self) -> bool:
+        if self._next_frame() is None:
+            return False
+        self._index += 1
+        return True
+
+    def read(self) -> Optional[Tuple[np.ndarray, float]]:
+        frame = self._next_frame()
+        if frame is None:
+            return None
+
+        timestamp = self._frame_time(frame)
+        self._index += 1
+
+        width, height = self._output_size(frame.width, frame.height)
+        image = frame.to_ndarray(width=width, height=height, format="rgb24",
+                                 interpolation="AREA")
+        return image, timestamp
+
+    def close(self):
+        self.container.close()
+        if self._temp_path is not None:
+            _remove_file(self._temp_path)
+            self._temp_path = None
+
+    def _next_frame(self):
+        """次のデコード済みフレーム（シーク時に読み過ぎた分を優先）"""
+        if self._pending is not None:
+            frame, self._pending = self._pending, None
+            return frame
+        return next(self._frames, None)
+
+    def _frame_time(self, frame) -> float:
+        """フレームの表示時刻（動画先頭からの秒、PTSがない場合は番号から推定）"""
+        if frame.time is None:
+            return self._index / self.fps
+        return frame.time - self._start_time
+
+    def _estimate_frame_count(self) -> int:
+        """コンテナにフレーム数がない場合に長さから推定"""
+        if self.stream.duration is not None:
+            duration = float(self.stream.duration * self.stream.time_base)
+        elif self.container.duration is not None:
+            duration = self.container.duration / av.time_base
+        else:
+            return 0
+        return int(round(duration * self.fps))
+
+def open_decoder(source: VideoSource, backend: str = "auto", max_resolution: Optional[int] = None,
+                 threads: int = 0) -> VideoDecoder:
+    """
+    デコーダーを生成
+
+    Args:
+        source: 動画ファイルのパス、バイト列またはファイルライクオブジェクト
+        backend: "auto"、"pyav" または "opencv"
+        max_resolution: 出力フレームの長辺の上限
+        threads: デコードスレッド数（PyAVのみ、0は自動）
+    """
+    if backend == "auto":
+        backend = "pyav" if av is not None else "opencv"
+
+    if backend == "pyav":
+        return PyAVDecoder(source, max_resolution, threads)
+    if backend == "opencv":
+        return OpenCVDecoder(source, max_resolution)
+    raise ValueError(f"未知のデコーダーです: {backend}")
+
+def _spill_to_temp_file(source: VideoSource) -> str:
+    """メモリ上の動画を一時ファイルに書き出してパスを返す"""
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4") as temp_file:
+        if isinstance(source, (bytes, bytearray)):
+            temp_file.write(source)
+        else:
+            if source.seekable():
+                source.seek(0)
+            while True:
+                block = source.read(1024 * 1024)
+                if not block:
+                    break
+                temp_file.write(block)
+        return temp_file.name
+
+def _remove_file(path: str):
+    """一時ファイルを削除（既に削除されていれば何もしない）"""
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,278 @@
+"""
+デコード済みフレームのキャッシュ
+動画を一度だけ縮小デコードしてローカルディスク（またはtmpfs）上のnp.memmapに保存し、
+複数の解析パス・プロセスから任意のフレームを読めるようにする
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .decoders import VideoDecoder, VideoSource, _remove_file, open_decoder
+
+# キャッシュ形式のバージョン（形式を変えた場合は上げる）
+_CACHE_VERSION = 1
+
+_FRAMES_FILE = "frames.bin"
+_HEADER_FILE = "header.json"
+
+class CachedClip:
+    """キャッシュされた1本の動画
+
+    frames は (フレーム数, 高さ, 幅, チャンネル) のuint8の読み取り専用memmapで、
+    フレームの読み込みはページキャッシュからのコピーのみになる。
+    複数のプロセスが同じファイルを開いても物理メモリは共有される。
+    """
+
+    def __init__(self, path: str):
+        with open(os.path.join(path, _HEADER_FILE)) as f:
+            header = json.load(f)
+
+        self.path = path
+        self.color_order: str = header["color_order"]
+        self.fps: float = header["fps"]
+        self.scale: float = header["scale"]
+        self.max_resolution: Optional[int] = header["max_resolution"]
+        self.frame_size: Tuple[int, int] = tuple(header["frame_size"])
+        self.timestamps = np.asarray(header["timestamps"], dtype=np.float64)
+        self.frames = np.memmap(os.path.join(path, _FRAMES_FILE), dtype=np.uint8, mode="r",
+                                shape=tuple(header["shape"]))
+
+    def __len__(self) -> int:
+        return self.frames.shape[0]
+
+    def decoder(self) -> "CachedClipDecoder":
+        """キャッシュからフレームを読むデコーダーを生成"""
+        return CachedClipDecoder(self)
+
+class CachedClipDecoder(VideoDecoder):
+    """CachedClip を VideoDecoder として読むデコーダー
+
+    シークは任意のフレームに正確に移動でき、grab() は位置を進めるだけになる。
+    """
+
+    def __init__(self, clip: CachedClip):
+        super().__init__(clip.max_resolution)
+        self.clip = clip
+        self.color_order = clip.color_order
+        self.scale = clip.scale
+        self.fps = clip.fps
+        self.frame_count = len(clip)
+        self.frame_size = clip.frame_size
+        self._index = 0
+
+    def seek(self, frame_index: int) -> int:
+        self._index = min(max(0, frame_index), self.frame_count)
+        return self._index
+
+    def grab(self) -> bool:
+        if self._index >= self.frame_count:
+            return False
+        self._index += 1
+        return True
+
+    def read(self) -> Optional[Tuple[np.ndarray, float]]:
+        if self._index >= self.frame_count:
+            return None
+        frame = self.clip.frames[self._index]
+        timestamp = float(self.clip.timestamps[self._index])
+        self._index += 1
+        return frame, timestamp
+
+    def close(self):
+        # memmapはCachedClipが保持するため、ここでは何もしない
+        pass
+
+class FrameCache:
+    """デコード済みフレームのディスクキャッシュ
+
+    動画ごとに <root>/<key>/ に frames.bin（生のuint8フレーム列）と
+    header.json（形状・色順・縮小率・フレーム時刻）を置く。作成中のエントリは
+    一時ディレクトリに書き込み、完成後にリネームするため、他のプロセスが
+    書きかけのエントリを開くことはない。同じ動画の同時デコードはロック
+    ファイルで防ぐ。合計サイズが max_bytes を超えた場合は、最後に使われた
+    時刻（header.json の更新時刻）が古いエントリから削除する。
+    1本で max_bytes を超える動画（先頭フレームのサイズ×フレーム数で見積もる）は
+    キャッシュせず、open() はNoneを返す。
+    """
+
+    def __init__(self, root: str, max_bytes: int = 8 * 1024 ** 3):
+        """
+        Args:
+            root: キャッシュディレクトリ（ローカルディスクまたはtmpfs）
+            max_bytes: キャッシュ全体のディスク使用量の上限（バイト）
+        """
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+
+    def open(self, source: VideoSource, max_resolution: Optional[int] = None,
+             decoder: str = "auto", threads: int = 0) -> Optional[CachedClip]:
+        """
+        動画のキャッシュを開く（未作成ならデコードして作成）
+
+        動画が大きすぎてキャッシュできない場合はNoneを返す（呼び出し元で直接デコードする）。
+
+        Args:
+            source: 動画ファイルのパス、バイト列またはファイルライクオブジェクト
+            max_resolution: フレーム長辺の上限
+            decoder: 作成時に使う動画デコーダー
+            threads: 作成時のデコードスレッド数（PyAVのみ、0は自動）
+        """
+        # シークできないストリームはキーの計算で読み切るため、先にバイト列にする
+        if not isinstance(source, (str, bytes, bytearray)) and not source.seekable():
+            source = source.read()
+
+        key = self._cache_key(source, max_resolution, decoder)
+        path = os.path.join(self.root, key)
+
+        clip = self._open_entry(path)
+        if clip is not None:
+            return clip
+
+        lock_path = self._lock_path(key)
+        with open(lock_path, "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            # ロック待ちの間に他のプロセスが作成していればそれを使う
+            clip = self._open_entry(path)
+            if clip is None and self._build_entry(source, max_resolution, decoder, threads, path):
+                clip = self._open_entry(path)
+
+        if clip is None:
+            # キャッシュしない動画のロックファイルは残さない
+            _remove_file(lock_path)
+            return None
+
+        self._evict(keep=key)
+        return clip
+
+    def _open_entry(self, path: str) -> Optional[CachedClip]:
+        """作成済みのエントリを開き、使用時刻を更新する"""
+        try:
+            clip = CachedClip(path)
+        except (OSError, ValueError, KeyError):
+            return None
+        os.utime(os.path.join(path, _HEADER_FILE))
+        return clip
+
+    def _build_entry(self, source: VideoSource, max_resolution: Optional[int], decoder: str,
+                     threads: int, path: str) -> bool:
+        """
+        動画をデコードして一時ディレクトリに書き込み、完成後にリネーム
+
+        先頭フレームのサイズ×フレーム数の見積もり、または書き込んだサイズが
+        max_bytes を超えた場合は作成を中止してFalseを返す。
+        """
+        temp_path = tempfile.mkdtemp(prefix=".building-", dir=self.root)
+        try:
+            timestamps: List[float] = []
+            shape = None
+            written = 0
+            with open_decoder(source, decoder, max_resolution, threads) as video, \
+                    open(os.path.join(temp_path, _FRAMES_FILE), "wb") as frames_file:
+                while True:
+                    decoded = video.read()
+                    if decoded is None:
+                        break
+                    frame, timestamp = decoded
+                    if shape is None:
+                        shape = frame.shape
+                        if frame.nbytes * max(video.frame_count, 1) > self.max_bytes:
+                            shutil.rmtree(temp_path, ignore_errors=True)
+                            return False
+                    elif frame.shape != shape:
+                        raise ValueError("フレームサイズが途中で変化する動画はキャッシュできません")
+                    # フレーム数の見積もりが実際より少ない場合に備えて書き込み量も確認する
+                    written += frame.nbytes
+                    if written > self.max_bytes:
+                        shutil.rmtree(temp_path, ignore_errors=True)
+                        return False
+                    frames_file.write(np.ascontiguousarray(frame).data)
+                    timestamps.append(timestamp)
+
+                if shape is None:
+                    raise ValueError("動画からフレームを読み込めません")
+
+                header = {
+                    "version": _CACHE_VERSION,
+                    "shape": [len(timestamps), *shape],
+                    "color_order": video.color_order,
+                    "fps": video.fps,
+                    "scale": video.scale,
+                    "max_resolution": max_resolution,
+                    "frame_size": list(video.frame_size),
+                    "timestamps": timestamps
+                }
+
+            with open(os.path.join(temp_path, _HEADER_FILE), "w") as f:
+                json.dump(header, f)
+            try:
+                os.rename(temp_path, path)
+            except OSError:
+                # 削除されたロックファイルを介して別のプロセスが同時に作成した場合
+                if not os.path.isdir(path):
+                    raise
+                shutil.rmtree(temp_path, ignore_errors=True)
+            return True
+        except BaseException:
+            shutil.rmtree(temp_path, ignore_errors=True)
+            raise
+
+    def _evict(self, keep: Optional[str] = None):
+        """合計サイズが上限を超えていれば、使用時刻の古いエントリから削除"""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        for key, size, _ in sorted(entries, key=lambda entry: entry[2]):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            # 他のプロセスがmemmapで開いていても、削除後も既存の割り当ては有効
+            self._remove_entry(key)
+            total -= size
+
+    def _remove_entry(self, key: str):
+        """エントリとそのロックファイルを削除"""
+        shutil.rmtree(os.path.join(self.root, key), ignore_errors=True)
+        _remove_file(self._lock_path(key))
+
+    def _lock_path(self, key: str) -> str:
+        """エントリの作成を排他するロックファイルのパス"""
+        return os.path.join(self.root, f".{key}.lock")
+
+    def _entries(self) -> List[Tuple[str, int, float]]:
+        """作成済みのエントリの (キー, サイズ, 使用時刻) 一覧"""
+        entries = []
+        for key in os.listdir(self.root):
+            if key.startswith("."):
+                continue
+            try:
+                size = os.path.getsize(os.path.join(self.root, key, _FRAMES_FILE))
+                used = os.path.getmtime(os.path.join(self.root, key, _HEADER_FILE))
+            except OSError:
+                continue
+            entries.append((key, size, used))
+        return entries
+
+    def _cache_key(self, source: VideoSource, max_resolution: Optional[int], decoder: str) -> str:
+        """動画の内容と縮小設定からエントリのキーを求める"""
+        digest = hashlib.sha1(f"{_CACHE_VERSION}:{max_resolution}:{decoder}:".encode())
+        if isinstance(source, str):
+            # ファイルは内容を読まずにパス・サイズ・更新時刻で識別する
+            stat = os.stat(source)
+            digest.update(f"{os.path.abspath(source)}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+        elif isinstance(source, (bytes, bytearray)):
+            digest.update(source)
+        else:
+            position = source.tell()
+            source.seek(0)
+            for block in iter(lambda: source.read(1 << 20), b""):
+                digest.update(block)
+            source.seek(position)
+        return digest.hexdigest()
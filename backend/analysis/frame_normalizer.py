@@ -0,0 +1,123 @@
+"""
+フレーム正規化
+各フレームを解析前に一度だけ縮小し、各処理で必要な色空間への変換結果を共有する
+"""
+
+import math
+from typing import Dict, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+from .decoders import convert_color
+
+class NormalizedFrame:
+    """解析用に正規化したフレーム
+
+    image は縮小済みのフレーム（色順は color_order）、scale は元動画に対する縮小率。
+    view() で得た色空間の変換結果はフレームごとにキャッシュし、姿勢推定・
+    ボール検出・ラケット検出・動き判定の間で共有する。フレーム全体の変換が
+    キャッシュ済みならその一部を切り出し、未変換なら指定領域だけを変換する。
+    """
+
+    __slots__ = ("image", "color_order", "scale", "_cache")
+
+    def __init__(self, image: np.ndarray, color_order: str = "bgr", scale: float = 1.0):
+        self.image = image
+        self.color_order = color_order
+        self.scale = scale
+        self._cache: Dict[Tuple[str, Optional[Tuple[int, int, int, int]]], np.ndarray] = {}
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self.image.shape
+
+    @property
+    def source_size(self) -> Tuple[int, int]:
+        """元動画のフレームサイズ (幅, 高さ)"""
+        frame_h, frame_w = self.image.shape[:2]
+        return (int(round(frame_w / self.scale)), int(round(frame_h / self.scale)))
+
+    def view(self, target: str, roi: Optional[Tuple[int, int, int, int]] = None) -> np.ndarray:
+        """
+        色空間 target（"bgr", "rgb", "hsv", "gray"）の画像を返す
+
+        Args:
+            target: 変換先の色空間
+            roi: 切り出す領域 (x, y, w, h)（Noneならフレーム全体）
+        """
+        if target == self.color_order and roi is None:
+            return self.image
+
+        full = self._cache.get((target, None))
+        if full is None and roi is None:
+            full = convert_color(self.image, self.color_order, target)
+            self._cache[(target, None)] = full
+        if full is not None:
+            return full if roi is None else _crop(full, roi)
+
+        key = (target, tuple(roi))
+        region = self._cache.get(key)
+        if region is None:
+            region = convert_color(_crop(self.image, roi), self.color_order, target)
+            self._cache[key] = region
+        return region
+
+def frame_view(frame: Union[np.ndarray, NormalizedFrame], color_order: str, target: str,
+               roi: Optional[Tuple[int, int, int, int]] = None) -> np.ndarray:
+    """フレーム（ndarrayまたはNormalizedFrame）から指定色空間の画像・領域を得る"""
+    if isinstance(frame, NormalizedFrame):
+        return frame.view(target, roi)
+    region = frame if roi is None else _crop(frame, roi)
+    return convert_color(region, color_order, target)
+
+class FrameNormalizer:
+    """フレームを解析用の解像度・フレームレートに揃える
+
+    長辺が max_resolution を超えるフレームを縮小し、target_fps を指定した
+    場合は元動画のフレームレートからフレームの間引き間隔を求める。
+    デコーダー側で縮小済みのフレームはそのまま使う。
+    """
+
+    def __init__(self, max_resolution: Optional[int] = None, target_fps: Optional[float] = None):
+        """
+        Args:
+            max_resolution: フレーム長辺の上限（ピクセル、Noneなら縮小しない）
+            target_fps: 解析するフレームレートの上限（Noneなら間引かない）
+        """
+        self.max_resolution = max_resolution
+        self.target_fps = target_fps
+
+    def frame_step(self, source_fps: float) -> int:
+        """target_fps に近づけるためのフレーム間隔（1なら間引かない）"""
+        if not self.target_fps or source_fps <= self.target_fps:
+            return 1
+        return max(1, int(round(source_fps / self.target_fps)))
+
+    def normalize(self, frame: Union[np.ndarray, NormalizedFrame], color_order: str = "bgr",
+                  scale: float = 1.0) -> NormalizedFrame:
+        """
+        フレームを縮小して NormalizedFrame にする
+
+        Args:
+            frame: 入力フレーム（NormalizedFrameならそのまま返す）
+            color_order: フレームの色順
+            scale: 入力フレームの元動画に対する縮小率（デコーダーで縮小済みの場合）
+        """
+        if isinstance(frame, NormalizedFrame):
+            return frame
+
+        frame_h, frame_w = frame.shape[:2]
+        long_side = max(frame_w, frame_h)
+        if self.max_resolution is not None and long_side > self.max_resolution:
+            factor = self.max_resolution / long_side
+            size = (max(1, int(math.floor(frame_w * factor))), max(1, int(math.floor(frame_h * factor))))
+            frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+            scale *= factor
+
+        return NormalizedFrame(frame, color_order, scale)
+
+def _crop(image: np.ndarray, roi: Tuple[int, int, int, int]) -> np.ndarray:
+    """領域 (x, y, w, h) を切り出す（ビューを返す）"""
+    x, y, w, h = roi
+    return image[y:y + h, x:x + w]
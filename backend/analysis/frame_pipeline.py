@@ -0,0 +1,128 @@
+"""
+フレーム先読みパイプライン
+デコードを専用スレッドで行い、姿勢推定・追跡処理と並行して実行する
+"""
+
+import queue
+import threading
+from typing import Callable, Iterator, Optional, Tuple
+
+import numpy as np
+
+from .decoders import VideoDecoder
+
+# デコード終了を示す番兵
+_END_OF_STREAM = object()
+
+class FrameReader:
+    """デコードスレッドでフレームを先読みするリーダー
+
+    有界キューをリングバッファとして使い、解析側が追いつかない場合は
+    デコードスレッドがブロックする（バックプレッシャー）。
+    OpenCV・FFmpegのデコード中はGILが解放されるため、推論と並行して進む。
+    frame_selector で選ばれなかったフレームは grab() のみで読み飛ばし、
+    画像への変換を省略する。縮小はデコーダー側で行う。
+    start_index は decoder の現在位置のフレーム番号で、stop_index に達すると
+    デコードを終了する。
+    """
+
+    def __init__(self, decoder: VideoDecoder, buffer_size: int = 8,
+                 frame_selector: Optional[Callable[[int], bool]] = None,
+                 start_index: int = 0, stop_index: Optional[int] = None):
+        if buffer_size < 1:
+            raise ValueError("buffer_size は1以上を指定してください")
+
+        self.decoder = decoder
+        self.buffer_size = buffer_size
+        self.frame_selector = frame_selector
+        self.start_index = start_index
+        self.stop_index = stop_index
+        self._queue: queue.Queue = queue.Queue(maxsize=buffer_size)
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._error: Optional[BaseException] = None
+
+    def start(self) -> "FrameReader":
+        """デコードスレッドを開始"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._decode_loop, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """デコードスレッドを停止し、バッファを破棄"""
+        self._stop_event.set()
+        # ブロック中のデコードスレッドを解放するためにキューを空にする
+        self._drain()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._drain()
+
+    @property
+    def scale(self) -> float:
+        """元フレームに対する縮小率（最初のフレームをデコードした時点で確定）"""
+        return self.decoder.scale
+
+    def __enter__(self) -> "FrameReader":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def __iter__(self) -> Iterator[Tuple[int, np.ndarray, float]]:
+        """(フレーム番号, フレーム, 表示時刻) を順に返す"""
+        self.start()
+
+        while True:
+            item = self._queue.get()
+            if item is _END_OF_STREAM:
+                break
+            yield item
+
+        if self._error is not None:
+            raise self._error
+
+    def _decode_loop(self):
+        """デコードスレッド本体"""
+        frame_index = self.start_index
+        try:
+            while not self._stop_event.is_set():
+                if self.stop_index is not None and frame_index >= self.stop_index:
+                    break
+
+                if self.frame_selector is not None and not self.frame_selector(frame_index):
+                    if not self.decoder.grab():
+                        break
+                    frame_index += 1
+                    continue
+
+                decoded = self.decoder.read()
+                if decoded is None:
+                    break
+                frame, timestamp = decoded
+                if not self._put((frame_index, frame, timestamp)):
+                    return
+                frame_index += 1
+        except Exception as e:
+            self._error = e
+        finally:
+            self._put(_END_OF_STREAM)
+
+    def _put(self, item) -> bool:
+        """停止要求を確認しながらキューに追加（満杯なら待機）"""
+        while not self._stop_event.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _drain(self):
+        """キューに残ったフレームを破棄"""
+        try:
+            while True:
+                self._queue.get_nowait()
+        except queue.Empty:
+            pass
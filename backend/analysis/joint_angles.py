@@ -0,0 +1,149 @@
+"""
+関節角度の一括計算カーネル
+(T, 33, 4) のランドマーク配列から、定義済みの全角度を全フレーム分まとめて計算する
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from .pose_sequence import LANDMARK_VISIBILITY, LANDMARK_X, LANDMARK_Y, LANDMARK_Z, NUM_LANDMARKS
+
+# 仮想ランドマーク（左右ランドマークの中点、インデックスは33以降に追加）
+SHOULDER_MID = NUM_LANDMARKS
+HIP_MID = NUM_LANDMARKS + 1
+_VIRTUAL_LANDMARKS = (
+    (11, 12),  # 肩の中点
+    (23, 24),  # 腰の中点
+)
+
+@dataclass(frozen=True)
+class TripletAngle:
+    """3点（端点・頂点・端点）で定義される角度
+
+    triplets が複数ある場合（左右など）は有効な値の平均を取る。
+    flexion=True の場合は 180度 - 内角（屈曲角）を返す。
+    """
+    triplets: Tuple[Tuple[int, int, int], ...]
+    flexion: bool = False
+
+@dataclass(frozen=True)
+class SegmentTwistAngle:
+    """2本の線分の水平面（x-z平面）内での向きの差（体幹のひねり）
+
+    奥行き（z）を出力しない姿勢推定バックエンド（ONNXのCOCO 17点モデルなど）では
+    4点ともz=0になり向きの差が0度か±180度に潰れるため、そのフレームは無効とする。
+    """
+    segment_a: Tuple[int, int]
+    segment_b: Tuple[int, int]
+
+# エンジンが出力する角度の定義（右利きを想定）
+ANGLE_DEFINITIONS = {
+    "elbow_angle": TripletAngle(((12, 14, 16),)),                         # 肩-肘-手首
+    "shoulder_angle": TripletAngle(((14, 12, 24),)),                      # 肘-肩-腰
+    "hip_angle": TripletAngle(((12, 24, 26),)),                           # 肩-腰-膝
+    "knee_angle": TripletAngle(((23, 25, 27), (24, 26, 28)), flexion=True),  # 膝の曲がり（左右平均）
+    "stance_angle": TripletAngle(((27, HIP_MID, 28),)),                   # 両脚の開き
+    "body_rotation": SegmentTwistAngle((11, 12), (23, 24)),               # 肩ラインと腰ラインのひねり
+}
+
+def compute_joint_angles(landmarks: np.ndarray, valid: np.ndarray,
+                         names: Optional[Iterable[str]] = None,
+                         min_visibility: float = 0.0) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """
+    指定した角度を全フレームについて一括計算
+
+    Args:
+        landmarks: (T, 33, 4) ランドマーク配列
+        valid: (T,) 姿勢が検出されたフレーム
+        names: 計算する角度名（Noneなら全定義）
+        min_visibility: 角度計算に使うランドマークの最低visibility
+
+    Returns:
+        角度名 → (角度（度、無効フレームはNaN）(T,), 有効フレームのマスク (T,))
+    """
+    names = list(ANGLE_DEFINITIONS) if names is None else list(names)
+    points = _with_virtual_landmarks(landmarks)
+    usable = valid[:, None] & (points[:, :, LANDMARK_VISIBILITY] >= min_visibility)
+
+    results = {}
+
+    # 3点角度は全定義の全組をまとめて1回で計算する
+    triplet_names = [n for n in names if isinstance(ANGLE_DEFINITIONS[n], TripletAngle)]
+    if triplet_names:
+        triplets = np.array([t for n in triplet_names for t in ANGLE_DEFINITIONS[n].triplets])
+        angles, mask = _triplet_angles(points, usable, triplets)
+
+        column = 0
+        for name in triplet_names:
+            definition = ANGLE_DEFINITIONS[name]
+            count = len(definition.triplets)
+            values = angles[:, column:column + count]
+            value_mask = mask[:, column:column + count]
+            column += count
+
+            if definition.flexion:
+                values = 180.0 - values
+            results[name] = _mean_over_valid(values, value_mask)
+
+    for name in names:
+        definition = ANGLE_DEFINITIONS[name]
+        if isinstance(definition, SegmentTwistAngle):
+            results[name] = _segment_twist(points, usable, definition)
+
+    return results
+
+def _with_virtual_landmarks(landmarks: np.ndarray) -> np.ndarray:
+    """仮想ランドマークを末尾に追加した (T, 33 + V, 4) 配列を返す"""
+    virtual = []
+    for a, b in _VIRTUAL_LANDMARKS:
+        mid = (landmarks[:, a] + landmarks[:, b]) / 2
+        mid[:, LANDMARK_VISIBILITY] = np.minimum(landmarks[:, a, LANDMARK_VISIBILITY],
+                                                 landmarks[:, b, LANDMARK_VISIBILITY])
+        virtual.append(mid)
+    return np.concatenate([landmarks, np.stack(virtual, axis=1)], axis=1)
+
+def _triplet_angles(points: np.ndarray, usable: np.ndarray,
+                    triplets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(K, 3) の3点組について (T, K) の内角とマスクを計算"""
+    xy = slice(LANDMARK_X, LANDMARK_Y + 1)
+    a = points[:, triplets[:, 0], xy]
+    b = points[:, triplets[:, 1], xy]
+    c = points[:, triplets[:, 2], xy]
+
+    v1 = a - b
+    v2 = c - b
+    norms = np.linalg.norm(v1, axis=2) * np.linalg.norm(v2, axis=2)
+
+    mask = usable[:, triplets].all(axis=2) & (norms > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cos_angle = np.einsum('tkd,tkd->tk', v1, v2) / norms
+    angles = np.degrees(np.arccos(np.clip(cos_angle, -1.0, 1.0)))
+    angles[~mask] = np.nan
+    return angles, mask
+
+def _mean_over_valid(values: np.ndarray, mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(T, K) の値を有効な列のみで平均"""
+    counts = mask.sum(axis=1)
+    totals = np.where(mask, values, 0.0).sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = np.where(counts > 0, totals / counts, np.nan)
+    return mean, counts > 0
+
+def _segment_twist(points: np.ndarray, usable: np.ndarray,
+                   definition: SegmentTwistAngle) -> Tuple[np.ndarray, np.ndarray]:
+    """2本の線分の x-z 平面内での向きの差（度、-180〜180）"""
+    (a0, a1), (b0, b1) = definition.segment_a, definition.segment_b
+    seg_a = points[:, a1] - points[:, a0]
+    seg_b = points[:, b1] - points[:, b0]
+
+    angle_a = np.arctan2(seg_a[:, LANDMARK_Z], seg_a[:, LANDMARK_X])
+    angle_b = np.arctan2(seg_b[:, LANDMARK_Z], seg_b[:, LANDMARK_X])
+    twist = np.degrees(np.angle(np.exp(1j * (angle_a - angle_b))))
+
+    # 4点ともz=0のフレームは奥行きがないため計算できない
+    has_depth = (points[:, [a0, a1, b0, b1], LANDMARK_Z] != 0).any(axis=1)
+    mask = usable[:, [a0, a1, b0, b1]].all(axis=1) & has_depth
+    twist[~mask] = np.nan
+    return twist, mask
@@ -0,0 +1,229 @@
+"""
+運動学計算モジュール
+追跡点の座標列から速度・加速度・躍度を配列演算で一括計算する
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from scipy.signal import savgol_filter
+
+from .pose_sequence import PoseSequence
+
+# 滑らかさスコアの換算範囲（対数無次元躍度）
+# 最小躍度軌道でおよそ-5、ノイズの多い軌道で-10以下になる
+_LDLJ_SMOOTH = -5.0
+_LDLJ_JERKY = -12.0
+# 最小躍度軌道の動いている区間（最大速度の10%以上）でもおよそ-3.8のため、
+# これを上回る値は区間の取り方が破綻しているとみなす
+_LDLJ_LIMIT = -3.0
+
+@dataclass
+class Kinematics:
+    """追跡点の運動学量（単位は scale 適用後の長さ単位、通常はメートルと秒）"""
+    timestamps: np.ndarray    # (N,) 時刻
+    position: np.ndarray      # (N, 2) 平滑化後の位置
+    velocity: np.ndarray      # (N, 2) 速度
+    acceleration: np.ndarray  # (N, 2) 加速度
+    jerk: np.ndarray          # (N, 2) 躍度
+    edge: int = 0             # 平滑化・微分の端の影響を受ける両端のサンプル数
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @property
+    def speed(self) -> np.ndarray:
+        """速さ (N,)"""
+        return np.linalg.norm(self.velocity, axis=1)
+
+    def peak(self) -> Dict[str, float]:
+        """最大速度とその時刻"""
+        if len(self) == 0:
+            return {"peak_speed": 0.0, "peak_time": 0.0}
+
+        speed = self.speed
+        i = self._peak_index(speed)
+        return {"peak_speed": float(speed[i]), "peak_time": float(self.timestamps[i])}
+
+    def impact_window(self, half_width: float = 0.05) -> Dict[str, float]:
+        """最大速度時刻の前後 half_width 秒の統計（インパクト付近とみなす）"""
+        if len(self) == 0:
+            return {}
+
+        speed = self.speed
+        peak_time = self.timestamps[self._peak_index(speed)]
+        window = np.abs(self.timestamps - peak_time) <= half_width
+        acceleration = np.linalg.norm(self.acceleration[window], axis=1)
+        return {
+            "start_time": float(self.timestamps[window][0]),
+            "end_time": float(self.timestamps[window][-1]),
+            "mean_speed": float(speed[window].mean()),
+            "max_acceleration": float(acceleration.max())
+        }
+
+    def active_segment(self, threshold: float = 0.1) -> slice:
+        """最大速度を含み、速さが最大値の threshold 倍以上の連続区間"""
+        if len(self) == 0:
+            return slice(0, 0)
+
+        speed = self.speed
+        i = self._peak_index(speed)
+        below = speed < threshold * speed[i]
+
+        start = i
+        while start > 0 and not below[start - 1]:
+            start -= 1
+        end = i + 1
+        while end < len(speed) and not below[end]:
+            end += 1
+        return slice(start, end)
+
+    def smoothness(self) -> Optional[float]:
+        """動作の滑らかさ（0-1、対数無次元躍度を換算）
+
+        無次元量のため長さ・時間の単位には依存しない。動いている区間が短すぎる、
+        躍度が0、または最小躍度軌道より滑らかな値になるなど、区間から滑らかさを
+        判断できない場合はNone。
+        """
+        segment = self.active_segment()
+        t = self.timestamps[segment]
+        if len(t) < max(4, 2 * self.edge + 1):
+            return None
+
+        duration = t[-1] - t[0]
+        peak_speed = self.speed[segment].max()
+        if duration <= 0 or peak_speed <= 0:
+            return None
+
+        jerk_sq = np.sum(self.jerk[segment] ** 2, axis=1)
+        integral = np.sum((jerk_sq[1:] + jerk_sq[:-1]) / 2 * np.diff(t))
+        if integral <= 0:
+            return None
+
+        ldlj = -np.log(duration ** 3 / peak_speed ** 2 * integral)
+        if ldlj > _LDLJ_LIMIT:
+            return None
+        return float(np.clip((ldlj - _LDLJ_JERKY) / (_LDLJ_SMOOTH - _LDLJ_JERKY), 0.0, 1.0))
+
+    def _peak_index(self, speed: np.ndarray) -> int:
+        """最大速度のサンプル（両端の edge サンプルは平滑化の端の影響を受けるため除く）"""
+        if len(speed) > 2 * self.edge:
+            return self.edge + int(np.argmax(speed[self.edge:len(speed) - self.edge]))
+        return int(np.argmax(speed))
+
+def compute_kinematics(xy: np.ndarray, timestamps: np.ndarray, scale: float = 1.0,
+                       smoothing: Optional[str] = "savgol", window: int = 7,
+                       polyorder: int = 3, min_cutoff: float = 1.0,
+                       beta: float = 0.007) -> Kinematics:
+    """
+    座標列から速度・加速度・躍度を計算
+
+    Args:
+        xy: (N, 2) 座標（ピクセルなど）
+        timestamps: (N,) 時刻（秒）
+        scale: 座標1単位あたりの長さ（例: メートル/ピクセル）
+        smoothing: "savgol"（Savitzky-Golay）、"one_euro"、またはNone
+        window: Savitzky-Golayの窓長（フレーム数）
+        polyorder: Savitzky-Golayの多項式次数
+        min_cutoff: One Euroフィルタの最小カットオフ周波数（Hz）
+        beta: One Euroフィルタの速度係数
+
+    Returns:
+        Kinematics: 運動学量
+    """
+    position = np.asarray(xy, dtype=np.float64).reshape(-1, 2) * scale
+    t = np.asarray(timestamps, dtype=np.float64)
+
+    # 時刻が重複するサンプルは微分できないため除外
+    if len(t) > 1:
+        keep = np.concatenate([[True], np.diff(t) > 0])
+        position, t = position[keep], t[keep]
+
+    # 微分の両端は片側差分になるため、平滑化しない場合も1サンプルは除く
+    edge = 1
+    if smoothing == "savgol":
+        position = smooth_savgol(position, window, polyorder)
+        edge = max(edge, min(window, len(position)) // 2)
+    elif smoothing == "one_euro":
+        position = smooth_one_euro(position, t, min_cutoff, beta)
+    elif smoothing is not None:
+        raise ValueError(f"未知の平滑化方法です: {smoothing}")
+
+    velocity = _derivative(position, t)
+    acceleration = _derivative(velocity, t)
+    jerk = _derivative(acceleration, t)
+
+    return Kinematics(
+        timestamps=t,
+        position=position,
+        velocity=velocity,
+        acceleration=acceleration,
+        jerk=jerk,
+        edge=edge
+    )
+
+def smooth_savgol(xy: np.ndarray, window: int = 7, polyorder: int = 3) -> np.ndarray:
+    """Savitzky-Golayフィルタで座標列を平滑化（サンプル数に応じて窓長を縮める）"""
+    n = len(xy)
+    window = min(window, n if n % 2 == 1 else n - 1)
+    if window <= polyorder:
+        return xy
+    return savgol_filter(xy, window, polyorder, axis=0, mode="interp")
+
+def smooth_one_euro(xy: np.ndarray, timestamps: np.ndarray, min_cutoff: float = 1.0,
+                    beta: float = 0.007, d_cutoff: float = 1.0) -> np.ndarray:
+    """One Euroフィルタで座標列を平滑化（速い動きほど遅延を小さくする）"""
+    if len(xy) < 2:
+        return xy
+
+    smoothed = np.empty_like(xy)
+    smoothed[0] = xy[0]
+    derivative = np.zeros(xy.shape[1])
+
+    for i in range(1, len(xy)):
+        dt = timestamps[i] - timestamps[i - 1]
+        raw_derivative = (xy[i] - smoothed[i - 1]) / dt
+        derivative = _low_pass(raw_derivative, derivative, _alpha(d_cutoff, dt))
+        cutoff = min_cutoff + beta * np.abs(derivative)
+        smoothed[i] = _low_pass(xy[i], smoothed[i - 1], _alpha(cutoff, dt))
+
+    return smoothed
+
+def estimate_scale(pose: PoseSequence, frame_size: Tuple[int, int],
+                   reference_length: float) -> Optional[float]:
+    """
+    体格から1ピクセルあたりの長さ（メートル）を推定
+
+    肩の中点〜足首の中点の画面上の長さ（中央値）を reference_length とみなす。
+    姿勢が検出されていない場合はNone。
+    """
+    detected = pose.detected()
+    if len(detected) == 0:
+        return None
+
+    width, height = frame_size
+    landmarks = detected.landmarks
+    shoulder_mid = (landmarks[:, 11, :2] + landmarks[:, 12, :2]) / 2
+    ankle_mid = (landmarks[:, 27, :2] + landmarks[:, 28, :2]) / 2
+    offset = (shoulder_mid - ankle_mid) * np.array([width, height])
+
+    body_pixels = float(np.median(np.linalg.norm(offset, axis=1)))
+    if body_pixels <= 0:
+        return None
+    return reference_length / body_pixels
+
+def _derivative(values: np.ndarray, t: np.ndarray) -> np.ndarray:
+    """時刻 t に対する数値微分（サンプル数が足りなければ0）"""
+    if len(t) < 2:
+        return np.zeros_like(values)
+    return np.gradient(values, t, axis=0)
+
+def _alpha(cutoff, dt: float):
+    """1次ローパスフィルタの係数"""
+    tau = 1.0 / (2 * np.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+def _low_pass(value, previous, alpha):
+    """1次ローパスフィルタ"""
+    return alpha * value + (1 - alpha) * previous
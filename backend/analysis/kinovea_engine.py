@@ -5,19 +5,39 @@ Kinoveaの追跡・解析技術をPythonに移植し、軟式テニス用に最
 
 import cv2
 import numpy as np
-import mediapipe as mp
-from typing import Dict, List, Tuple, Optional, Union
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple, Optional, Union
+from collections.abc import Sequence
+from concurrent.futures import Executor
 from dataclasses import dataclass
 from enum import Enum
+import bisect
 import math
 import json
+import queue
+
+from .ball_detection import BallDetector
+from .dataflow import FrameDataflow
+from .decoders import VideoDecoder, VideoSource, open_decoder
+from .frame_cache import FrameCache
+from .frame_normalizer import FrameNormalizer, NormalizedFrame, frame_view
+from .frame_pipeline import FrameReader
+from .joint_angles import compute_joint_angles
+from .kinematics import Kinematics, compute_kinematics, estimate_scale
+from .pose_backends import PoseBackend, create_pose_backend
+from .racket_detection import RacketDetector
+from .pose_sequence import (
+    LANDMARK_VISIBILITY, PoseSequence, PoseSequenceBuilder
+)
+from .trackers import (
+    BALL_TRACKERS, RACKET_TRACKERS, ObjectTracker, create_ball_tracker, create_racket_tracker
+)
 
 class AnalysisAngle(Enum):
     """分析角度の種類"""
     FRONT = "front"  # 正面
     SIDE = "side"    # 側面
 
-@dataclass
+@dataclass(slots=True)
 class Point2D:
     """2D座標点"""
     x: float
@@ -31,13 +51,38 @@ class Point2D:
         """他の点への角度を計算（ラジアン）"""
         return math.atan2(other.y - self.y, other.x - self.x)
 
+class PointSequence(Sequence):
+    """(N, 2) 座標配列をPoint2Dの列として参照するビュー（要素は参照時に生成）"""
+    
+    __slots__ = ('_xy',)
+    
+    def __init__(self, xy: np.ndarray):
+        self._xy = xy
+    
+    def __len__(self) -> int:
+        return len(self._xy)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return PointSequence(self._xy[index])
+        x, y = self._xy[index]
+        return Point2D(float(x), float(y))
+
 @dataclass
 class TrackingPoint:
-    """追跡ポイント"""
+    """追跡ポイント（座標・信頼度・フレーム番号を連続したNumPy配列で保持）"""
     name: str
-    points: List[Point2D]
-    confidence: List[float]
-    frame_numbers: List[int]
+    xy: np.ndarray             # (N, 2) 座標
+    confidence: np.ndarray     # (N,) 信頼度
+    frame_numbers: np.ndarray  # (N,) フレーム番号
+    
+    def __len__(self) -> int:
+        return len(self.frame_numbers)
+    
+    @property
+    def points(self) -> PointSequence:
+        """Point2Dの列としての座標（互換用ビュー）"""
+        return PointSequence(self.xy)
 
 @dataclass
 class AngleData:
@@ -46,6 +91,17 @@ class AngleData:
     values: List[float]  # 角度の時系列データ（度）
     frame_numbers: List[int]
 
+@dataclass
+class FrameObservation:
+    """1フレーム分の観測結果"""
+    frame: int
+    timestamp: float
+    landmarks: Optional[np.ndarray]  # 姿勢ランドマーク (33, 4)（未検出時はNone）
+    ball_position: Optional[Point2D]
+    racket_position: Optional[Point2D]
+    frame_size: Optional[Tuple[int, int]] = None  # 元動画のフレームサイズ (幅, 高さ)
+    pose_interpolated: bool = False  # 姿勢推定を省略し、前後の推論結果から補間したか
+
 @dataclass
 class AnalysisResult:
     """解析結果"""
@@ -55,29 +111,179 @@ class AnalysisResult:
     racket_trajectory: Optional[TrackingPoint]
     swing_analysis: Dict[str, any]
     recommendations: List[str]
+    frame_sampling: Optional[Dict[str, any]] = None  # 解析したフレームの内訳
+
+@dataclass(frozen=True)
+class QualityProfile:
+    """解析品質プロファイル"""
+    name: str
+    model_complexity: int            # MediaPipe Poseのモデル複雑度（0-2）
+    max_resolution: Optional[int]    # 入力フレーム長辺の上限（ピクセル、Noneなら元解像度）
+    frame_stride: int                # 解析するフレーム間隔
+    ball_tracker: str                # ボール追跡方式（trackers.BALL_TRACKERS）
+    racket_tracker: str              # ラケット追跡方式（trackers.RACKET_TRACKERS）
+    target_fps: Optional[float] = None  # 解析フレームレートの上限（Noneなら元動画のまま）
+
+# 品質プロファイル定義（無料枠・プレビューはfast、明示指定時のみaccurate）
+# 追跡方式: fastはラケットを検出の間オプティカルフローで追跡して検出回数を減らし、
+# accurateはボールを毎フレームフレーム全体で検出し、ラケットをCSRTで追跡する
+QUALITY_PROFILES: Dict[str, QualityProfile] = {
+    "fast": QualityProfile(
+        name="fast",
+        model_complexity=0,
+        max_resolution=640,
+        frame_stride=2,
+        ball_tracker="kalman",
+        racket_tracker="lk"
+    ),
+    "balanced": QualityProfile(
+        name="balanced",
+        model_complexity=1,
+        max_resolution=960,
+        frame_stride=1,
+        ball_tracker="kalman",
+        racket_tracker="detector"
+    ),
+    "accurate": QualityProfile(
+        name="accurate",
+        model_complexity=2,
+        max_resolution=None,
+        frame_stride=1,
+        ball_tracker="detector",
+        racket_tracker="csrt"
+    )
+}
+
+def get_quality_profile(profile: Union[str, QualityProfile]) -> QualityProfile:
+    """名前またはインスタンスから品質プロファイルを取得"""
+    if isinstance(profile, QualityProfile):
+        return profile
+    if profile not in QUALITY_PROFILES:
+        raise ValueError(f"未知の品質プロファイルです: {profile}")
+    return QUALITY_PROFILES[profile]
 
 class SoftTennisKinoveaEngine:
     """軟式テニス専用Kinovea解析エンジン"""
     
-    def __init__(self):
-        # MediaPipe初期化
-        self.mp_pose = mp.solutions.pose
-        self.mp_hands = mp.solutions.hands
-        self.pose = self.mp_pose.Pose(
-            static_image_mode=False,
-            model_complexity=2,
-            enable_segmentation=False,
-            min_detection_confidence=0.7,
-            min_tracking_confidence=0.5
-        )
+    def __init__(self, profile: Union[str, QualityProfile] = "accurate", buffer_size: int = 8,
+                 coarse_stride: int = 4,
+                 chunk_overlap: int = 15, preload_pose: bool = True,
+                 decoder: str = "auto", decoder_threads: int = 0,
+                 max_pose_skip: int = 3, pose_backend: str = "mediapipe",
+                 pose_options: Optional[Dict] = None, ball_tracker: Optional[str] = None,
+                 racket_tracker: Optional[str] = None, target_fps: Optional[float] = None,
+                 frame_cache: Optional[FrameCache] = None, pipeline_depth: int = 0):
+        """
+        Args:
+            profile: 品質プロファイル（名前またはQualityProfile）
+            buffer_size: デコード先読みバッファのフレーム数
+            coarse_stride: 適応サンプリング時の粗解析フレーム間隔
+            chunk_overlap: 分割解析時に各チャンクの前に解析する助走フレーム数
+            preload_pose: Falseの場合はPoseグラフを最初のセッションまで生成しない
+                （分割解析の取りまとめのみを行うプロセス向け）
+            decoder: 動画デコーダー（"auto"、"pyav"、"opencv"）
+            decoder_threads: デコードスレッド数（PyAVのみ、0は自動）
+            max_pose_skip: 人物領域に動きがない場合に姿勢推定を連続して省略する
+                最大フレーム数（0で省略しない）
+            pose_backend: 姿勢推定バックエンド（"mediapipe" または "onnx"）
+            pose_options: バックエンドのコンストラクタ引数（ONNXのモデルパスなど）
+            ball_tracker: ボール追跡方式（Noneならプロファイルの設定）
+            racket_tracker: ラケット追跡方式（Noneならプロファイルの設定）
+            target_fps: 解析フレームレートの上限（Noneならプロファイルの設定）
+            frame_cache: デコード済みフレームのキャッシュ（指定した場合は動画を一度だけ
+                デコードし、以降の解析パスはキャッシュから読む）
+            pipeline_depth: 姿勢・ボール・ラケットの段を並行実行する際に処理中に保持する
+                フレーム数（0なら各段を順に実行する）
+        """
+        self.profile = get_quality_profile(profile)
         
-        # OpenCV初期化
-        self.ball_tracker = cv2.TrackerCSRT_create()
-        self.racket_tracker = cv2.TrackerCSRT_create()
+        # 姿勢推定バックエンド初期化
+        # MediaPipeのグラフは動画間で追跡状態を持ち越すため、解析セッションごとに貸し出す
+        self.pose_backend = pose_backend
+        self.pose_options = dict(pose_options or {})
+        self._idle_poses: queue.Queue = queue.Queue()
+        if preload_pose:
+            self._idle_poses.put(self._create_pose())
         
         # 軟式テニス専用パラメータ
         self.soft_tennis_params = self._load_soft_tennis_parameters()
+        self.racket_detector = RacketDetector(**self.soft_tennis_params["racket_detection"])
+        
+        # 追跡方式（ボール・ラケットで個別に選択）
+        self.ball_tracker_type = ball_tracker or self.profile.ball_tracker
+        self.racket_tracker_type = racket_tracker or self.profile.racket_tracker
+        if self.ball_tracker_type not in BALL_TRACKERS:
+            raise ValueError(f"未知のボール追跡方式です: {self.ball_tracker_type}")
+        if self.racket_tracker_type not in RACKET_TRACKERS:
+            raise ValueError(f"未知のラケット追跡方式です: {self.racket_tracker_type}")
+        
+        # フレーム正規化（縮小・間引きと色空間変換の共有）
+        self.frame_normalizer = FrameNormalizer(self.profile.max_resolution,
+                                                target_fps or self.profile.target_fps)
+        
+        # デコード設定
+        self.buffer_size = buffer_size
+        self.decoder = decoder
+        self.decoder_threads = decoder_threads
+        self.frame_cache = frame_cache
+        
+        # 適応サンプリング設定
+        self.coarse_stride = coarse_stride
+        
+        # 分割解析設定
+        self.chunk_overlap = chunk_overlap
+        
+        # 静止フレームでの姿勢推定の省略設定
+        self.max_pose_skip = max_pose_skip
+        
+        # 段の並行実行設定
+        self.pipeline_depth = pipeline_depth
         
+    def create_session(self, track_objects: bool = True, color_order: str = "bgr",
+                       frame_stride: Optional[int] = None) -> "AnalysisSession":
+        """1本の動画を解析するためのセッションを生成
+        
+        モデルやパラメータはエンジンで共有し、追跡器や人物領域など
+        動画ごとに変化する状態はセッションが保持する。
+        color_order は入力フレームの色順（"bgr" または "rgb"）、
+        frame_stride は連続して解析するフレームの間隔（Noneならプロファイルの設定）。
+        """
+        return AnalysisSession(self, track_objects, color_order, frame_stride)
+    
+    def open_decoder(self, source: VideoSource, max_resolution: Optional[int] = None,
+                     use_cache: bool = True) -> VideoDecoder:
+        """設定されたバックエンドで動画デコーダーを開く
+        
+        キャッシュが設定されていて use_cache がTrueならキャッシュから読む
+        （未作成なら動画全体をデコードしてキャッシュを作成する）。
+        キャッシュの上限を超える動画は直接デコードする。
+        """
+        if self.frame_cache is not None and use_cache:
+            # キャッシュしなかった場合に読み直せるよう、シークできないストリームはバイト列にする
+            if not isinstance(source, (str, bytes, bytearray)) and not source.seekable():
+                source = source.read()
+            clip = self.frame_cache.open(source, max_resolution, self.decoder, self.decoder_threads)
+            if clip is not None:
+                return clip.decoder()
+        return open_decoder(source, self.decoder, max_resolution, self.decoder_threads)
+    
+    def _create_pose(self) -> PoseBackend:
+        """設定された姿勢推定バックエンドを生成"""
+        return create_pose_backend(self.pose_backend, self.profile.model_complexity,
+                                   **self.pose_options)
+    
+    def _acquire_pose(self) -> PoseBackend:
+        """待機中のバックエンドを借りる（なければ新規生成）"""
+        try:
+            return self._idle_poses.get_nowait()
+        except queue.Empty:
+            return self._create_pose()
+    
+    def _release_pose(self, pose: PoseBackend):
+        """追跡状態を初期化してバックエンドを返却"""
+        pose.reset()
+        self._idle_poses.put(pose)
+    
     def _load_soft_tennis_parameters(self) -> Dict:
         """軟式テニス専用パラメータを読み込み"""
         return {
@@ -85,180 +291,410 @@ class SoftTennisKinoveaEngine:
                 "lower": np.array([0, 100, 100]),  # HSV下限（赤色系）
                 "upper": np.array([10, 255, 255])  # HSV上限
             },
+            "ball_detection": {
+                "min_radius": 3,              # ボール半径の範囲（解析解像度のピクセル）
+                "max_radius": 50,
+                "min_circularity": 0.6,       # 外接円に対する塗りつぶし率の下限
+                "background_subtraction": False
+            },
+            "ball_tracking": {
+                "min_search_radius": 40,    # 予測位置周辺の探索窓の半径（ピクセル）
+                "max_search_radius": 200,
+                "redetect_after": 3,        # 連続で見失った場合にフレーム全体で再検出するまでのフレーム数
+                "lost_after": 15            # 追跡を打ち切るまでのフレーム数
+            },
             "racket_color_range": {
                 "lower": np.array([0, 0, 0]),      # 黒色系
                 "upper": np.array([180, 255, 50])
             },
+            "racket_detection": {
+                "head_offset": 1.8,       # 手首からラケット面中心までの距離（前腕長比）
+                "search_scale": 1.5,      # 探索領域の半径（前腕長比）
+                "min_search_size": 48,    # 探索領域の一辺の下限（ピクセル）
+                "min_visibility": 0.5,    # 肘・手首のvisibility下限
+                "pose_fallback": True     # 輪郭がなければ前腕の延長点をラケット位置とする
+            },
             "court_dimensions": {
                 "length": 23.77,  # メートル
                 "width": 10.97,
                 "net_height": 1.07
+            },
+            "motion_window": {
+                "velocity_threshold": 0.8,  # 手首・肩の速度閾値（画面幅/秒）
+                "padding": 0.3              # 区間前後の余白（秒）
+            },
+            "motion_gate": {
+                "pixel_threshold": 15,  # 輝度差（0-255）がこれ以上の画素を変化とみなす
+                "tile_size": 8,         # 変化率を求めるタイルの一辺（縮小後のピクセル）
+                "max_changed": 0.05,    # 全タイルの変化画素率がこれ未満なら静止とみなす
+                "thumbnail_size": 64,   # 比較用に縮小する人物領域の一辺（ピクセル）
+                "wrist_speed": 0.01     # 手首の移動量（人物領域の高さ比／フレーム）がこれ以上なら省略しない
+            },
+            "scale_reference": {
+                "shoulder_to_ankle": 1.35   # 肩の中点〜足首の中点の長さ（メートル、成人の目安）
+            },
+            "person_roi": {
+                "padding": 0.25,        # 人物領域の余白（領域サイズ比）
+                "min_size": 192,        # 切り出し領域の最小辺（ピクセル）
+                "max_area_ratio": 0.8,  # これ以上はフレーム全体で推論
+                "edge_margin": 0.1      # 人物が領域の縁からこの比率以内に近づくまで領域を固定する
             }
         }
     
-    def analyze_video(self, video_path: str, angle: AnalysisAngle) -> AnalysisResult:
+    def analyze_video(self, source: VideoSource, angle: AnalysisAngle,
+                      adaptive_sampling: bool = False, chunks: int = 1,
+                      executor: Optional[Executor] = None) -> AnalysisResult:
         """
         動画を解析してフォーム分析結果を返す
         
         Args:
-            video_path: 動画ファイルのパス
+            source: 動画ファイルのパス、バイト列またはファイルライクオブジェクト
             angle: 分析角度（正面または側面）
+            adaptive_sampling: Trueの場合、粗解析で動きの大きい区間を特定し
+                その区間のみ全フレームを解析する
+            chunks: 動画を分割して並列解析するチャンク数
+            executor: チャンクを実行するExecutor（ワーカープロセスのプールを想定、
+                Noneの場合はこのプロセスで順に実行）
             
         Returns:
             AnalysisResult: 解析結果
         """
-        cap = cv2.VideoCapture(video_path)
+        if adaptive_sampling:
+            return self._analyze_video_adaptive(source, angle)
+        
+        if chunks > 1:
+            observations = self._analyze_video_chunked(source, chunks, executor)
+        else:
+            observations = self.analyze_video_stream(source)
+        pose, ball_data, racket_data = self._collect_observations(observations)
+        
+        # データ解析
+        result = self._analyze_motion_data(pose, ball_data, racket_data, angle)
+        interpolated = int(np.count_nonzero(pose.interpolated))
+        result.frame_sampling = {
+            "mode": "full",
+            "pose_inferences": len(pose) - interpolated,
+            "pose_interpolated": interpolated,
+            "dense_windows": [(0, int(pose.frames[-1]))] if len(pose) else []
+        }
+        return result
+    
+    def _analyze_video_adaptive(self, source: VideoSource, angle: AnalysisAngle) -> AnalysisResult:
+        """粗解析→詳細解析の2パスで動画を解析"""
+        stride = max(1, self.coarse_stride)
+        
+        # 1パス目：間引いたフレームで姿勢のみ推定
+        coarse = list(self.analyze_video_stream(
+            source,
+            frame_selector=lambda i: i % stride == 0,
+            track_objects=False
+        ))
+        windows = self._find_motion_windows(coarse)
+        
+        # 2パス目：動きの大きい区間のみ全フレームで姿勢推定・追跡
+        dense = []
+        if windows:
+            window_starts = [start for start, _ in windows]
+            
+            def in_window(frame_index: int) -> bool:
+                pos = bisect.bisect_right(window_starts, frame_index) - 1
+                return pos >= 0 and frame_index <= windows[pos][1]
+            
+            dense = list(self.analyze_video_stream(source, frame_selector=in_window))
+        
+        # 区間外は粗解析の結果を使う
+        dense_frames = {observation.frame for observation in dense}
+        observations = [o for o in coarse if o.frame not in dense_frames] + dense
+        observations.sort(key=lambda o: o.frame)
+        
+        pose, ball_data, racket_data = self._collect_observations(observations)
+        result = self._analyze_motion_data(pose, ball_data, racket_data, angle)
+        result.frame_sampling = {
+            "mode": "adaptive",
+            "coarse_stride": stride,
+            "pose_inferences": sum(not o.pose_interpolated for o in coarse + dense),
+            "pose_interpolated": int(np.count_nonzero(pose.interpolated)),
+            "dense_windows": windows
+        }
+        return result
+    
+    def _analyze_video_chunked(self, source: VideoSource, chunks: int,
+                               executor: Optional[Executor]) -> List[FrameObservation]:
+        """動画をフレーム区間に分割して解析し、フレーム順に結合
+        
+        各チャンクは担当区間だけを1回デコードすれば済むため、フレームキャッシュは
+        使わない（キャッシュを作ると動画全体のデコードが解析開始前に直列で入る）。
+        """
+        with self.open_decoder(source, self.profile.max_resolution, use_cache=False) as decoder:
+            fps = decoder.fps
+            total_frames = decoder.frame_count
+        
+        plan = self._plan_chunks(total_frames, fps, chunks)
+        
+        if executor is None:
+            results = [self.analyze_frame_range(source, *chunk) for chunk in plan]
+        else:
+            # ワーカープロセス側の初期化済みエンジンで実行する
+            from .worker_pool import _run_chunk
+            futures = [
+                executor.submit(_run_chunk, source, self.profile, *chunk)
+                for chunk in plan
+            ]
+            results = [future.result() for future in futures]
+        
+        return self._merge_chunk_observations(results)
+    
+    def _plan_chunks(self, total_frames: int, fps: float,
+                     chunks: int) -> List[Tuple[int, int, Optional[int]]]:
+        """
+        チャンク分割計画を作成
+        
+        キーフレーム位置は取得せず、スマートフォン動画で
+        一般的な1秒GOPを仮定し、境界と助走開始位置をGOP単位に揃える。
+        
+        Returns:
+            (助走開始フレーム, 担当開始フレーム, 担当終了フレーム) のリスト
+            （最後のチャンクの終了はNone＝動画末尾まで）
+        """
+        gop = max(1, int(round(fps))) if fps > 0 else 30
         
-        # フレーム情報取得
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        # 短すぎるチャンクは助走のコストが割に合わないため分割数を抑える
+        min_chunk = max(4 * gop, 2 * self.chunk_overlap)
+        chunks = max(1, min(chunks, total_frames // min_chunk))
+        if chunks == 1:
+            return [(0, 0, None)]
+        
+        chunk_size = int(math.ceil(total_frames / chunks / gop)) * gop
+        plan = []
+        for k in range(chunks):
+            start = k * chunk_size
+            if start >= total_frames:
+                break
+            stop = start + chunk_size if k < chunks - 1 else None
+            warmup_start = max(0, (start - self.chunk_overlap) // gop * gop)
+            plan.append((warmup_start, start, stop))
+        
+        if plan[-1][2] is not None:
+            plan[-1] = (plan[-1][0], plan[-1][1], None)
+        return plan
+    
+    def analyze_frame_range(self, source: VideoSource, warmup_start: int, start: int,
+                            stop: Optional[int]) -> List[FrameObservation]:
+        """
+        動画の一部フレーム区間を解析
+        
+        warmup_start から解析を始めて姿勢推定と追跡器を安定させ、
+        start 以降 stop 未満のフレームの結果のみを返す。
+        """
+        observations = self.analyze_video_stream(source, start_frame=warmup_start,
+                                                 stop_frame=stop, use_cache=False)
+        return [observation for observation in observations if observation.frame >= start]
+    
+    def _merge_chunk_observations(self, results: List[List[FrameObservation]]) -> List[FrameObservation]:
+        """チャンクごとの結果をフレーム順に結合し、重複フレームを除去"""
+        merged = {}
+        for observations in results:
+            for observation in observations:
+                # シーク誤差で重複した場合は先のチャンクの結果を採用
+                merged.setdefault(observation.frame, observation)
+        return [merged[frame] for frame in sorted(merged)]
+    
+    def _find_motion_windows(self, observations: List[FrameObservation]) -> List[Tuple[int, int]]:
+        """手首・肩の速度から動きの大きいフレーム区間を抽出（両端を含む）"""
+        params = self.soft_tennis_params["motion_window"]
+        motion_landmarks = [11, 12, 15, 16]  # 左右の肩・手首
+        
+        pose = self._collect_observations(observations)[0].detected()
+        if len(pose) < 2:
+            return []
+        
+        # 連続するサンプル間の最大速度（正規化座標/秒）
+        xy = pose.landmarks[:, motion_landmarks, :2]
+        dt = np.diff(pose.timestamps)
+        displacement = np.linalg.norm(np.diff(xy, axis=0), axis=2).max(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            velocity = np.where(dt > 0, displacement / dt, 0.0)
+        
+        windows = []
+        for i in np.flatnonzero(velocity >= params["velocity_threshold"]):
+            prev_frame = int(pose.frames[i])
+            curr_frame = int(pose.frames[i + 1])
+            fps = (curr_frame - prev_frame) / dt[i]
+            padding = int(math.ceil(params["padding"] * fps))
+            start = max(0, prev_frame - padding)
+            end = curr_frame + padding
+            
+            # 重なる区間は結合
+            if windows and start <= windows[-1][1] + 1:
+                windows[-1] = (windows[-1][0], max(windows[-1][1], end))
+            else:
+                windows.append((start, end))
         
-        # データ格納用
-        pose_data = []
+        return windows
+    
+    def _collect_observations(self, observations: Iterable[FrameObservation]) -> Tuple[PoseSequence, List[Dict], List[Dict]]:
+        """観測結果を姿勢の時系列とボール・ラケットのデータ列に変換"""
+        pose_builder = PoseSequenceBuilder()
         ball_data = []
         racket_data = []
-        frame_count = 0
         
-        # 初期フレームでボール・ラケット検出
-        ret, first_frame = cap.read()
-        if ret:
-            ball_bbox = self._detect_ball(first_frame)
-            racket_bbox = self._detect_racket(first_frame)
+        for observation in observations:
+            if pose_builder.frame_size is None:
+                pose_builder.frame_size = observation.frame_size
+            pose_builder.append(observation.frame, observation.timestamp, observation.landmarks,
+                                observation.pose_interpolated)
+            
+            if observation.ball_position:
+                ball_data.append({
+                    'frame': observation.frame,
+                    'position': observation.ball_position,
+                    'timestamp': observation.timestamp
+                })
             
-            if ball_bbox:
-                self.ball_tracker.init(first_frame, ball_bbox)
-            if racket_bbox:
-                self.racket_tracker.init(first_frame, racket_bbox)
+            if observation.racket_position:
+                racket_data.append({
+                    'frame': observation.frame,
+                    'position': observation.racket_position,
+                    'timestamp': observation.timestamp
+                })
         
-        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        return pose_builder.build(), ball_data, racket_data
+    
+    def analyze_video_stream(self, source: VideoSource,
+                             frame_selector: Optional[Callable[[int], bool]] = None,
+                             track_objects: bool = True, start_frame: int = 0,
+                             stop_frame: Optional[int] = None,
+                             use_cache: bool = True) -> Iterator[FrameObservation]:
+        """
+        動画をデコードしながらフレームごとの観測結果を順に返す
         
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-                
-            # 姿勢検出
-            pose_result = self._detect_pose(frame)
-            pose_data.append({
-                'frame': frame_count,
-                'landmarks': pose_result,
-                'timestamp': frame_count / fps
-            })
+        途中でイテレーションを止めた場合もデコードスレッドと
+        デコーダーは解放される。
+        
+        Args:
+            source: 動画ファイルのパス、バイト列またはファイルライクオブジェクト
+            frame_selector: 解析するフレーム番号を選ぶ関数（Noneなら全フレーム）
+            track_objects: Falseの場合は姿勢推定のみ行う
+            start_frame: 解析を開始するフレーム（0以外ではシークする）
+            stop_frame: 解析を終了するフレーム（このフレームは含まない）
+            use_cache: Falseの場合はフレームキャッシュを使わずにデコードする
             
-            # ボール追跡
-            if ball_bbox:
-                ball_pos = self._track_ball(frame)
-                if ball_pos:
-                    ball_data.append({
-                        'frame': frame_count,
-                        'position': ball_pos,
-                        'timestamp': frame_count / fps
-                    })
+        Yields:
+            FrameObservation: 姿勢・ボール・ラケットの観測結果（フレーム順、
+                姿勢推定を省略したフレームは補間後に返される）
+        """
+        # 縮小はデコーダー側で行う（PyAVではswscaleでRGB変換と同時に行われる）
+        decoder = self.open_decoder(source, self.profile.max_resolution, use_cache)
+        
+        try:
+            # プロファイルのフレーム間隔と目標フレームレートへの間引きを適用
+            stride = self.profile.frame_stride * self.frame_normalizer.frame_step(decoder.fps)
+            if stride > 1:
+                base_selector = frame_selector
+                frame_selector = lambda i: i % stride == 0 and (base_selector is None or base_selector(i))
             
-            # ラケット追跡
-            if racket_bbox:
-                racket_pos = self._track_racket(frame)
-                if racket_pos:
-                    racket_data.append({
-                        'frame': frame_count,
-                        'position': racket_pos,
-                        'timestamp': frame_count / fps
-                    })
+            # 途中から解析する場合のみシークし、実際に移動した位置から番号を振る
+            if start_frame > 0:
+                start_frame = decoder.seek(start_frame)
             
-            frame_count += 1
+            # デコードは別スレッドで先読みし、推論と並行させる
+            # 各フレームは一度だけデコードし、姿勢・ボール・ラケットの段は
+            # pipeline_depth > 0 なら段ごとのスレッドで並行に実行する
+            with self.create_session(track_objects, decoder.color_order, stride) as session, \
+                    FrameDataflow(session, self.pipeline_depth) as dataflow, \
+                    FrameReader(decoder, self.buffer_size, frame_selector,
+                                start_frame, stop_frame) as reader:
+                for frame_count, frame, timestamp in reader:
+                    yield from dataflow.process_frame(frame_count, frame, timestamp, reader.scale)
+                yield from dataflow.flush()
+        finally:
+            decoder.close()
+    
+    def _to_source_scale(self, point: Optional[Point2D], scale: float) -> Optional[Point2D]:
+        """縮小フレーム上の座標を元動画の座標に戻す"""
+        if point is None or scale == 1.0:
+            return point
+        return Point2D(point.x / scale, point.y / scale)
+    
+    def _run_pose(self, pose: PoseBackend, frame: Union[np.ndarray, NormalizedFrame],
+                  color_order: str = "bgr",
+                  roi: Optional[Tuple[int, int, int, int]] = None) -> Optional[np.ndarray]:
+        """フレーム（またはその領域）に対して姿勢推定を実行（座標は領域内で正規化、(33, 4)配列）"""
+        rgb_image = np.ascontiguousarray(frame_view(frame, color_order, "rgb", roi))
+        return pose.estimate(rgb_image)
+    
+    def _map_landmarks_to_frame(self, landmarks: np.ndarray, roi: Tuple[int, int, int, int],
+                                frame_w: int, frame_h: int) -> np.ndarray:
+        """切り出し領域内の正規化座標をフレーム全体の正規化座標に変換"""
+        x, y, w, h = roi
+        mapped = landmarks.copy()
+        mapped[:, 0] = (landmarks[:, 0] * w + x) / frame_w
+        mapped[:, 1] = (landmarks[:, 1] * h + y) / frame_h
+        mapped[:, 2] = landmarks[:, 2] * w / frame_w  # zはx方向と同じスケール
+        return mapped
+    
+    def _person_roi_from_landmarks(self, landmarks: np.ndarray, frame_w: int,
+                                   frame_h: int) -> Optional[Tuple[int, int, int, int]]:
+        """ランドマークから次フレームの人物領域（余白付き）を算出"""
+        params = self.soft_tennis_params["person_roi"]
         
-        cap.release()
+        xs = landmarks[:, 0] * frame_w
+        ys = landmarks[:, 1] * frame_h
+        left, right = float(xs.min()), float(xs.max())
+        top, bottom = float(ys.min()), float(ys.max())
         
-        # データ解析
-        return self._analyze_motion_data(pose_data, ball_data, racket_data, angle)
-    
-    def _detect_pose(self, frame: np.ndarray) -> Optional[Dict]:
-        """MediaPipeで姿勢検出"""
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.pose.process(rgb_frame)
-        
-        if results.pose_landmarks:
-            landmarks = {}
-            for i, landmark in enumerate(results.pose_landmarks.landmark):
-                landmarks[i] = {
-                    'x': landmark.x,
-                    'y': landmark.y,
-                    'z': landmark.z,
-                    'visibility': landmark.visibility
-                }
-            return landmarks
-        return None
-    
-    def _detect_ball(self, frame: np.ndarray) -> Optional[Tuple[int, int, int, int]]:
-        """ボール検出（色ベース + 円検出）"""
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-        
-        # 色フィルタリング
-        mask = cv2.inRange(hsv, 
-                          self.soft_tennis_params["ball_color_range"]["lower"],
-                          self.soft_tennis_params["ball_color_range"]["upper"])
-        
-        # 円検出
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        circles = cv2.HoughCircles(gray, cv2.HOUGH_GRADIENT, 1, 20,
-                                  param1=50, param2=30, minRadius=5, maxRadius=50)
-        
-        if circles is not None:
-            circles = np.round(circles[0, :]).astype("int")
-            if len(circles) > 0:
-                # 最も可能性の高い円を選択
-                x, y, r = circles[0]
-                return (x-r, y-r, 2*r, 2*r)
-        
-        return None
-    
-    def _detect_racket(self, frame: np.ndarray) -> Optional[Tuple[int, int, int, int]]:
-        """ラケット検出（エッジ検出ベース）"""
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        edges = cv2.Canny(gray, 50, 150)
-        
-        # 輪郭検出
-        contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        
-        for contour in contours:
-            area = cv2.contourArea(contour)
-            if 500 < area < 5000:  # ラケットサイズの範囲
-                x, y, w, h = cv2.boundingRect(contour)
-                aspect_ratio = float(w) / h
-                if 0.3 < aspect_ratio < 3.0:  # ラケットの縦横比
-                    return (x, y, w, h)
-        
-        return None
-    
-    def _track_ball(self, frame: np.ndarray) -> Optional[Point2D]:
-        """ボール追跡"""
-        success, bbox = self.ball_tracker.update(frame)
-        if success:
-            x, y, w, h = [int(v) for v in bbox]
-            center_x = x + w // 2
-            center_y = y + h // 2
-            return Point2D(center_x, center_y)
-        return None
-    
-    def _track_racket(self, frame: np.ndarray) -> Optional[Point2D]:
-        """ラケット追跡"""
-        success, bbox = self.racket_tracker.update(frame)
-        if success:
-            x, y, w, h = [int(v) for v in bbox]
-            center_x = x + w // 2
-            center_y = y + h // 2
-            return Point2D(center_x, center_y)
-        return None
-    
-    def _analyze_motion_data(self, pose_data: List[Dict], ball_data: List[Dict], 
+        # 動きに備えて余白を追加
+        margin = params["padding"] * max(right - left, bottom - top)
+        half_w = max((right - left) / 2 + margin, params["min_size"] / 2)
+        half_h = max((bottom - top) / 2 + margin, params["min_size"] / 2)
+        center_x = (left + right) / 2
+        center_y = (top + bottom) / 2
+        
+        x0 = max(0, int(center_x - half_w))
+        y0 = max(0, int(center_y - half_h))
+        x1 = min(frame_w, int(math.ceil(center_x + half_w)))
+        y1 = min(frame_h, int(math.ceil(center_y + half_h)))
+        
+        if x1 - x0 < 2 or y1 - y0 < 2:
+            return None
+        
+        # フレームの大部分を覆う場合は切り出さない
+        if (x1 - x0) * (y1 - y0) >= params["max_area_ratio"] * frame_w * frame_h:
+            return None
+        
+        return (x0, y0, x1 - x0, y1 - y0)
+    
+    def _create_ball_tracker(self) -> ObjectTracker:
+        """ボール追跡器を生成（追跡状態を持つためセッションごとに生成する）"""
+        return create_ball_tracker(self.ball_tracker_type, self._create_ball_detector(),
+                                   **self.soft_tennis_params["ball_tracking"])
+    
+    def _create_racket_tracker(self) -> ObjectTracker:
+        """ラケット追跡器を生成（追跡状態を持つためセッションごとに生成する）"""
+        return create_racket_tracker(self.racket_tracker_type, self.racket_detector)
+    
+    def _create_ball_detector(self) -> BallDetector:
+        """ボール検出器を生成（背景モデルを持つためセッションごとに生成する）"""
+        color_range = self.soft_tennis_params["ball_color_range"]
+        params = self.soft_tennis_params["ball_detection"]
+        return BallDetector(
+            color_range["lower"],
+            color_range["upper"],
+            min_radius=params["min_radius"],
+            max_radius=params["max_radius"],
+            min_circularity=params["min_circularity"],
+            background_subtraction=params["background_subtraction"]
+        )
+    
+    def _analyze_motion_data(self, pose: PoseSequence, ball_data: List[Dict], 
                            racket_data: List[Dict], angle: AnalysisAngle) -> AnalysisResult:
         """動作データを解析"""
         
         # 追跡ポイント生成
-        tracking_points = self._generate_tracking_points(pose_data)
+        tracking_points = self._generate_tracking_points(pose)
         
         # 角度データ計算
-        angles = self._calculate_angles(pose_data, angle)
+        angles = self._calculate_angles(pose, angle)
         
         # ボール軌道
         ball_trajectory = self._generate_ball_trajectory(ball_data)
@@ -267,7 +703,7 @@ class SoftTennisKinoveaEngine:
         racket_trajectory = self._generate_racket_trajectory(racket_data)
         
         # スイング解析
-        swing_analysis = self._analyze_swing(pose_data, racket_data, angle)
+        swing_analysis = self._analyze_swing(pose, ball_data, racket_data, angle)
         
         # 改善提案生成
         recommendations = self._generate_recommendations(swing_analysis, angle)
@@ -281,7 +717,7 @@ class SoftTennisKinoveaEngine:
             recommendations=recommendations
         )
     
-    def _generate_tracking_points(self, pose_data: List[Dict]) -> Dict[str, TrackingPoint]:
+    def _generate_tracking_points(self, pose: PoseSequence) -> Dict[str, TrackingPoint]:
         """主要な身体ポイントの追跡データを生成"""
         key_points = {
             'left_shoulder': 11,
@@ -298,94 +734,92 @@ class SoftTennisKinoveaEngine:
             'right_ankle': 28
         }
         
-        tracking_points = {}
+        detected = pose.detected()
+        if len(detected) == 0:
+            return {}
         
-        for name, landmark_id in key_points.items():
-            points = []
-            confidence = []
-            frame_numbers = []
-            
-            for frame_data in pose_data:
-                if frame_data['landmarks'] and landmark_id in frame_data['landmarks']:
-                    landmark = frame_data['landmarks'][landmark_id]
-                    points.append(Point2D(landmark['x'], landmark['y']))
-                    confidence.append(landmark['visibility'])
-                    frame_numbers.append(frame_data['frame'])
-            
-            if points:
-                tracking_points[name] = TrackingPoint(
-                    name=name,
-                    points=points,
-                    confidence=confidence,
-                    frame_numbers=frame_numbers
-                )
+        # 全関節を1回のスライスで取り出し、関節ごとに連続した (12, T, 4) 配列にする
+        joints = np.ascontiguousarray(
+            detected.landmarks[:, list(key_points.values()), :].transpose(1, 0, 2)
+        )
         
-        return tracking_points
+        return {
+            name: TrackingPoint(
+                name=name,
+                xy=joints[i, :, :2],
+                confidence=joints[i, :, LANDMARK_VISIBILITY],
+                frame_numbers=detected.frames
+            )
+            for i, name in enumerate(key_points)
+        }
     
-    def _calculate_angles(self, pose_data: List[Dict], angle: AnalysisAngle) -> Dict[str, AngleData]:
-        """関節角度を計算"""
-        angles = {}
+    def _generate_ball_trajectory(self, ball_data: List[Dict]) -> Optional[TrackingPoint]:
+        """ボール軌道を生成"""
+        return self._trajectory_from_positions("ball", ball_data)
+    
+    def _generate_racket_trajectory(self, racket_data: List[Dict]) -> Optional[TrackingPoint]:
+        """ラケット軌道を生成"""
+        return self._trajectory_from_positions("racket", racket_data)
+    
+    def _trajectory_from_positions(self, name: str, data: List[Dict]) -> Optional[TrackingPoint]:
+        """位置データ列から追跡ポイントを生成（データがなければNone）"""
+        if not data:
+            return None
         
+        return TrackingPoint(
+            name=name,
+            xy=np.array([(d['position'].x, d['position'].y) for d in data], dtype=np.float32),
+            confidence=np.ones(len(data), dtype=np.float32),
+            frame_numbers=np.array([d['frame'] for d in data], dtype=np.int32)
+        )
+    
+    def _calculate_angles(self, pose: PoseSequence, angle: AnalysisAngle) -> Dict[str, AngleData]:
+        """関節角度を計算（全フレーム・全角度を一括計算）"""
         if angle == AnalysisAngle.SIDE:
             # 側面：スイング関連角度
-            angles['elbow_angle'] = self._calculate_elbow_angle(pose_data)
-            angles['shoulder_angle'] = self._calculate_shoulder_angle(pose_data)
-            angles['hip_angle'] = self._calculate_hip_angle(pose_data)
-        
+            names = ['elbow_angle', 'shoulder_angle', 'hip_angle', 'knee_angle']
         elif angle == AnalysisAngle.FRONT:
             # 正面：スタンス関連角度
-            angles['stance_angle'] = self._calculate_stance_angle(pose_data)
-            angles['body_rotation'] = self._calculate_body_rotation(pose_data)
+            names = ['stance_angle', 'body_rotation', 'knee_angle']
+        else:
+            return {}
         
-        return angles
-    
-    def _calculate_elbow_angle(self, pose_data: List[Dict]) -> AngleData:
-        """肘角度を計算"""
-        angles = []
-        frame_numbers = []
+        series = compute_joint_angles(pose.landmarks, pose.valid, names)
         
-        for frame_data in pose_data:
-            if frame_data['landmarks']:
-                landmarks = frame_data['landmarks']
-                
-                # 右腕の肘角度計算（例）
-                if all(id in landmarks for id in [12, 14, 16]):  # 肩、肘、手首
-                    shoulder = landmarks[12]
-                    elbow = landmarks[14]
-                    wrist = landmarks[16]
-                    
-                    # ベクトル計算
-                    v1 = np.array([shoulder['x'] - elbow['x'], shoulder['y'] - elbow['y']])
-                    v2 = np.array([wrist['x'] - elbow['x'], wrist['y'] - elbow['y']])
-                    
-                    # 角度計算
-                    cos_angle = np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2))
-                    angle = np.arccos(np.clip(cos_angle, -1.0, 1.0))
-                    angle_degrees = np.degrees(angle)
-                    
-                    angles.append(angle_degrees)
-                    frame_numbers.append(frame_data['frame'])
-        
-        return AngleData(name="elbow_angle", values=angles, frame_numbers=frame_numbers)
-    
-    def _analyze_swing(self, pose_data: List[Dict], racket_data: List[Dict], 
+        return {
+            name: AngleData(
+                name=name,
+                values=values[mask].tolist(),
+                frame_numbers=pose.frames[mask].tolist()
+            )
+            for name, (values, mask) in series.items()
+        }
+    
+    def _analyze_swing(self, pose: PoseSequence, ball_data: List[Dict], racket_data: List[Dict],
                       angle: AnalysisAngle) -> Dict[str, any]:
         """スイング解析"""
         analysis = {}
         
         if angle == AnalysisAngle.SIDE:
+            # ラケット・腰の運動学量はメートル単位で1回だけ計算して共有する
+            scale = self._estimate_scale(pose)
+            racket_kinematics = self._racket_kinematics(racket_data, scale)
+            
             analysis.update({
-                'swing_speed': self._calculate_swing_speed(racket_data),
-                'swing_path': self._analyze_swing_path(racket_data),
-                'weight_transfer': self._analyze_weight_transfer(pose_data),
-                'timing_analysis': self._analyze_timing(pose_data, racket_data)
+                'swing_speed': self._calculate_swing_speed(racket_kinematics),
+                'swing_path': self._analyze_swing_path(racket_kinematics),
+                'weight_transfer': self._analyze_weight_transfer(pose, scale),
+                'timing_analysis': self._analyze_timing(pose, ball_data, racket_data,
+                                                        racket_kinematics),
+                'impact_window': racket_kinematics.impact_window() if racket_kinematics else {}
             })
         
         elif angle == AnalysisAngle.FRONT:
+            scale = self._estimate_scale(pose)
             analysis.update({
-                'stance_stability': self._analyze_stance_stability(pose_data),
-                'body_balance': self._analyze_body_balance(pose_data),
-                'foot_positioning': self._analyze_foot_positioning(pose_data)
+                'stance_stability': self._analyze_stance_stability(pose, scale),
+                'body_balance': self._analyze_body_balance(pose, scale),
+                'foot_positioning': self._analyze_foot_positioning(pose, scale)
             })
         
         return analysis
@@ -421,47 +855,453 @@ class SoftTennisKinoveaEngine:
         return recommendations
     
     # その他のヘルパーメソッド（簡略化）
-    def _calculate_swing_speed(self, racket_data: List[Dict]) -> float:
-        """スイング速度計算"""
-        if len(racket_data) < 2:
+    def _estimate_scale(self, pose: PoseSequence) -> Optional[float]:
+        """1ピクセルあたりの長さ（メートル）を体格から推定"""
+        if pose.frame_size is None:
+            return None
+        reference = self.soft_tennis_params["scale_reference"]["shoulder_to_ankle"]
+        return estimate_scale(pose, pose.frame_size, reference)
+    
+    def _racket_kinematics(self, racket_data: List[Dict],
+                           scale: Optional[float]) -> Optional[Kinematics]:
+        """ラケット位置の運動学量（メートル単位、スケール不明時はNone）"""
+        if len(racket_data) < 2 or scale is None:
+            return None
+        
+        xy = np.array([(d['position'].x, d['position'].y) for d in racket_data])
+        timestamps = np.array([d['timestamp'] for d in racket_data])
+        return compute_kinematics(xy, timestamps, scale=scale)
+    
+    def _calculate_swing_speed(self, racket_kinematics: Optional[Kinematics]) -> float:
+        """スイング速度計算（ラケットの最大速度、m/s）"""
+        if racket_kinematics is None:
             return 0.0
+        return racket_kinematics.peak()["peak_speed"]
+    
+    def _analyze_swing_path(self, racket_kinematics: Optional[Kinematics]) -> Dict[str, any]:
+        """スイング軌道解析"""
+        if racket_kinematics is None or len(racket_kinematics) < 2:
+            return {"path_smoothness": 0.8, "path_length": 150}
         
-        # 簡単な速度計算
-        speeds = []
-        for i in range(1, len(racket_data)):
-            prev = racket_data[i-1]['position']
-            curr = racket_data[i]['position']
-            dt = racket_data[i]['timestamp'] - racket_data[i-1]['timestamp']
-            
-            if dt > 0:
-                distance = prev.distance_to(curr)
-                speed = distance / dt  # pixel/second
-                speeds.append(speed)
+        # 動いている区間の軌道長（メートル）と滑らかさ
+        segment = racket_kinematics.active_segment()
+        path = racket_kinematics.position[segment]
+        path_length = float(np.linalg.norm(np.diff(path, axis=0), axis=1).sum())
+        return {
+            "path_smoothness": racket_kinematics.smoothness(),
+            "path_length": path_length
+        }
+    
+    def _analyze_weight_transfer(self, pose: PoseSequence, scale: Optional[float]) -> Dict[str, any]:
+        """体重移動解析（腰の中点の水平移動から推定）"""
+        detected = pose.detected()
+        if len(detected) < 2 or scale is None:
+            return {"score": 0.75, "transfer_time": 0.3}
         
-        return np.mean(speeds) if speeds else 0.0
+        hip = compute_kinematics(self._landmark_pixels(detected, 23, 24), detected.timestamps,
+                                 scale=scale)
+        
+        # 腰が最大速度の半分以上で動いている時間を体重移動の時間とみなす
+        segment = hip.active_segment(threshold=0.5)
+        times = hip.timestamps[segment]
+        transfer_time = float(times[-1] - times[0]) if len(times) else 0.0
+        peak_speed = hip.peak()["peak_speed"]
+        
+        # 腰の最大速度1.0m/sを十分な体重移動の目安とする
+        return {
+            "score": float(min(peak_speed / 1.0, 1.0)),
+            "transfer_time": transfer_time,
+            "peak_hip_speed": peak_speed
+        }
     
-    def _analyze_swing_path(self, racket_data: List[Dict]) -> Dict[str, any]:
-        """スイング軌道解析"""
-        return {"path_smoothness": 0.8, "path_length": 150}
+    def _analyze_timing(self, pose: PoseSequence, ball_data: List[Dict], racket_data: List[Dict],
+                        racket_kinematics: Optional[Kinematics]) -> Dict[str, any]:
+        """タイミング解析
+        
+        contact_timing はラケットが最大速度になった時刻に対するインパクト
+        （ボールがラケットに最も近づいたフレーム）の時刻の差（秒）で、
+        負なら加速中の早い打点、正なら減速後の遅い打点を表す。
+        """
+        if racket_kinematics is None or len(racket_kinematics) < 2:
+            return {"preparation_time": 0.8, "contact_timing": 0.0}
+        
+        # スイング開始（最大速度の10%を超えた時点）から最大速度までを準備〜インパクトとみなす
+        segment = racket_kinematics.active_segment()
+        peak_time = racket_kinematics.peak()["peak_time"]
+        start_time = float(racket_kinematics.timestamps[segment][0])
+        
+        # インパクトが特定できない場合は最大速度の時点で打ったとみなす
+        contact_time = self._estimate_contact_time(ball_data, racket_data)
+        return {
+            "preparation_time": peak_time - start_time,
+            "contact_timing": contact_time - peak_time if contact_time is not None else 0.0
+        }
+    
+    def _estimate_contact_time(self, ball_data: List[Dict],
+                               racket_data: List[Dict]) -> Optional[float]:
+        """ボールとラケットが最も近づいたフレームの時刻（同じフレームの検出がなければNone）"""
+        racket_by_frame = {d['frame']: d for d in racket_data}
+        pairs = [(ball, racket_by_frame[ball['frame']]) for ball in ball_data
+                 if ball['frame'] in racket_by_frame]
+        if not pairs:
+            return None
+        
+        ball_xy = np.array([(ball['position'].x, ball['position'].y) for ball, _ in pairs])
+        racket_xy = np.array([(racket['position'].x, racket['position'].y) for _, racket in pairs])
+        nearest = int(np.argmin(np.linalg.norm(ball_xy - racket_xy, axis=1)))
+        return float(pairs[nearest][0]['timestamp'])
+    
+    def _analyze_stance_stability(self, pose: PoseSequence, scale: Optional[float]) -> Dict[str, any]:
+        """スタンス安定性解析（腰の中点のぶれの大きさと速さから推定）"""
+        detected = pose.detected()
+        if len(detected) < 2 or scale is None:
+            return {"score": 0.8, "foot_distance": 0.6}
+        
+        hip = compute_kinematics(self._landmark_pixels(detected, 23, 24), detected.timestamps,
+                                 scale=scale)
+        sway = float(np.ptp(hip.position[:, 0]))
+        mean_speed = float(hip.speed.mean())
+        
+        # 両足首の間隔（メートル、中央値）
+        ankle_offset = self._landmark_pixels(detected, 27) - self._landmark_pixels(detected, 28)
+        foot_distance = float(np.median(np.linalg.norm(ankle_offset, axis=1))) * scale
+        
+        # 構え中の腰の平均速度0.5m/sを不安定の目安とする
+        return {
+            "score": float(np.clip(1.0 - mean_speed / 0.5, 0.0, 1.0)),
+            "foot_distance": foot_distance,
+            "body_sway": sway,
+            "mean_hip_speed": mean_speed
+        }
+    
+    def _analyze_body_balance(self, pose: PoseSequence, scale: Optional[float]) -> Dict[str, any]:
+        """体バランス解析（支持基底に対する腰の中点の位置と上下動から推定）"""
+        detected = pose.detected()
+        if len(detected) < 2 or scale is None:
+            return {"left_right_balance": 0.85, "forward_backward_balance": 0.9}
+        
+        hip = compute_kinematics(self._landmark_pixels(detected, 23, 24), detected.timestamps,
+                                 scale=scale)
+        ankle = compute_kinematics(self._landmark_pixels(detected, 27, 28), detected.timestamps,
+                                   scale=scale)
+        half_stance = np.abs(detected.landmarks[:, 27, 0] - detected.landmarks[:, 28, 0]) / 2
+        half_stance = float(np.median(half_stance)) * pose.frame_size[0] * scale
+        
+        # 左右: 腰の中点が両足の中央からずれるほど低く（足幅の半分で0）
+        offset = float(np.mean(np.abs(hip.position[:, 0] - ankle.position[:, 0])))
+        left_right = 1.0 - offset / half_stance if half_stance > 0 else 0.0
+        
+        # 前後: 正面からは奥行きが見えないため、前後への重心移動に伴う腰の上下動の速さで
+        # 代用する（0.5m/sで0）
+        vertical_speed = float(np.abs(hip.velocity[:, 1]).max())
+        forward_backward = 1.0 - vertical_speed / 0.5
+        return {
+            "left_right_balance": float(np.clip(left_right, 0.0, 1.0)),
+            "forward_backward_balance": float(np.clip(forward_backward, 0.0, 1.0))
+        }
+    
+    def _analyze_foot_positioning(self, pose: PoseSequence, scale: Optional[float]) -> Dict[str, any]:
+        """足の位置解析（足幅・つま先の向き・足の動きの速さ）"""
+        detected = pose.detected()
+        if len(detected) < 2 or scale is None:
+            return {"stance_width": 0.7, "foot_angle": 45}
+        
+        ankles = [self._landmark_pixels(detected, index) for index in (27, 28)]
+        stance_width = float(np.median(np.linalg.norm(ankles[0] - ankles[1], axis=1))) * scale
+        
+        # かかと→つま先の向きの水平からの角度（左右平均）
+        toe = np.stack([self._landmark_pixels(detected, toe) - self._landmark_pixels(detected, heel)
+                        for heel, toe in ((29, 31), (30, 32))])
+        foot_angle = float(np.degrees(np.mean(np.arctan2(np.abs(toe[..., 1]), np.abs(toe[..., 0])))))
+        
+        # 足の踏み替え・踏み込みの速さ（左右の足首の最大速度）
+        foot_speed = max(
+            compute_kinematics(ankle, detected.timestamps, scale=scale).peak()["peak_speed"]
+            for ankle in ankles
+        )
+        return {
+            "stance_width": stance_width,
+            "foot_angle": foot_angle,
+            "peak_foot_speed": foot_speed
+        }
+    
+    def _landmark_pixels(self, pose: PoseSequence, *indices: int) -> np.ndarray:
+        """ランドマーク（複数指定した場合はその中点）のピクセル座標列 (T, 2)"""
+        width, height = pose.frame_size
+        point = pose.landmarks[:, list(indices), :2].mean(axis=1)
+        return point * np.array([width, height])
+    
+    # 以下、その他のヘルパーメソッドも同様に実装...
+
+class AnalysisSession:
+    """1本の動画の解析中に変化する状態を保持するセッション
+
+    姿勢推定バックエンド・追跡器・人物領域をセッションごとに持つため、
+    1つのエンジンで複数の動画を並行・交互に解析しても状態が混ざらない。
+    """
     
-    def _analyze_weight_transfer(self, pose_data: List[Dict]) -> Dict[str, any]:
-        """体重移動解析"""
-        return {"score": 0.75, "transfer_time": 0.3}
+    def __init__(self, engine: SoftTennisKinoveaEngine, track_objects: bool = True,
+                 color_order: str = "bgr", frame_stride: Optional[int] = None):
+        self.engine = engine
+        self.track_objects = track_objects
+        self.color_order = color_order
+        self.frame_stride = frame_stride or engine.profile.frame_stride
+        
+        # 姿勢推定の状態
+        self.pose = engine._acquire_pose()
+        self.person_roi: Optional[Tuple[int, int, int, int]] = None
+        
+        # ボール・ラケット追跡の状態
+        self.ball_tracker = engine._create_ball_tracker()
+        self.racket_tracker = engine._create_racket_tracker()
+        self.last_frame: Optional[int] = None
+        
+        # 静止フレームでの姿勢推定の省略状態（姿勢の段で更新）
+        self.max_pose_skip = engine.max_pose_skip
+        self._gate_reference: Optional[np.ndarray] = None  # 直前の推論時の人物領域（縮小）
+        self._pose_reference: Optional[np.ndarray] = None  # 直前の推論結果のランドマーク
+        self._wrist_motion: Optional[float] = None          # 直前の推論間の手首の移動量
+        self._skipped = 0                                   # 連続して省略したフレーム数
+        
+        # 補間の状態（結果の結合時に更新）
+        self._last_pose: Optional[Tuple[float, np.ndarray]] = None  # 直前の推論結果（時刻, ランドマーク）
+        self._pending: List[FrameObservation] = []  # 補間待ちのフレーム
     
-    def _analyze_timing(self, pose_data: List[Dict], racket_data: List[Dict]) -> Dict[str, any]:
-        """タイミング解析"""
-        return {"preparation_time": 0.8, "contact_timing": 0.9}
+    def __enter__(self) -> "AnalysisSession":
+        return self
     
-    def _analyze_stance_stability(self, pose_data: List[Dict]) -> Dict[str, any]:
-        """スタンス安定性解析"""
-        return {"score": 0.8, "foot_distance": 0.6}
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def close(self):
+        """姿勢推定バックエンドをエンジンに返却"""
+        if self.pose is not None:
+            self.engine._release_pose(self.pose)
+            self.pose = None
+    
+    def process_frame(self, frame_index: int, frame: Union[np.ndarray, NormalizedFrame],
+                      timestamp: float, scale: float = 1.0) -> List[FrameObservation]:
+        """
+        1フレームを解析し、確定した観測結果をフレーム順に返す
+        
+        人物領域に動きがないフレームは姿勢推定を省略して保留し、次に推論した
+        フレームとの間で線形補間してからまとめて返す。
+        
+        Args:
+            frame_index: 元動画でのフレーム番号
+            frame: セッションの色順のフレーム（縮小済みの場合あり）
+            timestamp: フレーム時刻（秒）
+            scale: 元動画に対するフレームの縮小率
+        """
+        frame, new_segment = self.start_frame(frame_index, frame, scale)
+        landmarks, skip_pose, arm_landmarks = self.pose_stage(frame, new_segment)
+        ball_pos = self.ball_stage(frame, timestamp, new_segment)
+        racket_pos = self.racket_stage(frame, timestamp, new_segment, arm_landmarks)
+        return self.finish_frame(frame_index, frame, timestamp, new_segment,
+                                 landmarks, skip_pose, ball_pos, racket_pos)
+    
+    # 1フレームの処理は以下の段に分かれ、姿勢・ボール・ラケットの各段はそれぞれの
+    # 段の中でフレーム順に呼ばれれば、段どうしは並行に実行できる（dataflow.FrameDataflow）
+    
+    def start_frame(self, frame_index: int, frame: Union[np.ndarray, NormalizedFrame],
+                    scale: float = 1.0) -> Tuple[NormalizedFrame, bool]:
+        """フレームを正規化し、解析区間の開始フレームかを判定（フレーム順に呼ぶ）"""
+        # 解析解像度への縮小は1度だけ行い、色空間の変換結果は各処理で共有する
+        frame = self.engine.frame_normalizer.normalize(frame, self.color_order, scale)
+        
+        # 解析区間の開始時、または区間が途切れた場合は姿勢・ボール・ラケットを検出し直す
+        new_segment = self.last_frame is None or frame_index - self.last_frame > self.frame_stride
+        self.last_frame = frame_index
+        return frame, new_segment
+    
+    def pose_stage(self, frame: NormalizedFrame, new_segment: bool
+                   ) -> Tuple[Optional[np.ndarray], bool, Optional[np.ndarray]]:
+        """
+        姿勢の段（静止フレームは推定を省略）
+        
+        Returns:
+            (ランドマーク, 推定を省略したか, ラケット検出に使う腕のランドマーク)
+            （省略したフレームは直前の推論結果の腕の位置を使う）
+        """
+        if new_segment:
+            self._skipped = 0
+            self._pose_reference = None
+        
+        if not new_segment and self._is_static(frame):
+            self._skipped += 1
+            return None, True, self._pose_reference
+        
+        landmarks = self._detect_pose(frame)
+        self._wrist_motion = self._measure_wrist_motion(frame, landmarks, self._skipped + 1)
+        self._skipped = 0
+        self._pose_reference = landmarks
+        return landmarks, False, landmarks
+    
+    def ball_stage(self, frame: NormalizedFrame, timestamp: float,
+                   new_segment: bool) -> Optional[Point2D]:
+        """ボールの段"""
+        if not self.track_objects:
+            return None
+        if new_segment:
+            self.ball_tracker.reset()
+        return self._track_ball(frame, timestamp)
+    
+    def racket_stage(self, frame: NormalizedFrame, timestamp: float, new_segment: bool,
+                     arm_landmarks: Optional[np.ndarray]) -> Optional[Point2D]:
+        """ラケットの段（同じフレームの姿勢の段の結果が必要）"""
+        if not self.track_objects:
+            return None
+        if new_segment:
+            self.racket_tracker.reset()
+        return self._track_racket(frame, timestamp, arm_landmarks)
+    
+    def finish_frame(self, frame_index: int, frame: NormalizedFrame, timestamp: float,
+                     new_segment: bool, landmarks: Optional[np.ndarray], skip_pose: bool,
+                     ball_pos: Optional[Point2D],
+                     racket_pos: Optional[Point2D]) -> List[FrameObservation]:
+        """各段の結果を観測結果にまとめ、確定したものをフレーム順に返す（フレーム順に呼ぶ）"""
+        ready = self.flush() if new_segment else []
+        
+        observation = FrameObservation(
+            frame=frame_index,
+            timestamp=timestamp,
+            landmarks=landmarks,
+            ball_position=self.engine._to_source_scale(ball_pos, frame.scale),
+            racket_position=self.engine._to_source_scale(racket_pos, frame.scale),
+            frame_size=frame.source_size,
+            pose_interpolated=skip_pose
+        )
+        
+        if skip_pose:
+            self._pending.append(observation)
+            return ready
+        
+        self._fill_pending(timestamp, landmarks)
+        self._last_pose = (timestamp, landmarks) if landmarks is not None else None
+        ready.extend(self._pending)
+        ready.append(observation)
+        self._pending = []
+        return ready
+    
+    def flush(self) -> List[FrameObservation]:
+        """保留中のフレームを返す（後続の推論結果がないため直前の姿勢を保持）"""
+        self._fill_pending(None, None)
+        ready, self._pending = self._pending, []
+        return ready
+    
+    def _is_static(self, frame: NormalizedFrame) -> bool:
+        """前回推論したフレームから人物領域がほぼ変化していないか
+
+        領域全体の平均では手首やラケットのような小さく速い動きが埋もれるため、
+        タイルごとの変化画素率の最大値で判定する。直前の推論間で手首が動いて
+        いた場合は、縮小画像に現れない動きもありうるため省略しない。
+        """
+        if self.max_pose_skip <= 0 or self._skipped >= self.max_pose_skip:
+            return False
+        if self._gate_reference is None or self._pose_reference is None:
+            return False
+        
+        params = self.engine.soft_tennis_params["motion_gate"]
+        if self._wrist_motion is None or self._wrist_motion >= params["wrist_speed"]:
+            return False
+        
+        changed = cv2.absdiff(self._gate_thumbnail(frame), self._gate_reference) >= params["pixel_threshold"]
+        tile = params["tile_size"]
+        rows, cols = changed.shape[0] // tile, changed.shape[1] // tile
+        tiles = changed[:rows * tile, :cols * tile].reshape(rows, tile, cols, tile)
+        return float(tiles.mean(axis=(1, 3)).max()) < params["max_changed"]
+    
+    def _gate_thumbnail(self, frame: NormalizedFrame) -> np.ndarray:
+        """人物領域を縮小したグレースケール画像（動き判定用）"""
+        size = self.engine.soft_tennis_params["motion_gate"]["thumbnail_size"]
+        gray = frame.view("gray", self.person_roi)
+        return cv2.resize(gray, (size, size), interpolation=cv2.INTER_AREA)
+    
+    def _measure_wrist_motion(self, frame: NormalizedFrame, landmarks: Optional[np.ndarray],
+                              frames: int) -> Optional[float]:
+        """直前の推論結果からの手首の移動量（人物領域の高さ比／フレーム、不明ならNone）"""
+        previous = self._pose_reference
+        if landmarks is None or previous is None or self.person_roi is None:
+            return None
+        
+        frame_h, frame_w = frame.shape[:2]
+        wrists = [15, 16]  # 左右の手首
+        dx = (landmarks[wrists, 0] - previous[wrists, 0]) * frame_w
+        dy = (landmarks[wrists, 1] - previous[wrists, 1]) * frame_h
+        return float(np.hypot(dx, dy).max()) / self.person_roi[3] / frames
+    
+    def _fill_pending(self, timestamp: Optional[float], landmarks: Optional[np.ndarray]):
+        """保留中のフレームのランドマークを直前と今回の推論結果から線形補間"""
+        if not self._pending:
+            return
+        
+        start_time, start = self._last_pose
+        for observation in self._pending:
+            if landmarks is None or timestamp <= start_time:
+                observation.landmarks = start
+            else:
+                weight = (observation.timestamp - start_time) / (timestamp - start_time)
+                observation.landmarks = start + (landmarks - start) * np.float32(weight)
+    
+    def _detect_pose(self, frame: NormalizedFrame) -> Optional[np.ndarray]:
+        """姿勢検出（人物領域を切り出して推論）
+        
+        MediaPipeは動画モードで前フレームの結果から追跡・平滑化するため、その座標系
+        （入力画像）が毎フレーム変わらないよう、切り出し領域は人物が縁に近づくまで
+        固定する。領域を変えた場合やフレーム全体に切り替えた場合は、前の座標系の
+        追跡状態を持ち越さないよう姿勢推定バックエンドをリセットする。
+        """
+        engine = self.engine
+        frame_h, frame_w = frame.shape[:2]
+        landmarks = None
+        
+        roi = self.person_roi
+        if roi is not None:
+            landmarks = engine._run_pose(self.pose, frame, self.color_order, roi)
+            if landmarks is not None:
+                landmarks = engine._map_landmarks_to_frame(landmarks, roi, frame_w, frame_h)
+        
+        # 追跡が外れた場合はフレーム全体で再検出
+        if landmarks is None:
+            if roi is not None:
+                self.pose.reset()
+                roi = None
+            landmarks = engine._run_pose(self.pose, frame, self.color_order)
+        
+        if landmarks is None:
+            self.person_roi = None
+        elif roi is None or not self._inside_person_roi(landmarks, roi, frame_w, frame_h):
+            self.person_roi = engine._person_roi_from_landmarks(landmarks, frame_w, frame_h)
+            if self.person_roi != roi:
+                self.pose.reset()
+        
+        # 次フレーム以降の動き判定の基準
+        if self.max_pose_skip > 0 and self.person_roi is not None:
+            self._gate_reference = self._gate_thumbnail(frame)
+        else:
+            self._gate_reference = None
+        return landmarks
     
-    def _analyze_body_balance(self, pose_data: List[Dict]) -> Dict[str, any]:
-        """体バランス解析"""
-        return {"left_right_balance": 0.85, "forward_backward_balance": 0.9}
+    def _inside_person_roi(self, landmarks: np.ndarray, roi: Tuple[int, int, int, int],
+                           frame_w: int, frame_h: int) -> bool:
+        """ランドマークが切り出し領域の縁に近づいていないか（フレームの端に接する辺は除く）"""
+        margin = self.engine.soft_tennis_params["person_roi"]["edge_margin"]
+        x, y, w, h = roi
+        xs = landmarks[:, 0] * frame_w
+        ys = landmarks[:, 1] * frame_h
+        margin_x, margin_y = margin * w, margin * h
+        return bool((x <= 0 or xs.min() >= x + margin_x) and
+                    (x + w >= frame_w or xs.max() <= x + w - margin_x) and
+                    (y <= 0 or ys.min() >= y + margin_y) and
+                    (y + h >= frame_h or ys.max() <= y + h - margin_y))
     
-    def _analyze_foot_positioning(self, pose_data: List[Dict]) -> Dict[str, any]:
-        """足の位置解析"""
-        return {"stance_width": 0.7, "foot_angle": 45}
+    def _track_ball(self, frame: NormalizedFrame, timestamp: float) -> Optional[Point2D]:
+        """ボール追跡（見失った場合は追跡器が自動で再検出）"""
+        position = self.ball_tracker.update(frame, timestamp, self.color_order)
+        return Point2D(*position) if position is not None else None
     
-    # 以下、その他のヘルパーメソッドも同様に実装...
\ No newline at end of file
+    def _track_racket(self, frame: NormalizedFrame, timestamp: float,
+                      landmarks: Optional[np.ndarray]) -> Optional[Point2D]:
+        """ラケット追跡（初期化・再検出は手首・肘から求めた前腕の延長上の領域で行う）"""
+        position = self.racket_tracker.update(frame, timestamp, self.color_order, landmarks)
+        return Point2D(*position) if position is not None else None
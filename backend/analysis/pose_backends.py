@@ -0,0 +1,240 @@
+"""
+姿勢推定バックエンド
+MediaPipe PoseとONNX Runtime（MoveNet形式のモデル）を同じインターフェースで扱う
+"""
+
+import fcntl
+import os
+import tempfile
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+try:
+    import mediapipe as mp
+except ImportError:  # ONNXバックエンドのみ使う環境ではMediaPipeは不要
+    mp = None
+
+try:
+    import onnxruntime as ort
+except ImportError:  # ONNX Runtimeは任意依存
+    ort = None
+
+# 選択可能なバックエンド
+POSE_BACKENDS = ("mediapipe", "onnx")
+
+# BlazePose（33点）の各ランドマークに対応するCOCO（17点）のキーポイント
+# COCOにない点（目の内側・外側、口、手指、かかと、つま先）は最も近い点で代用する
+_COCO_TO_BLAZEPOSE = np.array([
+    0,              # 0 鼻
+    1, 1, 1,        # 1-3 左目（内側・中心・外側）
+    2, 2, 2,        # 4-6 右目（内側・中心・外側）
+    3, 4,           # 7-8 左耳・右耳
+    0, 0,           # 9-10 口（左右）
+    5, 6,           # 11-12 左肩・右肩
+    7, 8,           # 13-14 左肘・右肘
+    9, 10,          # 15-16 左手首・右手首
+    9, 10,          # 17-18 小指
+    9, 10,          # 19-20 人差し指
+    9, 10,          # 21-22 親指
+    11, 12,         # 23-24 左腰・右腰
+    13, 14,         # 25-26 左膝・右膝
+    15, 16,         # 27-28 左足首・右足首
+    15, 16,         # 29-30 かかと
+    15, 16,         # 31-32 つま先
+])
+
+# 人物の検出判定に使うCOCOキーポイント（両肩・両腰）
+_COCO_TORSO = [5, 6, 11, 12]
+
+class PoseBackend:
+    """姿勢推定バックエンドの基底クラス
+
+    estimate() はRGB画像を1枚受け取り、画像内で正規化した (33, 4) の
+    ランドマーク（x, y, z, visibility）または未検出時Noneを返す。
+    解析では静止フレームの判定や人物領域が直前の推論結果で決まるため、
+    フレームは時系列順に1枚ずつ推論する。
+    """
+    name = ""
+
+    def estimate(self, image: np.ndarray) -> Optional[np.ndarray]:
+        """RGB画像に対して姿勢推定を実行"""
+        raise NotImplementedError
+
+    def reset(self):
+        """動画間で持ち越す追跡状態を初期化"""
+
+    def close(self):
+        """モデルを解放"""
+
+class MediaPipePoseBackend(PoseBackend):
+    """MediaPipe Poseによるバックエンド（前フレームの結果を使って追跡する）"""
+    name = "mediapipe"
+
+    def __init__(self, model_complexity: int = 1, min_detection_confidence: float = 0.7,
+                 min_tracking_confidence: float = 0.5):
+        if mp is None:
+            raise ImportError("MediaPipeがインストールされていません（pip install mediapipe）")
+
+        self.pose = mp.solutions.pose.Pose(
+            static_image_mode=False,
+            model_complexity=model_complexity,
+            enable_segmentation=False,
+            min_detection_confidence=min_detection_confidence,
+            min_tracking_confidence=min_tracking_confidence
+        )
+
+    def estimate(self, image: np.ndarray) -> Optional[np.ndarray]:
+        output = self.pose.process(image)
+        if not output.pose_landmarks:
+            return None
+        return np.array(
+            [(lm.x, lm.y, lm.z, lm.visibility) for lm in output.pose_landmarks.landmark],
+            dtype=np.float32
+        )
+
+    def reset(self):
+        self.pose.reset()
+
+    def close(self):
+        self.pose.close()
+
+class OnnxPoseBackend(PoseBackend):
+    """ONNX Runtime（CPU）によるバックエンド
+
+    MoveNet形式（入力: (1, H, W, 3) のRGB画像、出力: (1, 1, 17, 3) の
+    y, x, スコア）のモデルを想定する。画像はアスペクト比を保って
+    入力サイズに縮小・余白付けして推論する。
+    出力のCOCO 17点はBlazePose 33点の配置に変換する（zは0のため、奥行きを使う
+    体幹のひねり（body_rotation）は計算されない）。
+    """
+    name = "onnx"
+
+    def __init__(self, model_path: str, intra_op_threads: int = 1, inter_op_threads: int = 1,
+                 int8: bool = False, int8_model_path: Optional[str] = None,
+                 min_score: float = 0.3):
+        """
+        Args:
+            model_path: ONNXモデルのパス
+            intra_op_threads: 演算内の並列スレッド数（0はONNX Runtimeの既定値）
+            inter_op_threads: 演算間の並列スレッド数（0はONNX Runtimeの既定値）
+            int8: Trueの場合はint8量子化モデルを使う
+            int8_model_path: 量子化モデルのパス（省略時は model_path の拡張子前に
+                ".int8" を付けたパス、存在しなければ初回に動的量子化して保存）
+            min_score: 両肩・両腰の平均スコアがこれ未満なら未検出とみなす
+        """
+        if ort is None:
+            raise ImportError("ONNX Runtimeがインストールされていません（pip install onnxruntime）")
+
+        if int8:
+            model_path = self._quantized_model(model_path, int8_model_path)
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = inter_op_threads
+        options.execution_mode = (ort.ExecutionMode.ORT_PARALLEL if inter_op_threads != 1
+                                  else ort.ExecutionMode.ORT_SEQUENTIAL)
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, sess_options=options,
+                                            providers=["CPUExecutionProvider"])
+
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.input_dtype = np.int32 if model_input.type == "tensor(int32)" else np.float32
+
+        # 入力形状から配置（NHWC / NCHW）と入力サイズを判定
+        shape = model_input.shape
+        self.channels_first = shape[1] == 3
+        size = shape[2] if self.channels_first else shape[1]
+        self.input_size = size if isinstance(size, int) else 192
+        self.min_score = min_score
+
+    def estimate(self, image: np.ndarray) -> Optional[np.ndarray]:
+        canvas, transform = self._letterbox(image)
+        batch = canvas[np.newaxis].astype(self.input_dtype)
+        if self.channels_first:
+            batch = batch.transpose(0, 3, 1, 2)
+
+        output = self.session.run(None, {self.input_name: batch})[0]
+        points = output.reshape(-1, 17, 3)[0]
+        if points[_COCO_TORSO, 2].mean() < self.min_score:
+            return None
+        return self._to_blazepose(points, transform, image.shape[1], image.shape[0])
+
+    def _letterbox(self, image: np.ndarray) -> Tuple[np.ndarray, Tuple[float, int, int]]:
+        """アスペクト比を保って入力サイズに縮小し、余白を付ける"""
+        size = self.input_size
+        height, width = image.shape[:2]
+        scale = size / max(height, width)
+        new_w = max(1, int(round(width * scale)))
+        new_h = max(1, int(round(height * scale)))
+        interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+        resized = cv2.resize(image, (new_w, new_h), interpolation=interpolation)
+
+        pad_x = (size - new_w) // 2
+        pad_y = (size - new_h) // 2
+        canvas = np.zeros((size, size, 3), dtype=np.uint8)
+        canvas[pad_y:pad_y + new_h, pad_x:pad_x + new_w] = resized
+        return canvas, (scale, pad_x, pad_y)
+
+    def _to_blazepose(self, points: np.ndarray, transform: Tuple[float, int, int],
+                      width: int, height: int) -> np.ndarray:
+        """余白付き入力内のCOCOキーポイントを元画像で正規化したBlazePose配置に変換"""
+        scale, pad_x, pad_y = transform
+        size = self.input_size
+        coco = np.empty((17, 4), dtype=np.float32)
+        coco[:, 0] = (points[:, 1] * size - pad_x) / scale / width
+        coco[:, 1] = (points[:, 0] * size - pad_y) / scale / height
+        coco[:, 2] = 0.0
+        coco[:, 3] = points[:, 2]
+        return coco[_COCO_TO_BLAZEPOSE]
+
+    @staticmethod
+    def _quantized_model(model_path: str, int8_model_path: Optional[str]) -> str:
+        """int8量子化モデルのパス（存在しなければ動的量子化して生成）
+
+        複数のワーカープロセスが同時に起動しても1回だけ量子化するよう、ロック
+        ファイルで排他し、同じディレクトリの一時ファイルに書き込んでから置き換える
+        （他のプロセスが書きかけのモデルを読み込むことはない）。
+        """
+        if int8_model_path is None:
+            root, ext = os.path.splitext(model_path)
+            int8_model_path = f"{root}.int8{ext}"
+
+        if os.path.exists(int8_model_path):
+            return int8_model_path
+
+        directory = os.path.dirname(os.path.abspath(int8_model_path))
+        with open(f"{int8_model_path}.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            # ロック待ちの間に他のプロセスが量子化していればそれを使う
+            if not os.path.exists(int8_model_path):
+                from onnxruntime.quantization import QuantType, quantize_dynamic
+
+                fd, temp_path = tempfile.mkstemp(suffix=".onnx", prefix=".quantizing-", dir=directory)
+                os.close(fd)
+                try:
+                    quantize_dynamic(model_path, temp_path, weight_type=QuantType.QInt8)
+                    os.replace(temp_path, int8_model_path)
+                except BaseException:
+                    if os.path.exists(temp_path):
+                        os.remove(temp_path)
+                    raise
+        return int8_model_path
+
+def create_pose_backend(name: str = "mediapipe", model_complexity: int = 1,
+                        **options) -> PoseBackend:
+    """
+    姿勢推定バックエンドを生成
+
+    Args:
+        name: "mediapipe" または "onnx"
+        model_complexity: MediaPipeのモデル複雑度（ONNXでは未使用）
+        **options: 各バックエンドのコンストラクタ引数
+    """
+    if name == "mediapipe":
+        return MediaPipePoseBackend(model_complexity, **options)
+    if name == "onnx":
+        return OnnxPoseBackend(**options)
+    raise ValueError(f"未知の姿勢推定バックエンドです: {name}")
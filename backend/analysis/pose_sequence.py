@@ -0,0 +1,122 @@
+"""
+姿勢ランドマークの列指向ストア
+全フレームのランドマークを (T, 33, 4) のfloat32配列にまとめて保持する
+"""
+
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+
+# MediaPipe Poseのランドマーク数
+NUM_LANDMARKS = 33
+
+# ランドマーク配列の列（x, y, z, visibility）
+LANDMARK_X = 0
+LANDMARK_Y = 1
+LANDMARK_Z = 2
+LANDMARK_VISIBILITY = 3
+
+@dataclass
+class PoseSequence:
+    """姿勢ランドマークの時系列
+
+    landmarks: (T, 33, 4) float32 正規化座標x, y, z と visibility（未検出フレームは0）
+    frames: (T,) int32 フレーム番号
+    timestamps: (T,) float64 フレーム時刻（秒）
+    valid: (T,) bool 姿勢が検出されたフレーム
+    interpolated: (T,) bool 推論を省略し、前後のフレームから補間したフレーム
+    frame_size: 元動画のフレームサイズ (幅, 高さ)（ピクセル換算用）
+    """
+    landmarks: np.ndarray
+    frames: np.ndarray
+    timestamps: np.ndarray
+    valid: np.ndarray
+    interpolated: np.ndarray
+    frame_size: Optional[Tuple[int, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    @classmethod
+    def empty(cls) -> "PoseSequence":
+        """空の時系列"""
+        return cls(
+            landmarks=np.zeros((0, NUM_LANDMARKS, 4), dtype=np.float32),
+            frames=np.zeros(0, dtype=np.int32),
+            timestamps=np.zeros(0, dtype=np.float64),
+            valid=np.zeros(0, dtype=bool),
+            interpolated=np.zeros(0, dtype=bool)
+        )
+
+    def detected(self) -> "PoseSequence":
+        """姿勢が検出されたフレームのみの時系列"""
+        return PoseSequence(
+            landmarks=self.landmarks[self.valid],
+            frames=self.frames[self.valid],
+            timestamps=self.timestamps[self.valid],
+            valid=self.valid[self.valid],
+            interpolated=self.interpolated[self.valid],
+            frame_size=self.frame_size
+        )
+
+class PoseSequenceBuilder:
+    """フレームごとのランドマークを追加してPoseSequenceを組み立てる
+
+    配列は容量が不足した時点で倍に拡張するため、追加は償却O(1)。
+    """
+
+    def __init__(self, capacity: int = 256):
+        capacity = max(1, capacity)
+        self._landmarks = np.zeros((capacity, NUM_LANDMARKS, 4), dtype=np.float32)
+        self._frames = np.zeros(capacity, dtype=np.int32)
+        self._timestamps = np.zeros(capacity, dtype=np.float64)
+        self._valid = np.zeros(capacity, dtype=bool)
+        self._interpolated = np.zeros(capacity, dtype=bool)
+        self._size = 0
+        self.frame_size: Optional[Tuple[int, int]] = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, frame: int, timestamp: float, landmarks: Optional[np.ndarray],
+               interpolated: bool = False):
+        """1フレーム分のランドマーク（(33, 4) または未検出時None）を追加"""
+        if self._size == len(self._frames):
+            self._grow()
+
+        i = self._size
+        self._frames[i] = frame
+        self._timestamps[i] = timestamp
+        if landmarks is not None:
+            self._landmarks[i] = landmarks
+            self._valid[i] = True
+            self._interpolated[i] = interpolated
+        self._size += 1
+
+    def build(self) -> PoseSequence:
+        """追加済みフレームからPoseSequenceを生成"""
+        n = self._size
+        return PoseSequence(
+            landmarks=self._landmarks[:n].copy(),
+            frames=self._frames[:n].copy(),
+            timestamps=self._timestamps[:n].copy(),
+            valid=self._valid[:n].copy(),
+            interpolated=self._interpolated[:n].copy(),
+            frame_size=self.frame_size
+        )
+
+    def _grow(self):
+        """容量を倍に拡張"""
+        capacity = len(self._frames) * 2
+        self._landmarks = _resize(self._landmarks, capacity)
+        self._frames = _resize(self._frames, capacity)
+        self._timestamps = _resize(self._timestamps, capacity)
+        self._valid = _resize(self._valid, capacity)
+        self._interpolated = _resize(self._interpolated, capacity)
+
+def _resize(array: np.ndarray, capacity: int) -> np.ndarray:
+    """先頭軸の容量を拡張した配列を返す（追加部分は0）"""
+    resized = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+    resized[:len(array)] = array
+    return resized
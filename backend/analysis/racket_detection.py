@@ -0,0 +1,158 @@
+"""
+ラケット検出
+打球側の手首・肘のランドマークから前腕の延長上に探索領域を決め、その中だけでラケットを探す
+"""
+
+import math
+from dataclasses import dataclass
+from typing import Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+from .frame_normalizer import NormalizedFrame, frame_view
+from .pose_sequence import LANDMARK_VISIBILITY
+
+# 打球側（右利き）の肘・手首
+RIGHT_ELBOW = 14
+RIGHT_WRIST = 16
+
+@dataclass
+class RacketDetection:
+    """ラケットの検出結果（座標は入力フレーム上のピクセル）"""
+    x: float                              # ラケット面の中心
+    y: float
+    bbox: Tuple[int, int, int, int]       # 検出領域 (x, y, w, h)
+
+@dataclass
+class ForearmWindow:
+    """前腕から求めた探索領域"""
+    wrist: np.ndarray        # 手首 (x, y)
+    direction: np.ndarray    # 肘→手首の単位ベクトル
+    length: float            # 前腕の長さ（ピクセル）
+    roi: Tuple[int, int, int, int]
+
+class RacketDetector:
+    """前腕の延長上の小領域でラケットを検出
+
+    ラケット面は手首から前腕方向に前腕長の head_offset 倍ほど離れた位置にあると
+    仮定し、その周辺（手首を中心とした回転の余裕を含む）だけでエッジ輪郭を探す。
+    領域内で輪郭が見つからない場合は、pose_fallback が有効なら前腕方向の
+    延長点をラケット位置とする。
+    """
+
+    def __init__(self, head_offset: float = 1.8, search_scale: float = 1.5,
+                 min_search_size: int = 48, min_visibility: float = 0.5,
+                 pose_fallback: bool = True):
+        """
+        Args:
+            head_offset: 手首からラケット面中心までの距離（前腕長に対する比）
+            search_scale: 探索領域の半径（前腕長に対する比）
+            min_search_size: 探索領域の一辺の下限（ピクセル）
+            min_visibility: 肘・手首のvisibilityの下限
+            pose_fallback: 輪郭が見つからない場合に前腕方向から位置を推定する
+        """
+        self.head_offset = head_offset
+        self.search_scale = search_scale
+        self.min_search_size = min_search_size
+        self.min_visibility = min_visibility
+        self.pose_fallback = pose_fallback
+
+    def search_window(self, landmarks: np.ndarray, frame_w: int,
+                      frame_h: int) -> Optional[ForearmWindow]:
+        """ランドマーク（正規化座標）から探索領域を求める（肘・手首が見えなければNone）"""
+        arm = landmarks[[RIGHT_ELBOW, RIGHT_WRIST]]
+        if arm[:, LANDMARK_VISIBILITY].min() < self.min_visibility:
+            return None
+
+        elbow = arm[0, :2] * (frame_w, frame_h)
+        wrist = arm[1, :2] * (frame_w, frame_h)
+        forearm = wrist - elbow
+        length = float(np.linalg.norm(forearm))
+        if length < 1:
+            return None
+
+        direction = forearm / length
+        center = wrist + direction * length * self.head_offset * 0.75
+        half = max(length * self.search_scale, self.min_search_size / 2)
+
+        x0 = min(max(0, int(center[0] - half)), frame_w)
+        y0 = min(max(0, int(center[1] - half)), frame_h)
+        x1 = min(max(0, int(math.ceil(center[0] + half))), frame_w)
+        y1 = min(max(0, int(math.ceil(center[1] + half))), frame_h)
+        if x1 - x0 < 2 or y1 - y0 < 2:
+            return None
+
+        return ForearmWindow(wrist, direction, length, (x0, y0, x1 - x0, y1 - y0))
+
+    def detect(self, frame: Union[np.ndarray, NormalizedFrame], landmarks: Optional[np.ndarray],
+               color_order: str = "bgr") -> Optional[RacketDetection]:
+        """
+        ラケットを検出
+
+        Args:
+            frame: 入力フレーム（NormalizedFrameなら共有のグレースケール変換結果を使う）
+            landmarks: 同じフレームの姿勢ランドマーク (33, 4)（未検出時None）
+            color_order: フレームの色順
+        """
+        if landmarks is None:
+            return None
+
+        frame_h, frame_w = frame.shape[:2]
+        window = self.search_window(landmarks, frame_w, frame_h)
+        if window is None:
+            return None
+
+        detection = self._detect_contour(frame, window, color_order)
+        if detection is None and self.pose_fallback:
+            head = window.wrist + window.direction * window.length * self.head_offset
+            size = int(window.length)
+            detection = RacketDetection(
+                x=float(head[0]),
+                y=float(head[1]),
+                bbox=(int(head[0]) - size // 2, int(head[1]) - size // 2, size, size)
+            )
+        return detection
+
+    def _detect_contour(self, frame: Union[np.ndarray, NormalizedFrame], window: ForearmWindow,
+                        color_order: str) -> Optional[RacketDetection]:
+        """探索領域内のエッジ輪郭からラケット面らしいものを選ぶ"""
+        x0, y0, w, h = window.roi
+        gray = frame_view(frame, color_order, "gray", window.roi)
+        edges = cv2.Canny(gray, 50, 150)
+        contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+        # ラケット面の大きさは前腕の長さに比例するとみなす
+        min_area = 0.1 * window.length ** 2
+        max_area = 2.0 * window.length ** 2
+        max_distance = window.length * (self.head_offset + 1.0)
+
+        best = None
+        best_score = 0.0
+        for contour in contours:
+            area = cv2.contourArea(contour)
+            if not min_area < area < max_area:
+                continue
+
+            x, y, bw, bh = cv2.boundingRect(contour)
+            aspect_ratio = float(bw) / bh
+            if not 0.3 < aspect_ratio < 3.0:
+                continue
+
+            # 手首から前腕方向に離れているほどラケット面らしいとみなす
+            center = np.array([x0 + x + bw / 2, y0 + y + bh / 2])
+            offset = center - window.wrist
+            distance = float(np.linalg.norm(offset))
+            if distance > max_distance:
+                continue
+            alignment = float(offset @ window.direction) / distance if distance > 0 else 0.0
+            score = area * max(alignment, 0.0)
+            if score > best_score:
+                best_score = score
+                best = RacketDetection(
+                    x=float(center[0]),
+                    y=float(center[1]),
+                    bbox=(x0 + x, y0 + y, bw, bh)
+                )
+
+        return best
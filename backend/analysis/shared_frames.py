@@ -0,0 +1,358 @@
+"""
+共有メモリのフレームリング
+デコードプロセスが固定スロットにフレームを書き込み、解析プロセスはスロット番号だけを受け取って
+コピーせずにNumPy配列として参照する
+"""
+
+import io
+import multiprocessing
+import queue
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Callable, Iterator, Optional, Tuple
+
+import numpy as np
+
+from .decoders import VideoSource, open_decoder
+
+# スロットごとのメタデータ（フレームの形状と参照カウント）
+_SLOT_HEADER = np.dtype([
+    ("height", "<i4"),
+    ("width", "<i4"),
+    ("channels", "<i4"),
+    ("refcount", "<i4")
+])
+
+@dataclass(frozen=True)
+class FrameSlot:
+    """リング内のフレームの参照（プロセス間ではこれだけを受け渡す）"""
+    slot: int
+    frame_index: int
+    timestamp: float
+    scale: float = 1.0
+
+class SharedFrameRing:
+    """multiprocessing.shared_memory 上の固定スロットのフレームリング
+
+    書き込み側は acquire() で空きスロットを取得して write() でフレームをコピーし、
+    FrameSlot を読み取り側へ送る。読み取り側は view() でスロットをコピーなしの
+    ndarrayとして参照し、使い終わったら release() する。参照カウントが0に
+    なったスロットは空きキューに戻り、再利用される。1フレームを複数の処理
+    （姿勢・ボール・ラケット）に渡す場合は write() の consumers か retain() で
+    参照カウントを増やす。
+
+    リングはプロセスの起動引数として渡すと、子プロセス側で同じ共有メモリに
+    接続される（共有メモリの削除は生成したプロセスのみが行う）。
+    """
+
+    def __init__(self, slots: int, slot_bytes: int, context=None):
+        """
+        Args:
+            slots: スロット数（同時に保持できるフレーム数）
+            slot_bytes: 1スロットのバイト数（格納できるフレームの最大サイズ）
+            context: multiprocessingのコンテキスト（Noneならspawn）
+        """
+        if slots < 1:
+            raise ValueError("slots は1以上を指定してください")
+
+        context = context or multiprocessing.get_context("spawn")
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self._memory = shared_memory.SharedMemory(
+            create=True, size=slots * (_SLOT_HEADER.itemsize + slot_bytes)
+        )
+        self._owner = True
+        self._lock = context.Lock()
+        self._free = context.Queue()
+        self._map()
+
+        self._headers[:] = 0
+        for slot in range(slots):
+            self._free.put(slot)
+
+    def __getstate__(self):
+        # 子プロセスには共有メモリの名前と同期オブジェクトだけを渡す
+        return {
+            "slots": self.slots,
+            "slot_bytes": self.slot_bytes,
+            "name": self._memory.name,
+            "lock": self._lock,
+            "free": self._free
+        }
+
+    def __setstate__(self, state):
+        self.slots = state["slots"]
+        self.slot_bytes = state["slot_bytes"]
+        self._memory = shared_memory.SharedMemory(name=state["name"])
+        self._owner = False
+        self._lock = state["lock"]
+        self._free = state["free"]
+        self._map()
+
+    def __enter__(self) -> "SharedFrameRing":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _map(self):
+        """共有メモリをヘッダー配列とスロット配列に割り当てる"""
+        header_bytes = self.slots * _SLOT_HEADER.itemsize
+        self._headers = np.ndarray((self.slots,), dtype=_SLOT_HEADER, buffer=self._memory.buf)
+        self._buffer = np.ndarray((self.slots, self.slot_bytes), dtype=np.uint8,
+                                  buffer=self._memory.buf, offset=header_bytes)
+
+    def acquire(self, timeout: Optional[float] = None) -> int:
+        """空きスロットを取得（空きがなければ待機し、timeout 秒で TimeoutError）"""
+        try:
+            return self._free.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError("空きスロットがありません") from None
+
+    def write(self, slot: int, frame: np.ndarray, frame_index: int, timestamp: float,
+              scale: float = 1.0, consumers: int = 1) -> FrameSlot:
+        """
+        取得済みのスロットにフレームを書き込む
+
+        Args:
+            slot: acquire() で取得したスロット
+            frame: uint8のフレーム (H, W) または (H, W, C)
+            frame_index: 元動画でのフレーム番号
+            timestamp: フレーム時刻（秒）
+            scale: 元動画に対するフレームの縮小率
+            consumers: このフレームを release() する読み取り側の数（1以上）
+        """
+        if consumers < 1:
+            raise ValueError("consumers は1以上を指定してください")
+        if frame.dtype != np.uint8:
+            raise ValueError("uint8のフレームのみ格納できます")
+        if frame.nbytes > self.slot_bytes:
+            raise ValueError(f"フレーム（{frame.nbytes}バイト）がスロットの容量"
+                             f"（{self.slot_bytes}バイト）を超えています")
+
+        height, width = frame.shape[:2]
+        channels = frame.shape[2] if frame.ndim == 3 else 0
+        np.copyto(self._buffer[slot, :frame.nbytes].reshape(frame.shape), frame)
+        self._headers[slot] = (height, width, channels, consumers)
+        return FrameSlot(slot, frame_index, timestamp, scale)
+
+    def view(self, slot: int) -> np.ndarray:
+        """スロットのフレームをコピーせずに参照（release() 後は書き換えられる）"""
+        height, width, channels, _ = self._headers[slot].tolist()
+        shape = (height, width, channels) if channels else (height, width)
+        size = height * width * max(channels, 1)
+        return self._buffer[slot, :size].reshape(shape)
+
+    def retain(self, slot: int, count: int = 1):
+        """スロットの参照カウントを増やす（フレームを別の処理にも渡す場合）"""
+        with self._lock:
+            self._headers["refcount"][slot] += count
+
+    def release(self, slot: int):
+        """スロットの参照を1つ解放し、参照がなくなれば空きキューに戻す"""
+        with self._lock:
+            refcount = int(self._headers["refcount"][slot]) - 1
+            self._headers["refcount"][slot] = max(refcount, 0)
+        if refcount == 0:
+            self._free.put(slot)
+
+    def close(self):
+        """共有メモリの割り当てを解除（生成したプロセスでは共有メモリも削除）
+
+        view() で得た配列がまだ参照されている場合は割り当てを解除できないため、
+        先に破棄しておくこと。
+        """
+        self._headers = None
+        self._buffer = None
+        try:
+            self._memory.close()
+        except BufferError:
+            # 参照中のビューが残っている場合はプロセス終了時に解放される
+            pass
+        if self._owner:
+            self._memory.unlink()
+            self._owner = False
+
+class ProcessFrameReader:
+    """別プロセスでデコードし、共有メモリのリング経由でフレームを受け取るリーダー
+
+    FrameReader と同じく (フレーム番号, フレーム, 表示時刻) を順に返すが、
+    デコードはspawnした子プロセスで行い、フレームは SharedFrameRing の
+    スロットで受け渡す（プロセス間で送るのはスロット番号と時刻のみ）。
+    イテレーションで返すフレームは共有メモリのビューで、次のフレームを
+    要求した時点でスロットが解放されるため、保持する場合はコピーすること。
+    複数の処理に同じフレームを渡す場合は frame_slots() で FrameSlot を受け取り、
+    ring.retain() / ring.release() で参照を管理する。
+
+    子プロセスでの読み飛ばしは frame_step 間隔のみで、frame_selector で
+    選ばれなかったフレームはデコード後にスロットを解放する。
+    スロットの大きさは親プロセスで先頭フレームをデコードして決める。
+    """
+
+    def __init__(self, source: VideoSource, decoder: str = "auto",
+                 max_resolution: Optional[int] = None, threads: int = 0, slots: int = 8,
+                 frame_step: int = 1, frame_selector: Optional[Callable[[int], bool]] = None,
+                 start_index: int = 0, stop_index: Optional[int] = None):
+        """
+        Args:
+            source: 動画ファイルのパス、バイト列またはファイルライクオブジェクト
+            decoder: 動画デコーダー（"auto"、"pyav"、"opencv"）
+            max_resolution: フレーム長辺の上限
+            threads: デコードスレッド数（PyAVのみ、0は自動）
+            slots: リングのスロット数（先読みするフレーム数）
+            frame_step: デコードするフレームの間隔（それ以外は子プロセスで読み飛ばす）
+            frame_selector: 解析するフレーム番号を選ぶ関数（親プロセスで評価する）
+            start_index: 解析を開始するフレーム（0以外ではシークする）
+            stop_index: 解析を終了するフレーム（このフレームは含まない）
+        """
+        if slots < 1:
+            raise ValueError("slots は1以上を指定してください")
+
+        # ファイルライクオブジェクトは子プロセスに渡せないためバイト列にする
+        if not isinstance(source, (str, bytes, bytearray)):
+            if source.seekable():
+                source.seek(0)
+            source = source.read()
+
+        self.source = source
+        self.decoder = decoder
+        self.max_resolution = max_resolution
+        self.threads = threads
+        self.slots = slots
+        self.frame_step = max(1, frame_step)
+        self.frame_selector = frame_selector
+        self.start_index = start_index
+        self.stop_index = stop_index
+
+        self.ring: Optional[SharedFrameRing] = None
+        self.color_order = "bgr"
+        self.scale = 1.0
+        self._process = None
+        self._messages = None
+        self._stop_event = None
+
+    def start(self) -> "ProcessFrameReader":
+        """先頭フレームでスロットの大きさを決め、デコードプロセスを開始"""
+        if self._process is not None:
+            return self
+
+        frame_bytes, self.color_order, self.scale = _probe_frame(
+            self.source, self.decoder, self.max_resolution
+        )
+        context = multiprocessing.get_context("spawn")
+        self.ring = SharedFrameRing(self.slots, frame_bytes, context)
+        self._messages = context.Queue()
+        self._stop_event = context.Event()
+        self._process = context.Process(
+            target=_decode_into_ring,
+            args=(self.source, self.decoder, self.max_resolution, self.threads, self.ring,
+                  self._messages, self._stop_event, self.frame_step, self.start_index,
+                  self.stop_index),
+            daemon=True
+        )
+        self._process.start()
+        return self
+
+    def stop(self):
+        """デコードプロセスを停止し、リングを破棄"""
+        if self._process is None:
+            return
+
+        self._stop_event.set()
+        # 子プロセスが送信済みのメッセージを受け取り切るまで待つ（未受信のままだと終了できない）
+        while self._process.is_alive() or not self._messages.empty():
+            try:
+                if self._messages.get(timeout=0.1) is None:
+                    break
+            except queue.Empty:
+                continue
+        self._process.join()
+        self._process = None
+        self.ring.close()
+        self.ring = None
+
+    def __enter__(self) -> "ProcessFrameReader":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def frame_slots(self) -> Iterator[FrameSlot]:
+        """選ばれたフレームの FrameSlot を順に返す（解放は呼び出し側で行う）"""
+        self.start()
+
+        while True:
+            message = self._messages.get()
+            if message is None:
+                break
+            if isinstance(message, BaseException):
+                raise message
+
+            if self.frame_selector is not None and not self.frame_selector(message.frame_index):
+                self.ring.release(message.slot)
+                continue
+            yield message
+
+    def __iter__(self) -> Iterator[Tuple[int, np.ndarray, float]]:
+        """(フレーム番号, フレーム, 表示時刻) を順に返す"""
+        previous = None
+        try:
+            for frame_slot in self.frame_slots():
+                if previous is not None:
+                    self.ring.release(previous)
+                previous = frame_slot.slot
+                yield frame_slot.frame_index, self.ring.view(frame_slot.slot), frame_slot.timestamp
+        finally:
+            if previous is not None and self.ring is not None:
+                self.ring.release(previous)
+
+def _probe_frame(source: VideoSource, decoder: str,
+                 max_resolution: Optional[int]) -> Tuple[int, str, float]:
+    """先頭フレームをデコードし、(フレームのバイト数, 色順, 縮小率) を返す"""
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    with open_decoder(source, decoder, max_resolution) as video:
+        decoded = video.read()
+        if decoded is None:
+            raise ValueError("動画からフレームを読み込めません")
+        return decoded[0].nbytes, video.color_order, video.scale
+
+def _decode_into_ring(source: VideoSource, decoder: str, max_resolution: Optional[int],
+                      threads: int, ring: SharedFrameRing, messages, stop_event,
+                      frame_step: int, start_index: int, stop_index: Optional[int]):
+    """デコードプロセス本体（フレームをリングに書き込み、FrameSlot を送る）"""
+    try:
+        with open_decoder(source, decoder, max_resolution, threads) as video:
+            frame_index = video.seek(start_index) if start_index > 0 else 0
+            while not stop_event.is_set():
+                if stop_index is not None and frame_index >= stop_index:
+                    break
+
+                if frame_index % frame_step != 0:
+                    if not video.grab():
+                        break
+                    frame_index += 1
+                    continue
+
+                decoded = video.read()
+                if decoded is None:
+                    break
+
+                # 空きスロットを待つ間も停止要求を確認する
+                slot = None
+                while slot is None and not stop_event.is_set():
+                    try:
+                        slot = ring.acquire(timeout=0.1)
+                    except TimeoutError:
+                        continue
+                if slot is None:
+                    break
+
+                frame, timestamp = decoded
+                messages.put(ring.write(slot, frame, frame_index, timestamp, video.scale))
+                frame_index += 1
+    except Exception as e:
+        messages.put(e)
+    finally:
+        messages.put(None)
+        ring.close()
@@ -0,0 +1,199 @@
+"""
+追跡器レジストリ
+ボール・ラケットそれぞれに追跡方式（OpenCV追跡器、オプティカルフロー、検出のみなど）を選択できるようにする
+"""
+
+from typing import Callable, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .ball_detection import BallDetector
+from .ball_tracking import BallTracker
+from .frame_normalizer import frame_view
+from .racket_detection import RacketDetector
+
+# 検出関数: (フレーム, 色順, ランドマーク) → ((x, y), (x, y, w, h)) または未検出時None
+DetectFunction = Callable[[np.ndarray, str, Optional[np.ndarray]],
+                          Optional[Tuple[Tuple[float, float], Tuple[int, int, int, int]]]]
+
+# 選択可能な追跡方式
+BALL_TRACKERS = ("kalman", "detector", "csrt", "kcf", "mosse", "lk")
+RACKET_TRACKERS = ("detector", "csrt", "kcf", "mosse", "lk")
+
+# OpenCV追跡器の生成関数名
+_OPENCV_TRACKERS = {
+    "csrt": "TrackerCSRT_create",
+    "kcf": "TrackerKCF_create",
+    "mosse": "TrackerMOSSE_create"
+}
+
+class ObjectTracker:
+    """追跡器の基底クラス
+
+    update() は1フレームごとに呼び出し、対象の中心 (x, y) または
+    見失った場合はNoneを返す。frame はndarrayまたはNormalizedFrame。
+    """
+
+    def __init__(self, detect: DetectFunction):
+        self.detect = detect
+
+    def update(self, frame: np.ndarray, timestamp: float, color_order: str = "bgr",
+               landmarks: Optional[np.ndarray] = None) -> Optional[Tuple[float, float]]:
+        raise NotImplementedError
+
+    def reset(self):
+        """追跡状態を初期化（次のフレームで検出し直す）"""
+
+class DetectionOnlyTracker(ObjectTracker):
+    """追跡を行わず、毎フレーム検出する"""
+
+    def update(self, frame: np.ndarray, timestamp: float, color_order: str = "bgr",
+               landmarks: Optional[np.ndarray] = None) -> Optional[Tuple[float, float]]:
+        detection = self.detect(frame, color_order, landmarks)
+        return detection[0] if detection is not None else None
+
+class OpenCVObjectTracker(ObjectTracker):
+    """OpenCVの矩形追跡器（CSRT・KCF・MOSSE）
+
+    検出結果の矩形で追跡器を初期化し、追跡に失敗した次のフレームで検出し直す。
+    """
+
+    def __init__(self, detect: DetectFunction, tracker_type: str):
+        super().__init__(detect)
+        self.tracker_type = tracker_type
+        self._tracker = None
+
+    def update(self, frame: np.ndarray, timestamp: float, color_order: str = "bgr",
+               landmarks: Optional[np.ndarray] = None) -> Optional[Tuple[float, float]]:
+        if self._tracker is not None:
+            success, bbox = self._tracker.update(frame_view(frame, color_order, color_order))
+            if success:
+                x, y, w, h = bbox
+                return (x + w / 2, y + h / 2)
+            self._tracker = None
+            return None
+
+        detection = self.detect(frame, color_order, landmarks)
+        if detection is None:
+            return None
+
+        bbox = _clip_bbox(detection[1], frame)
+        if bbox is not None:
+            self._tracker = create_opencv_tracker(self.tracker_type)
+            self._tracker.init(frame_view(frame, color_order, color_order), bbox)
+        return detection[0]
+
+    def reset(self):
+        self._tracker = None
+
+class OpticalFlowTracker(ObjectTracker):
+    """Lucas-Kanade法のオプティカルフローで中心点を追跡
+
+    フローの推定に失敗するか誤差が max_error を超えた場合は見失ったとみなし、
+    次のフレームで検出し直す。
+    """
+
+    def __init__(self, detect: DetectFunction, window_size: int = 21, max_error: float = 30.0):
+        super().__init__(detect)
+        self.window_size = window_size
+        self.max_error = max_error
+        self._point: Optional[np.ndarray] = None
+        self._previous: Optional[np.ndarray] = None
+
+    def update(self, frame: np.ndarray, timestamp: float, color_order: str = "bgr",
+               landmarks: Optional[np.ndarray] = None) -> Optional[Tuple[float, float]]:
+        gray = frame_view(frame, color_order, "gray")
+        previous, self._previous = self._previous, gray
+
+        if self._point is not None:
+            point, status, error = cv2.calcOpticalFlowPyrLK(
+                previous, gray, self._point, None,
+                winSize=(self.window_size, self.window_size), maxLevel=3
+            )
+            if status[0, 0] and error[0, 0] <= self.max_error:
+                self._point = point
+                return (float(point[0, 0, 0]), float(point[0, 0, 1]))
+            self._point = None
+            return None
+
+        detection = self.detect(frame, color_order, landmarks)
+        if detection is None:
+            return None
+        self._point = np.array([[detection[0]]], dtype=np.float32)
+        return detection[0]
+
+    def reset(self):
+        self._point = None
+        self._previous = None
+
+def create_opencv_tracker(tracker_type: str):
+    """OpenCVの矩形追跡器を生成"""
+    factory_name = _OPENCV_TRACKERS.get(tracker_type)
+    if factory_name is None:
+        raise ValueError(f"未知の追跡器です: {tracker_type}")
+
+    # OpenCVのバージョンによってはlegacyモジュールにのみ存在する
+    factory = getattr(cv2, factory_name, None)
+    if factory is None and hasattr(cv2, "legacy"):
+        factory = getattr(cv2.legacy, factory_name, None)
+    if factory is None:
+        raise ValueError(f"このOpenCVでは追跡器 {tracker_type} を利用できません"
+                         "（opencv-contrib-pythonが必要です）")
+    return factory()
+
+def create_ball_tracker(name: str, detector: BallDetector, **kalman_options):
+    """
+    ボール追跡器を生成
+
+    Args:
+        name: BALL_TRACKERS のいずれか（"kalman" はカルマンフィルタ予測による探索窓）
+        detector: ボール検出器
+        **kalman_options: "kalman" の場合のBallTrackerの引数
+    """
+    if name == "kalman":
+        return BallTracker(detector, **kalman_options)
+
+    def detect(frame, color_order, landmarks):
+        candidates = detector.detect(frame, color_order, max_candidates=1)
+        if not candidates:
+            return None
+        return (candidates[0].x, candidates[0].y), candidates[0].bbox()
+
+    return _create_tracker(name, detect, BALL_TRACKERS)
+
+def create_racket_tracker(name: str, detector: RacketDetector) -> ObjectTracker:
+    """
+    ラケット追跡器を生成
+
+    Args:
+        name: RACKET_TRACKERS のいずれか（"detector" は毎フレーム前腕の延長上で検出）
+        detector: ラケット検出器
+    """
+    def detect(frame, color_order, landmarks):
+        detection = detector.detect(frame, landmarks, color_order)
+        if detection is None:
+            return None
+        return (detection.x, detection.y), detection.bbox
+
+    return _create_tracker(name, detect, RACKET_TRACKERS)
+
+def _create_tracker(name: str, detect: DetectFunction, available: Tuple[str, ...]) -> ObjectTracker:
+    """検出関数を使う汎用の追跡器を生成"""
+    if name not in available:
+        raise ValueError(f"未知の追跡器です: {name}（{', '.join(available)}）")
+    if name == "detector":
+        return DetectionOnlyTracker(detect)
+    if name == "lk":
+        return OpticalFlowTracker(detect)
+    return OpenCVObjectTracker(detect, name)
+
+def _clip_bbox(bbox: Tuple[int, int, int, int], frame: np.ndarray) -> Optional[Tuple[int, int, int, int]]:
+    """矩形をフレーム内に収める（面積がなくなればNone）"""
+    frame_h, frame_w = frame.shape[:2]
+    x, y, w, h = bbox
+    x0, y0 = max(0, int(x)), max(0, int(y))
+    x1, y1 = min(frame_w, int(x + w)), min(frame_h, int(y + h))
+    if x1 - x0 < 2 or y1 - y0 < 2:
+        return None
+    return (x0, y0, x1 - x0, y1 - y0)
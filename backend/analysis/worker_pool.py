@@ -0,0 +1,260 @@
+"""
+姿勢推定ワーカーのプロセスプール
+各ワーカープロセスが初期化済みの解析エンジンを保持し、空いているワーカーに解析ジョブを割り当てる
+"""
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+import threading
+from functools import partial
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Union
+
+if TYPE_CHECKING:
+    from .decoders import VideoSource
+    from .kinovea_engine import FrameObservation, QualityProfile, SoftTennisKinoveaEngine
+
+# ワーカープロセス内で保持する解析エンジン（プロファイル→エンジン）
+_worker_engines: Dict["QualityProfile", "SoftTennisKinoveaEngine"] = {}
+
+# ワーカープロセス内でエンジンを生成する際の引数（プロファイル以外）
+_worker_engine_options: Dict = {}
+
+# スレッド数を制御する環境変数（ネイティブライブラリの読み込み前に設定する必要がある）
+_THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "TF_NUM_INTRAOP_THREADS",
+    "TF_NUM_INTEROP_THREADS"
+)
+
+def _init_worker(profiles: Iterable[str], threads_per_worker: Optional[int],
+                 engine_options: Dict):
+    """ワーカープロセスの初期化（スレッド数設定と指定プロファイルのエンジンの事前生成）
+
+    profiles 以外のプロファイルのエンジンは、そのプロファイルの解析を最初に
+    実行するときに生成する（ワーカー数×プロファイル数のモデル読み込みを避ける）。
+    engine_options は組み込み型の値のみとし、ネイティブライブラリを読み込む
+    オブジェクト（フレームキャッシュなど）はスレッド数の設定後にここで生成する。
+    """
+    if threads_per_worker:
+        for name in _THREAD_ENV_VARS:
+            os.environ[name] = str(threads_per_worker)
+
+    # OpenCV・MediaPipe・ONNX Runtimeはスレッド数の設定後に読み込む
+    import cv2
+
+    if threads_per_worker:
+        cv2.setNumThreads(threads_per_worker)
+
+    _worker_engine_options.update(_build_engine_options(engine_options))
+
+    for profile in profiles:
+        _get_worker_engine(profile)
+
+def _build_engine_options(options: Dict) -> Dict:
+    """プールの設定値からエンジンの引数を作成（キャッシュの設定はFrameCacheにする）"""
+    options = dict(options)
+    cache_dir = options.pop("frame_cache_dir", None)
+    cache_bytes = options.pop("frame_cache_bytes", None)
+    if cache_dir:
+        from .frame_cache import FrameCache
+        options["frame_cache"] = FrameCache(cache_dir, cache_bytes)
+    return options
+
+def _get_worker_engine(profile: Union[str, "QualityProfile"]) -> "SoftTennisKinoveaEngine":
+    """ワーカープロセス内のエンジンを取得（未生成なら生成）"""
+    from .kinovea_engine import SoftTennisKinoveaEngine, get_quality_profile
+
+    profile = get_quality_profile(profile)
+    engine = _worker_engines.get(profile)
+    if engine is None:
+        engine = SoftTennisKinoveaEngine(profile=profile, **_worker_engine_options)
+        _worker_engines[profile] = engine
+    return engine
+
+def _run_analysis(source: "VideoSource", angle, profile: str, adaptive_sampling: bool):
+    """ワーカープロセスで動画解析を実行"""
+    engine = _get_worker_engine(profile)
+    return engine.analyze_video(source, angle, adaptive_sampling=adaptive_sampling)
+
+def _run_chunk(source: "VideoSource", profile: Union[str, "QualityProfile"], warmup_start: int,
+               start: int, stop: Optional[int]) -> List["FrameObservation"]:
+    """ワーカープロセスで動画の一部フレーム区間を解析"""
+    engine = _get_worker_engine(profile)
+    return engine.analyze_frame_range(source, warmup_start, start, stop)
+
+def _ping() -> int:
+    """ワーカー起動確認用"""
+    return os.getpid()
+
+class AnalysisWorkerPool:
+    """初期化済み解析エンジンを持つワーカープロセスのプール
+
+    各ワーカーは独立した姿勢推定バックエンドと追跡器を持つため、
+    解析はワーカー数まで並列に実行される。
+    """
+
+    def __init__(self, num_workers: Optional[int] = None,
+                 threads_per_worker: Optional[int] = 1,
+                 profiles: Optional[Iterable[str]] = None,
+                 max_chunks: int = 1, pose_backend: str = "mediapipe",
+                 pose_options: Optional[Dict] = None, ball_tracker: Optional[str] = None,
+                 racket_tracker: Optional[str] = None, target_fps: Optional[float] = None,
+                 frame_cache_dir: Optional[str] = None,
+                 frame_cache_bytes: int = 8 * 1024 ** 3, pipeline_depth: int = 0):
+        """
+        Args:
+            num_workers: ワーカープロセス数（Noneの場合はCPUコア数）
+            threads_per_worker: ワーカーごとのネイティブスレッド数（Noneなら各ライブラリの既定値）
+            profiles: 各ワーカーで起動時に生成する品質プロファイル名（Noneなら
+                事前生成せず、各プロファイルの初回の解析時に生成する）
+            max_chunks: 1本の動画を分割して並列解析する最大チャンク数
+            pose_backend: 姿勢推定バックエンド（"mediapipe" または "onnx"）
+            pose_options: バックエンドのコンストラクタ引数
+            ball_tracker: ボール追跡方式（Noneなら各プロファイルの設定）
+            racket_tracker: ラケット追跡方式（Noneなら各プロファイルの設定）
+            target_fps: 解析フレームレートの上限（Noneなら各プロファイルの設定）
+            frame_cache_dir: 全ワーカーで共有するデコード済みフレームのキャッシュの
+                ディレクトリ（Noneならキャッシュしない）
+            frame_cache_bytes: キャッシュのディスク使用量の上限（バイト）
+            pipeline_depth: 姿勢・ボール・ラケットの段を並行実行する際の処理中フレーム数
+                （0なら順に実行）
+        """
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.threads_per_worker = threads_per_worker
+        self.profiles = list(profiles or [])
+        self.max_chunks = max(1, max_chunks)
+
+        # デコードとONNX推論のスレッド数もワーカーごとのスレッド数に揃える
+        pose_options = dict(pose_options or {})
+        if pose_backend == "onnx":
+            pose_options.setdefault("intra_op_threads", threads_per_worker or 0)
+        engine_options = {
+            "decoder_threads": threads_per_worker or 0,
+            "pose_backend": pose_backend,
+            "pose_options": pose_options,
+            "ball_tracker": ball_tracker,
+            "racket_tracker": racket_tracker,
+            "target_fps": target_fps,
+            "frame_cache_dir": frame_cache_dir,
+            "frame_cache_bytes": frame_cache_bytes,
+            "pipeline_depth": pipeline_depth
+        }
+        self._engine_options = engine_options
+
+        # 実行中の解析数（空きワーカー数の目安として分割数の決定に使う）
+        self._active = 0
+        self._lock = threading.Lock()
+        # チャンクの割り当てと結果の結合のみを行うエンジン（Poseグラフは持たない）
+        self._coordinators: Dict[str, "SoftTennisKinoveaEngine"] = {}
+
+        # MediaPipeのグラフはfork後に安全に使えないためspawnで起動する
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.num_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.profiles, self.threads_per_worker, engine_options)
+        )
+
+    @classmethod
+    def from_env(cls) -> "AnalysisWorkerPool":
+        """環境変数から設定を読み込んでプールを生成
+
+        ANALYSIS_WORKERS: ワーカープロセス数
+        ANALYSIS_WORKER_THREADS: ワーカーごとのスレッド数
+        ANALYSIS_PRELOAD_PROFILES: 起動時に生成するプロファイル（カンマ区切り、未指定なら初回の解析時に生成）
+        ANALYSIS_MAX_CHUNKS: 1本の動画を分割する最大チャンク数
+        ANALYSIS_POSE_BACKEND: 姿勢推定バックエンド（mediapipe / onnx）
+        ANALYSIS_POSE_MODEL: ONNXバックエンドのモデルパス
+        ANALYSIS_POSE_INT8: 1の場合はint8量子化モデルを使う
+        ANALYSIS_BALL_TRACKER: ボール追跡方式（未指定ならプロファイルの設定）
+        ANALYSIS_RACKET_TRACKER: ラケット追跡方式（未指定ならプロファイルの設定）
+        ANALYSIS_TARGET_FPS: 解析フレームレートの上限（未指定ならプロファイルの設定）
+        ANALYSIS_FRAME_CACHE_DIR: デコード済みフレームのキャッシュディレクトリ（未指定なら無効）
+        ANALYSIS_FRAME_CACHE_MB: キャッシュのディスク使用量の上限（MB）
+        ANALYSIS_PIPELINE_DEPTH: 段を並行実行する際の処理中フレーム数（0なら順に実行）
+        """
+        num_workers = int(os.getenv("ANALYSIS_WORKERS", "0")) or None
+        threads = int(os.getenv("ANALYSIS_WORKER_THREADS", "1")) or None
+        profiles = os.getenv("ANALYSIS_PRELOAD_PROFILES")
+        profile_list = [p.strip() for p in profiles.split(",") if p.strip()] if profiles else None
+        max_chunks = int(os.getenv("ANALYSIS_MAX_CHUNKS", "1"))
+        pose_backend = os.getenv("ANALYSIS_POSE_BACKEND", "mediapipe")
+        pose_options = {}
+        if pose_backend == "onnx":
+            pose_options["model_path"] = os.environ["ANALYSIS_POSE_MODEL"]
+            pose_options["int8"] = os.getenv("ANALYSIS_POSE_INT8", "0") == "1"
+        return cls(num_workers=num_workers, threads_per_worker=threads,
+                   profiles=profile_list, max_chunks=max_chunks,
+                   pose_backend=pose_backend, pose_options=pose_options,
+                   ball_tracker=os.getenv("ANALYSIS_BALL_TRACKER") or None,
+                   racket_tracker=os.getenv("ANALYSIS_RACKET_TRACKER") or None,
+                   target_fps=float(os.getenv("ANALYSIS_TARGET_FPS", "0")) or None,
+                   frame_cache_dir=os.getenv("ANALYSIS_FRAME_CACHE_DIR") or None,
+                   frame_cache_bytes=int(os.getenv("ANALYSIS_FRAME_CACHE_MB", "8192")) * 1024 ** 2,
+                   pipeline_depth=int(os.getenv("ANALYSIS_PIPELINE_DEPTH", "0")))
+
+    def warm_up(self):
+        """全ワーカーを起動しておく（profiles のエンジンは起動時に生成される）"""
+        # 空きワーカーがない状態で連続投入すると、その都度ワーカーが起動する
+        futures = [self._executor.submit(_ping) for _ in range(self.num_workers)]
+        for future in futures:
+            future.result()
+
+    def submit(self, source: "VideoSource", angle, profile: str = "balanced",
+               adaptive_sampling: bool = False) -> Future:
+        """解析ジョブを投入（空いているワーカーで実行される）"""
+        return self._executor.submit(_run_analysis, source, angle, profile, adaptive_sampling)
+
+    async def analyze(self, source: "VideoSource", angle, profile: str = "balanced",
+                      adaptive_sampling: bool = False, chunks: Optional[int] = None):
+        """
+        解析ジョブを投入し、完了まで非同期に待機
+        
+        chunks を省略した場合は空いているワーカー数（最大 max_chunks）に
+        応じて動画を分割し、複数のワーカーで並列に解析する。
+        source はワーカープロセスに渡すため、パスまたはバイト列を指定する。
+        """
+        if chunks is None:
+            chunks = 1 if adaptive_sampling else self._idle_chunks()
+
+        with self._lock:
+            self._active += chunks
+        try:
+            if chunks > 1:
+                # チャンクの投入と結合はこのプロセスのスレッドで行う
+                engine = self._get_coordinator(profile)
+                run = partial(engine.analyze_video, source, angle,
+                              chunks=chunks, executor=self._executor)
+                return await asyncio.get_running_loop().run_in_executor(None, run)
+
+            future = self.submit(source, angle, profile, adaptive_sampling)
+            return await asyncio.wrap_future(future)
+        finally:
+            with self._lock:
+                self._active -= chunks
+
+    def _idle_chunks(self) -> int:
+        """空いているワーカー数から分割数を決定"""
+        with self._lock:
+            idle = self.num_workers - self._active
+        return max(1, min(self.max_chunks, idle))
+
+    def _get_coordinator(self, profile: str) -> "SoftTennisKinoveaEngine":
+        """チャンク分割・結合用のエンジンを取得（ワーカーと同じ設定で生成する）"""
+        from .kinovea_engine import SoftTennisKinoveaEngine
+
+        with self._lock:
+            engine = self._coordinators.get(profile)
+            if engine is None:
+                engine = SoftTennisKinoveaEngine(profile=profile, preload_pose=False,
+                                                 **_build_engine_options(self._engine_options))
+                self._coordinators[profile] = engine
+        return engine
+
+    def shutdown(self, wait: bool = True):
+        """ワーカープロセスを終了"""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
@@ -6,9 +6,9 @@ FastAPIベースのREST API
 from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+import asyncio
 import uuid
 import os
-import tempfile
 from typing import Optional
 import logging
 
@@ -18,7 +18,8 @@ from .models import (
     TrainingMenuResponse,
     ProgressResponse
 )
-from ..analysis.kinovea_engine import SoftTennisKinoveaEngine, AnalysisAngle
+from ..analysis.kinovea_engine import AnalysisAngle, QUALITY_PROFILES
+from ..analysis.worker_pool import AnalysisWorkerPool
 from ..ai_coach.form_analyzer import SoftTennisFormAnalyzer
 from ..ai_coach.training_generator import TrainingMenuGenerator
 from ..database.progress_manager import ProgressManager
@@ -44,11 +45,24 @@ app.add_middleware(
 )
 
 # コンポーネント初期化
-kinovea_engine = SoftTennisKinoveaEngine()
+# 解析は初期化済みエンジンを持つワーカープロセスで並列実行する
+DEFAULT_QUALITY_PROFILE = os.getenv("DEFAULT_QUALITY_PROFILE", "balanced")
+analysis_pool = AnalysisWorkerPool.from_env()
 form_analyzer = SoftTennisFormAnalyzer()
 training_generator = TrainingMenuGenerator()
 progress_manager = ProgressManager()
 
+@app.on_event("startup")
+async def start_analysis_workers():
+    """解析ワーカーを起動してエンジンを初期化"""
+    await asyncio.get_running_loop().run_in_executor(None, analysis_pool.warm_up)
+    logger.info(f"解析ワーカー起動完了: workers={analysis_pool.num_workers}")
+
+@app.on_event("shutdown")
+async def stop_analysis_workers():
+    """解析ワーカーを終了"""
+    analysis_pool.shutdown(wait=False)
+
 @app.get("/")
 async def root():
     """ヘルスチェック"""
@@ -59,7 +73,8 @@ async def analyze_video(
     background_tasks: BackgroundTasks,
     video: UploadFile = File(...),
     angle: str = "side",  # "front" or "side"
-    user_id: Optional[str] = None
+    user_id: Optional[str] = None,
+    quality: Optional[str] = None  # "fast", "balanced", "accurate"
 ):
     """
     動画解析エンドポイント
@@ -68,6 +83,7 @@ async def analyze_video(
         video: アップロードされた動画ファイル
         angle: 撮影角度 ("front" または "side")
         user_id: ユーザーID（進捗追跡用）
+        quality: 解析品質プロファイル（省略時は DEFAULT_QUALITY_PROFILE）
     
     Returns:
         VideoAnalysisResponse: 解析結果
@@ -80,6 +96,13 @@ async def analyze_video(
     if angle not in ["front", "side"]:
         raise HTTPException(status_code=400, detail="角度は 'front' または 'side' を指定してください")
     
+    quality = quality or DEFAULT_QUALITY_PROFILE
+    if quality not in QUALITY_PROFILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"品質プロファイルは {', '.join(QUALITY_PROFILES)} のいずれかを指定してください"
+        )
+    
     # 動画の長さチェック（実装簡略化）
     file_size = 0
     content = await video.read()
@@ -93,16 +116,12 @@ async def analyze_video(
     session_id = str(uuid.uuid4())
     
     try:
-        # 一時ファイルに保存
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as temp_file:
-            temp_file.write(content)
-            temp_video_path = temp_file.name
-        
-        logger.info(f"動画解析開始: session_id={session_id}, angle={angle}")
+        logger.info(f"動画解析開始: session_id={session_id}, angle={angle}, quality={quality}")
         
         # 解析実行
         analysis_angle = AnalysisAngle.FRONT if angle == "front" else AnalysisAngle.SIDE
-        kinovea_result = kinovea_engine.analyze_video(temp_video_path, analysis_angle)
+        # アップロード内容はディスクに書き出さず、メモリ上のままデコードする
+        kinovea_result = await analysis_pool.analyze(content, analysis_angle, quality)
         
         # フォーム分析
         form_report = form_analyzer.analyze_form(kinovea_result, analysis_angle)
@@ -133,7 +152,8 @@ async def analyze_video(
                 for point in form_report.improvement_points
             ],
             recommended_training=form_report.recommended_training,
-            analysis_angle=angle
+            analysis_angle=angle,
+            quality_profile=quality
         )
         
         # バックグラウンドで進捗保存
@@ -146,21 +166,12 @@ async def analyze_video(
                 angle
             )
         
-        # 一時ファイル削除
-        background_tasks.add_task(cleanup_temp_file, temp_video_path)
-        
         logger.info(f"動画解析完了: session_id={session_id}, score={form_report.overall_score:.1f}")
         
         return response
         
     except Exception as e:
         logger.error(f"動画解析エラー: {str(e)}")
-        # 一時ファイルが残っている場合は削除
-        if 'temp_video_path' in locals():
-            try:
-                os.unlink(temp_video_path)
-            except:
-                pass
         raise HTTPException(status_code=500, detail=f"解析中にエラーが発生しました: {str(e)}")
 
 @app.get("/training/menu", response_model=TrainingMenuResponse)
@@ -280,15 +291,6 @@ async def save_analysis_progress(user_id: str, session_id: str, score: float, an
     except Exception as e:
         logger.error(f"進捗保存エラー: {str(e)}")
 
-async def cleanup_temp_file(file_path: str):
-    """一時ファイル削除"""
-    try:
-        if os.path.exists(file_path):
-            os.unlink(file_path)
-            logger.info(f"一時ファイル削除: {file_path}")
-    except Exception as e:
-        logger.error(f"一時ファイル削除エラー: {str(e)}")
-
 # エラーハンドラー
 @app.exception_handler(Exception)
 async def general_exception_handler(request, exc):
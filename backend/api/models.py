@@ -37,6 +37,7 @@ class VideoAnalysisResponse(BaseModel):
     improvement_points: List[ImprovementPoint] = Field(default_factory=list, description="改善ポイント")
     recommended_training: List[str] = Field(default_factory=list, description="推奨トレーニング")
     analysis_angle: str = Field(..., description="解析角度")
+    quality_profile: Optional[str] = Field(None, description="解析品質プロファイル")
     analysis_date: datetime = Field(default_factory=datetime.now, description="解析日時")
 
 class Exercise(BaseModel):
@@ -9,6 +9,12 @@ export PYTHONPATH="${PYTHONPATH}:/app"
 export ENVIRONMENT=${ENVIRONMENT:-development}
 export LOG_LEVEL=${LOG_LEVEL:-info}
 
+# 解析ワーカー設定（並列度はuvicornワーカー数ではなく解析プロセス数で調整する）
+export ANALYSIS_WORKERS=${ANALYSIS_WORKERS:-$(nproc)}
+export ANALYSIS_WORKER_THREADS=${ANALYSIS_WORKER_THREADS:-1}
+export ANALYSIS_MAX_CHUNKS=${ANALYSIS_MAX_CHUNKS:-4}
+export ANALYSIS_POSE_BACKEND=${ANALYSIS_POSE_BACKEND:-mediapipe}
+
 # データディレクトリの作成
 mkdir -p /app/uploads
 mkdir -p /app/data
@@ -46,7 +52,7 @@ if [ "$ENVIRONMENT" = "production" ]; then
     exec uvicorn api.main:app \
         --host 0.0.0.0 \
         --port 8000 \
-        --workers 4 \
+        --workers ${UVICORN_WORKERS:-1} \
         --log-level $LOG_LEVEL \
         --access-log \
         --log-config logging.conf
@@ -0,0 +1,65 @@
+"""
+ボール検出のテスト
+"""
+
+import cv2
+import numpy as np
+
+from backend.analysis.ball_detection import BallDetector
+
+_SEARCH_WINDOW = (200, 200, 400, 400)
+
+def _detector() -> BallDetector:
+    return BallDetector(np.array([0, 100, 100]), np.array([10, 255, 255]),
+                        background_subtraction=True)
+
+def _frame(*balls) -> np.ndarray:
+    frame = np.full((720, 1280, 3), 60, dtype=np.uint8)
+    cv2.circle(frame, (300, 300), 10, (0, 0, 255), -1)  # 静止している赤い物体
+    for center in balls:
+        cv2.circle(frame, center, 10, (0, 0, 255), -1)
+    return frame
+
+def _centers(candidates):
+    return [(round(c.x), round(c.y)) for c in candidates]
+
+def test_background_is_learned_from_search_window_detections():
+    detector = _detector()
+    # 探索窓での検出だけでも背景モデルが更新され、静止物体は候補から外れる
+    for _ in range(60):
+        candidates = detector.detect(_frame(), roi=_SEARCH_WINDOW)
+    assert candidates == []
+
+    assert _centers(detector.detect(_frame((450, 450)), roi=_SEARCH_WINDOW)) == [(450, 450)]
+
+def test_background_is_updated_once_per_frame():
+    detector = _detector()
+    applied = []
+    background = detector._background
+
+    class _CountingBackground:
+        def apply(self, image):
+            applied.append(image.shape)
+            return background.apply(image)
+
+    detector._background = _CountingBackground()
+    frame = _frame((450, 450))
+    # 探索窓で見失ってフレーム全体で再検出しても、背景モデルの更新は1回
+    detector.detect(frame, roi=_SEARCH_WINDOW)
+    assert _centers(detector.detect(frame)) != []
+    detector.detect(_frame())
+
+    # 背景モデルは縮小したフレーム全体で更新する
+    assert applied == [(360, 640, 3), (360, 640, 3)]
+
+def test_disk_ranks_above_square():
+    detector = BallDetector(np.array([0, 100, 100]), np.array([10, 255, 255]))
+    frame = np.full((200, 300, 3), 60, dtype=np.uint8)
+    cv2.rectangle(frame, (40, 40), (60, 60), (0, 0, 255), -1)  # 21x21の正方形
+    cv2.circle(frame, (200, 100), 10, (0, 0, 255), -1)
+
+    candidates = detector.detect(frame)
+
+    assert _centers(candidates)[0] == (200, 100)
+    square = next(c for c in candidates if (round(c.x), round(c.y)) == (50, 50))
+    assert square.circularity < 0.8 < candidates[0].circularity <= 1.0
@@ -0,0 +1,68 @@
+"""
+カルマンフィルタによるボール追跡のテスト
+"""
+
+import numpy as np
+
+from backend.analysis.ball_detection import BallCandidate
+from backend.analysis.ball_tracking import BallTracker
+
+class _ScriptedDetector:
+    """全フレーム検出の結果を指定でき、呼び出された探索領域を記録する検出器"""
+
+    def __init__(self):
+        self.full_frame: list = []
+        self.calls: list = []
+
+    def detect(self, frame, color_order="bgr", roi=None, max_candidates=5):
+        self.calls.append(roi)
+        if roi is None and self.full_frame:
+            return [self.full_frame.pop(0)]
+        return []
+
+def _candidate(x: float, y: float) -> BallCandidate:
+    return BallCandidate(x=x, y=y, radius=5.0, area=78, circularity=1.0, score=1.0)
+
+def _track(tracker: BallTracker, frames: int, start: int = 0):
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    return [tracker.update(frame, (start + index) / 30) for index in range(frames)]
+
+def test_redetects_full_frame_after_misses_and_resets_when_lost():
+    detector = _ScriptedDetector()
+    detector.full_frame.append(_candidate(100, 100))
+    tracker = BallTracker(detector, redetect_after=3, lost_after=6)
+
+    assert _track(tracker, 1) == [(100, 100)]
+    assert tracker.active
+
+    detector.calls.clear()
+    assert _track(tracker, 6, start=1) == [None] * 6
+
+    full = [roi is None for roi in detector.calls]
+    # 1〜2回目の見失いは探索窓のみ、3〜5回目は探索窓の後にフレーム全体で再検出、
+    # 6回目で追跡を打ち切る
+    assert full == [False, False, False, True, False, True, False, True, False]
+    assert not tracker.active
+    assert tracker.misses == 0
+
+    # 打ち切り後はフレーム全体での初期検出からやり直す
+    detector.calls.clear()
+    _track(tracker, 1, start=7)
+    assert detector.calls == [None]
+
+def test_full_frame_redetect_restarts_tracking():
+    detector = _ScriptedDetector()
+    detector.full_frame.append(_candidate(100, 100))
+    tracker = BallTracker(detector, redetect_after=2, lost_after=10)
+    _track(tracker, 1)
+
+    detector.full_frame.append(_candidate(400, 300))
+    assert _track(tracker, 2, start=1) == [None, (400, 300)]
+    assert tracker.active
+    assert tracker.misses == 0
+
+    # 再検出した位置の周辺を探索する
+    detector.calls.clear()
+    _track(tracker, 1, start=3)
+    x, y, w, h = detector.calls[0]
+    assert x <= 400 <= x + w and y <= 300 <= y + h
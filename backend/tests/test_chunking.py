@@ -0,0 +1,45 @@
+"""
+分割解析の計画と結合のテスト
+"""
+
+import pytest
+
+from backend.analysis.kinovea_engine import FrameObservation, Point2D, SoftTennisKinoveaEngine
+
+@pytest.fixture
+def engine():
+    return SoftTennisKinoveaEngine("balanced", preload_pose=False, chunk_overlap=15)
+
+def _observation(frame: int, chunk: int) -> FrameObservation:
+    # どのチャンクの結果かを ball_position のx座標に持たせる
+    return FrameObservation(frame=frame, timestamp=frame / 30, landmarks=None,
+                            ball_position=Point2D(chunk, 0), racket_position=None)
+
+def test_short_clip_is_not_split(engine):
+    # 4GOP（4秒）未満のチャンクになる分割はしない
+    assert engine._plan_chunks(200, 30.0, 4) == [(0, 0, None)]
+    assert engine._plan_chunks(1000, 30.0, 1) == [(0, 0, None)]
+
+def test_chunk_boundaries_are_gop_aligned_and_contiguous(engine):
+    plan = engine._plan_chunks(1000, 30.0, 4)
+
+    assert plan == [(0, 0, 270), (240, 270, 540), (510, 540, 810), (780, 810, None)]
+    for (_, _, stop), (_, next_start, _) in zip(plan, plan[1:]):
+        assert stop == next_start
+    for warmup_start, start, _ in plan[1:]:
+        assert start % 30 == 0 and warmup_start % 30 == 0
+        assert start - warmup_start >= engine.chunk_overlap
+
+def test_chunk_count_is_limited_by_clip_length(engine):
+    # 300フレームは120フレーム（4GOP）単位で最大2チャンク
+    assert engine._plan_chunks(300, 30.0, 8) == [(0, 0, 150), (120, 150, None)]
+
+def test_merge_keeps_earlier_chunk_for_overlapping_frames(engine):
+    first = [_observation(frame, 0) for frame in range(0, 12)]
+    second = [_observation(frame, 1) for frame in range(10, 20)]
+
+    merged = engine._merge_chunk_observations([first, second])
+
+    assert [o.frame for o in merged] == list(range(20))
+    assert [o.ball_position.x for o in merged[10:12]] == [0, 0]
+    assert merged[12].ball_position.x == 1
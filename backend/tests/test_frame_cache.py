@@ -0,0 +1,62 @@
+"""
+デコード済みフレームキャッシュのテスト
+"""
+
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from backend.analysis.frame_cache import FrameCache
+
+def _write_video(path: str, frames: int = 6, size=(64, 48)) -> str:
+    """テスト用の小さな動画を作成"""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30.0, size)
+    for index in range(frames):
+        writer.write(np.full((size[1], size[0], 3), index * 20, dtype=np.uint8))
+    writer.release()
+    return path
+
+@pytest.fixture
+def videos(tmp_path):
+    return [_write_video(str(tmp_path / f"clip{index}.avi")) for index in range(3)]
+
+def _keys(cache: FrameCache):
+    return {key for key, _, _ in cache._entries()}
+
+def test_open_builds_entry_once(tmp_path, videos):
+    cache = FrameCache(str(tmp_path / "cache"))
+    clip = cache.open(videos[0], decoder="opencv")
+    assert len(clip) == 6
+    assert clip.frames[0].shape == (48, 64, 3)
+
+    again = cache.open(videos[0], decoder="opencv")
+    assert again.path == clip.path
+    assert len(_keys(cache)) == 1
+
+def test_evicts_least_recently_used_entry(tmp_path, videos):
+    entry_bytes = 6 * 48 * 64 * 3
+    cache = FrameCache(str(tmp_path / "cache"), max_bytes=2 * entry_bytes)
+
+    first = cache.open(videos[0], decoder="opencv")
+    second = cache.open(videos[1], decoder="opencv")
+    # 使用時刻を明示して、最初のエントリを最近使ったことにする
+    os.utime(os.path.join(first.path, "header.json"), (2000, 2000))
+    os.utime(os.path.join(second.path, "header.json"), (1000, 1000))
+
+    third = cache.open(videos[2], decoder="opencv")
+
+    first_key, second_key, third_key = (os.path.basename(clip.path)
+                                        for clip in (first, second, third))
+    assert _keys(cache) == {first_key, third_key}
+    # 削除したエントリのロックファイルも残らない
+    assert not os.path.exists(os.path.join(cache.root, f".{second_key}.lock"))
+    assert os.path.exists(os.path.join(cache.root, f".{third_key}.lock"))
+
+def test_skips_clip_larger_than_budget(tmp_path, videos):
+    cache = FrameCache(str(tmp_path / "cache"), max_bytes=3 * 48 * 64 * 3)
+
+    assert cache.open(videos[0], decoder="opencv") is None
+    # 作成途中の一時ディレクトリやロックファイルを残さない
+    assert os.listdir(cache.root) == []
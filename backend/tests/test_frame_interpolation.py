@@ -0,0 +1,68 @@
+"""
+静止フレームで省略した姿勢の補間のテスト
+"""
+
+import numpy as np
+import pytest
+
+from backend.analysis.kinovea_engine import SoftTennisKinoveaEngine
+
+class _StubPose:
+    """セッションの生成に必要なだけの姿勢推定バックエンド"""
+
+    def estimate(self, image):
+        return None
+
+    def reset(self):
+        pass
+
+@pytest.fixture
+def session():
+    engine = SoftTennisKinoveaEngine("balanced", preload_pose=False)
+    engine._idle_poses.put(_StubPose())
+    with engine.create_session(track_objects=False) as session:
+        yield session
+
+@pytest.fixture
+def frame(session):
+    return session.engine.frame_normalizer.normalize(np.zeros((48, 64, 3), dtype=np.uint8), "bgr")
+
+def _landmarks(value: float) -> np.ndarray:
+    return np.full((33, 4), value, dtype=np.float32)
+
+def _finish(session, frame, index: int, landmarks=None, skip_pose: bool = False):
+    return session.finish_frame(index, frame, index / 10, index == 0, landmarks, skip_pose,
+                                None, None)
+
+def test_static_run_is_interpolated_between_inferences(session, frame):
+    assert [o.frame for o in _finish(session, frame, 0, _landmarks(0.0))] == [0]
+    for index in (1, 2, 3):
+        assert _finish(session, frame, index, skip_pose=True) == []
+
+    ready = _finish(session, frame, 4, _landmarks(1.0))
+
+    assert [o.frame for o in ready] == [1, 2, 3, 4]
+    for observation, expected in zip(ready, (0.25, 0.5, 0.75, 1.0)):
+        np.testing.assert_allclose(observation.landmarks, expected, rtol=1e-6)
+    assert [o.pose_interpolated for o in ready] == [True, True, True, False]
+
+def test_flush_carries_last_pose_forward(session, frame):
+    _finish(session, frame, 0, _landmarks(0.5))
+    _finish(session, frame, 1, skip_pose=True)
+    _finish(session, frame, 2, skip_pose=True)
+
+    ready = session.flush()
+
+    assert [o.frame for o in ready] == [1, 2]
+    for observation in ready:
+        np.testing.assert_allclose(observation.landmarks, 0.5)
+    assert session.flush() == []
+
+def test_missing_pose_after_static_run_keeps_previous_pose(session, frame):
+    _finish(session, frame, 0, _landmarks(0.5))
+    _finish(session, frame, 1, skip_pose=True)
+
+    ready = _finish(session, frame, 2, None)
+
+    np.testing.assert_allclose(ready[0].landmarks, 0.5)
+    assert ready[1].landmarks is None
@@ -0,0 +1,90 @@
+"""
+関節角度の一括計算カーネルのテスト
+"""
+
+import math
+
+import numpy as np
+
+from backend.analysis.joint_angles import ANGLE_DEFINITIONS, compute_joint_angles
+
+def _scalar_angle(a, b, c) -> float:
+    """3点の内角（度）を1組ずつ計算する参照実装"""
+    v1 = (a[0] - b[0], a[1] - b[1])
+    v2 = (c[0] - b[0], c[1] - b[1])
+    cos_angle = (v1[0] * v2[0] + v1[1] * v2[1]) / (math.hypot(*v1) * math.hypot(*v2))
+    return math.degrees(math.acos(max(-1.0, min(1.0, cos_angle))))
+
+def _landmarks(frames: int = 20, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    landmarks = rng.uniform(0.0, 1.0, size=(frames, 33, 4)).astype(np.float32)
+    landmarks[:, :, 3] = 1.0
+    return landmarks
+
+def test_batched_triplet_angles_match_scalar_formula():
+    landmarks = _landmarks()
+    valid = np.ones(len(landmarks), dtype=bool)
+
+    results = compute_joint_angles(landmarks, valid, ["elbow_angle", "shoulder_angle", "knee_angle"])
+
+    for t, frame in enumerate(landmarks):
+        elbow = _scalar_angle(frame[12], frame[14], frame[16])
+        shoulder = _scalar_angle(frame[14], frame[12], frame[24])
+        knee = 180.0 - (_scalar_angle(frame[23], frame[25], frame[27]) +
+                        _scalar_angle(frame[24], frame[26], frame[28])) / 2
+        assert math.isclose(results["elbow_angle"][0][t], elbow, abs_tol=1e-3)
+        assert math.isclose(results["shoulder_angle"][0][t], shoulder, abs_tol=1e-3)
+        assert math.isclose(results["knee_angle"][0][t], knee, abs_tol=1e-3)
+
+def test_virtual_midpoint_angle_matches_scalar_formula():
+    landmarks = _landmarks(seed=1)
+    valid = np.ones(len(landmarks), dtype=bool)
+
+    values, mask = compute_joint_angles(landmarks, valid, ["stance_angle"])["stance_angle"]
+
+    assert mask.all()
+    for t, frame in enumerate(landmarks):
+        hip_mid = (frame[23] + frame[24]) / 2
+        assert math.isclose(values[t], _scalar_angle(frame[27], hip_mid, frame[28]), abs_tol=1e-3)
+
+def test_invalid_and_degenerate_frames_are_masked():
+    landmarks = _landmarks(frames=4)
+    valid = np.array([True, False, True, True])
+    landmarks[2, 14] = landmarks[2, 12]                # 長さ0のベクトル
+    landmarks[3, 24, 3] = 0.1                          # visibilityが低い
+
+    results = compute_joint_angles(landmarks, valid, ["elbow_angle", "knee_angle"],
+                                   min_visibility=0.5)
+
+    elbow, elbow_mask = results["elbow_angle"]
+    assert elbow_mask.tolist() == [True, False, False, True]
+    assert np.isnan(elbow[[1, 2]]).all()
+    # 左右平均の角度は片側が使えなくても残りの側で計算する
+    knee, knee_mask = results["knee_angle"]
+    assert knee_mask[3]
+    assert math.isclose(knee[3], 180.0 - _scalar_angle(landmarks[3, 23], landmarks[3, 25],
+                                                       landmarks[3, 27]), abs_tol=1e-3)
+
+def test_all_definitions_are_computed_by_default():
+    landmarks = _landmarks(frames=3)
+    results = compute_joint_angles(landmarks, np.ones(3, dtype=bool))
+    assert set(results) == set(ANGLE_DEFINITIONS)
+    for values, mask in results.values():
+        assert values.shape == mask.shape == (3,)
+
+def test_body_rotation_uses_depth():
+    landmarks = _landmarks(frames=2)
+    landmarks[:, [11, 12, 23, 24], 2] = 0.0
+    # 肩ラインを x-z 平面内で45度ひねり、腰ラインは x 軸に沿わせる
+    landmarks[0, 11, [0, 2]] = (0.4, 0.0)
+    landmarks[0, 12, [0, 2]] = (0.5, 0.1)
+    landmarks[0, 23, [0, 2]] = (0.4, 0.0)
+    landmarks[0, 24, [0, 2]] = (0.5, 0.0)
+
+    values, mask = compute_joint_angles(landmarks, np.ones(2, dtype=bool),
+                                        ["body_rotation"])["body_rotation"]
+
+    assert math.isclose(values[0], 45.0, abs_tol=1e-3)
+    # 奥行きのないフレーム（z がすべて0）は無効
+    assert mask.tolist() == [True, False]
+    assert np.isnan(values[1])
@@ -0,0 +1,48 @@
+"""
+運動学計算と滑らかさスコアのテスト
+"""
+
+import numpy as np
+import pytest
+
+from backend.analysis.kinematics import compute_kinematics
+
+def _minimum_jerk(frames: int = 60, fps: float = 30.0):
+    """最小躍度軌道（始点と終点で速度・加速度0の直線移動）"""
+    t = np.arange(frames) / fps
+    tau = t / t[-1]
+    s = 10 * tau ** 3 - 15 * tau ** 4 + 6 * tau ** 5
+    xy = np.stack([100 + 600 * s, 300 + 200 * s], axis=1)
+    return xy, t
+
+def test_clean_swing_is_smooth():
+    xy, t = _minimum_jerk()
+    assert compute_kinematics(xy, t).smoothness() > 0.9
+
+@pytest.mark.parametrize("seed", range(8))
+def test_noisy_swing_scores_lower_than_clean(seed):
+    xy, t = _minimum_jerk()
+    clean = compute_kinematics(xy, t).smoothness()
+
+    noisy_xy = xy + np.random.default_rng(seed).normal(0.0, 20.0, xy.shape)
+    noisy = compute_kinematics(noisy_xy, t).smoothness()
+
+    assert noisy is not None
+    assert noisy < clean - 0.3
+
+def test_peak_ignores_filter_edges():
+    xy, t = _minimum_jerk()
+    kinematics = compute_kinematics(xy + np.random.default_rng(3).normal(0.0, 20.0, xy.shape), t)
+
+    peak_index = int(np.searchsorted(kinematics.timestamps, kinematics.peak()["peak_time"]))
+    assert kinematics.edge <= peak_index < len(kinematics) - kinematics.edge
+    segment = kinematics.active_segment()
+    assert segment.stop - segment.start > 2 * kinematics.edge
+
+def test_degenerate_segment_is_unknown():
+    t = np.arange(3) / 30
+    assert compute_kinematics(np.zeros((3, 2)), t).smoothness() is None
+
+    # 動いていない軌道は滑らかさを判断できない
+    t = np.arange(30) / 30
+    assert compute_kinematics(np.full((30, 2), 5.0), t).smoothness() is None
@@ -0,0 +1,69 @@
+"""
+静止フレームでの姿勢推定の省略判定のテスト
+"""
+
+import cv2
+import numpy as np
+import pytest
+
+from backend.analysis.kinovea_engine import SoftTennisKinoveaEngine
+
+class _StubPose:
+    """セッションの生成に必要なだけの姿勢推定バックエンド"""
+
+    def estimate(self, image):
+        return None
+
+    def reset(self):
+        pass
+
+@pytest.fixture
+def session():
+    engine = SoftTennisKinoveaEngine("balanced", preload_pose=False)
+    engine._idle_poses.put(_StubPose())
+    with engine.create_session(track_objects=False) as session:
+        yield session
+
+def _frame(session, *squares):
+    image = np.full((400, 400, 3), 80, dtype=np.uint8)
+    for x, y in squares:
+        cv2.rectangle(image, (x, y), (x + 19, y + 19), (255, 255, 255), -1)
+    return session.engine.frame_normalizer.normalize(image, "bgr")
+
+def _infer(session, frame, wrist_motion: float = 0.0):
+    """推論済みの状態（frame を基準とし、手首の移動量を指定）にする"""
+    session.person_roi = (0, 0, 400, 400)
+    session._gate_reference = session._gate_thumbnail(frame)
+    session._pose_reference = np.zeros((33, 4), dtype=np.float32)
+    session._wrist_motion = wrist_motion
+    session._skipped = 0
+
+def test_unchanged_person_region_is_static(session):
+    _infer(session, _frame(session))
+    assert session._is_static(_frame(session))
+
+def test_small_fast_motion_is_not_static(session):
+    reference = _frame(session)
+    moved = _frame(session, (300, 100))
+    # 領域全体の平均輝度差は小さい（旧判定の閾値3.0未満）
+    mean_diff = cv2.absdiff(session._gate_thumbnail(moved), session._gate_thumbnail(reference)).mean()
+    assert mean_diff < 3.0
+
+    _infer(session, reference)
+    assert not session._is_static(moved)
+
+def test_moving_wrist_prevents_skip(session):
+    frame = _frame(session)
+    _infer(session, frame, wrist_motion=0.05)
+    assert not session._is_static(frame)
+
+def test_wrist_motion_is_measured_between_inferences(session):
+    frame = _frame(session)
+    session.person_roi = (0, 0, 400, 400)
+    session._pose_reference = np.zeros((33, 4), dtype=np.float32)
+    landmarks = np.zeros((33, 4), dtype=np.float32)
+    landmarks[16, 0] = 0.1  # 右手首が40ピクセル移動
+
+    # 2フレームぶんの移動は1フレームあたり人物領域の高さの5%
+    assert session._measure_wrist_motion(frame, landmarks, 2) == pytest.approx(0.05)
+    assert session._measure_wrist_motion(frame, None, 1) is None
@@ -0,0 +1,88 @@
+"""
+共有メモリのフレームリングとデコードプロセスのリーダーのテスト
+"""
+
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+import pytest
+
+from backend.analysis import shared_frames
+from backend.analysis.shared_frames import ProcessFrameReader, SharedFrameRing
+
+FRAME_SIZE = (64, 48)
+
+@pytest.fixture
+def video(tmp_path):
+    path = str(tmp_path / "clip.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30.0, FRAME_SIZE)
+    for index in range(12):
+        writer.write(np.full((FRAME_SIZE[1], FRAME_SIZE[0], 3), index * 20, dtype=np.uint8))
+    writer.release()
+    return path
+
+def _frame(value: int = 0) -> np.ndarray:
+    return np.full((4, 5, 3), value, dtype=np.uint8)
+
+def test_view_returns_written_frame():
+    with SharedFrameRing(2, 64) as ring:
+        slot = ring.acquire(timeout=1)
+        frame_slot = ring.write(slot, _frame(7), frame_index=3, timestamp=0.1)
+        assert frame_slot.frame_index == 3
+        view = ring.view(slot)
+        assert view.shape == (4, 5, 3)
+        assert np.all(view == 7)
+        del view
+
+def test_slot_is_freed_after_all_consumers_release():
+    with SharedFrameRing(1, 64) as ring:
+        slot = ring.acquire(timeout=1)
+        ring.write(slot, _frame(), 0, 0.0, consumers=2)
+        ring.retain(slot)
+
+        ring.release(slot)
+        ring.release(slot)
+        with pytest.raises(TimeoutError):
+            ring.acquire(timeout=0.1)
+
+        ring.release(slot)
+        assert ring.acquire(timeout=1) == slot
+
+def test_write_rejects_zero_consumers():
+    with SharedFrameRing(1, 64) as ring:
+        slot = ring.acquire(timeout=1)
+        with pytest.raises(ValueError):
+            ring.write(slot, _frame(), 0, 0.0, consumers=0)
+
+def test_reader_reuses_slots_and_stops_early(video):
+    reader = ProcessFrameReader(video, decoder="opencv", slots=2)
+    with reader:
+        indices = []
+        for frame_index, frame, _ in reader:
+            assert frame.shape == (FRAME_SIZE[1], FRAME_SIZE[0], 3)
+            indices.append(frame_index)
+            # スロット数より多くのフレームを受け取れる（解放したスロットが再利用される）
+            if len(indices) == 5:
+                break
+        name = reader.ring._memory.name
+
+    assert indices == [0, 1, 2, 3, 4]
+    # 子プロセスが空きスロットを待っていても停止でき、共有メモリも削除される
+    assert reader._process is None
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
+
+def test_reader_propagates_producer_error_and_cleans_up(video, monkeypatch):
+    # スロットを先頭フレームより小さくして、子プロセスの書き込みを失敗させる
+    monkeypatch.setattr(shared_frames, "_probe_frame", lambda *args: (16, "bgr", 1.0))
+
+    reader = ProcessFrameReader(video, decoder="opencv", slots=2)
+    with pytest.raises(ValueError):
+        with reader:
+            name = reader.ring._memory.name
+            list(reader)
+
+    assert reader._process is None
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)